@@ -0,0 +1,228 @@
+"""
+    Golden-output regression harness for the detection and characteristics kernels.
+
+    Runs a reference and a candidate implementation of the analysis pipeline on the same fixtures
+    (synthetic recordings and, optionally, recorded *.h5 files), diffs spikes, burstlets, burst boundaries,
+    every characteristics table and the graph hub table, and reports the speedup of each stage.
+
+    Usage:
+        python benchmarks/golden.py --h5 recording_1.h5 recording_2.h5
+        python benchmarks/golden.py --candidate my_fast.find_bursts meaxtd.construct_graph
+
+    An implementation is a list of modules, each stage function is taken from the first module that defines it.
+    The default reference is the frozen copy in benchmarks/reference, the default candidate is the current meaxtd code.
+"""
+import os
+import sys
+import time
+import argparse
+import importlib
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import McsPy.McsData  # noqa: E402
+from meaxtd.data import Data  # noqa: E402
+from meaxtd.read_h5 import read_h5_file  # noqa: E402
+from meaxtd.synthetic import generate_recording  # noqa: E402
+from meaxtd.progress import NullProgress  # noqa: E402
+
+REFERENCE_MODULES = ['benchmarks.reference.find_bursts', 'benchmarks.reference.construct_graph']
+CANDIDATE_MODULES = ['meaxtd.find_bursts', 'meaxtd.construct_graph']
+
+SYNTHETIC_FIXTURES = [{'num_channels': 60, 'duration': 30.0, 'seed': 0},
+                      {'num_channels': 64, 'duration': 30.0, 'seed': 1},
+                      {'num_channels': 60, 'duration': 20.0, 'fs': 20000, 'seed': 2}]
+
+PARAMS = {'spike_method': 'Median', 'spike_coeff': -5.0, 'burst_window': 100,
+          'burst_params': {'TSR': 0.1, 'Burstlet': 5},
+          'delta': 0.05, 'num_frames': 50, 'cutoff': 5}
+
+SPIKE_FIELDS = ['spikes', 'spikes_starts', 'spikes_ends', 'spikes_amplitudes']
+BURSTLET_FIELDS = ['burstlets_starts', 'burstlets_ends', 'burstlets_amplitudes']
+BURST_FIELDS = ['bursts_starts', 'bursts_ends', 'bursts_burstlets']
+TABLE_FIELDS = ['global_characteristics', 'channel_characteristics', 'burst_characteristics',
+                'time_characteristics', 'graph_hub']
+
+
+def load_implementation(module_names):
+    return [importlib.import_module(module_name) for module_name in module_names]
+
+
+def get_stage(implementation, name):
+    for module in implementation:
+        if hasattr(module, name):
+            return getattr(module, name)
+    raise AttributeError(f"No module of the implementation defines {name}")
+
+
+def fresh_copy(data):
+    copy = Data()
+    copy.stream = data.stream
+    copy.time = data.time
+    copy.fs = data.fs
+    return copy
+
+
+def run_implementation(implementation, data, burst_method, end, graph_burst_id=0):
+    """
+        Run the pipeline of one implementation on a fresh copy of data.
+        Returns the result Data, {stage: seconds} and {stage: exception} for the stages that raised.
+    """
+    progress = NullProgress()
+    result = fresh_copy(data)
+    spike_method = PARAMS['spike_method']
+    spike_coeff = PARAMS['spike_coeff']
+    burst_window = PARAMS['burst_window']
+    stages = [('find_spikes', (result, [], spike_method, spike_coeff, 0, end, progress))]
+    if burst_method == 'Burstlet':
+        stages.append(('find_burstlets', (result, [], spike_method, spike_coeff, burst_window, 0, end, progress)))
+    stages.append(('find_bursts', (result, [], spike_method, spike_coeff, burst_method, burst_window,
+                                   PARAMS['burst_params'][burst_method], 0, end, progress)))
+    stages.append(('calculate_characteristics', (result, 0, end, progress)))
+    stages.append(('construct_delayed_spikes_graph', (result, progress, burst_method, PARAMS['delta'],
+                                                      PARAMS['num_frames'], PARAMS['cutoff'], graph_burst_id)))
+    timings = {}
+    errors = {}
+    for name, args in stages:
+        start = time.perf_counter()
+        try:
+            get_stage(implementation, name)(*args)
+        except Exception as error:
+            errors[name] = error
+            break
+        finally:
+            timings[name] = time.perf_counter() - start
+    return result, timings, errors
+
+
+def compare_values(name, reference, candidate, rtol, atol):
+    if isinstance(reference, str) or isinstance(candidate, str):
+        return [] if reference == candidate else [f"{name}: {reference!r} != {candidate!r}"]
+    reference = np.asarray(reference)
+    candidate = np.asarray(candidate)
+    if reference.shape != candidate.shape:
+        return [f"{name}: shape {reference.shape} != {candidate.shape}"]
+    if reference.dtype.kind in 'biuf' and candidate.dtype.kind in 'biuf':
+        if not np.allclose(reference, candidate, rtol=rtol, atol=atol, equal_nan=True):
+            mismatch = np.flatnonzero(~np.isclose(reference, candidate, rtol=rtol, atol=atol, equal_nan=True).ravel())
+            return [f"{name}: {len(mismatch)} values differ, first at {mismatch[0]}: "
+                    f"{reference.ravel()[mismatch[0]]} != {candidate.ravel()[mismatch[0]]}"]
+        return []
+    if not np.array_equal(reference.astype(str), candidate.astype(str)):
+        return [f"{name}: values differ"]
+    return []
+
+
+def compare_dicts(name, reference, candidate, rtol, atol, allow_new_keys=False):
+    if allow_new_keys and set(reference.keys()) <= set(candidate.keys()):
+        candidate = {key: candidate[key] for key in reference}
+    if set(reference.keys()) != set(candidate.keys()):
+        return [f"{name}: keys {sorted(map(str, reference.keys()))} != {sorted(map(str, candidate.keys()))}"]
+    differences = []
+    for key in reference:
+        differences += compare_values(f"{name}[{key!r}]", reference[key], candidate[key], rtol, atol)
+    return differences
+
+
+def sort_hub_table(hub):
+    order = np.argsort(hub['Electrode'], kind='stable')
+    return {key: [hub[key][i] for i in order] for key in hub}
+
+
+def burst_boundaries(data):
+    boundaries = []
+    for burst in data.bursts:
+        if isinstance(burst, dict):
+            boundaries.append((burst['start'], burst['end'], tuple(burst['channels'])))
+        else:
+            boundaries.append(tuple(sorted((interval.begin, interval.end, interval.data['signal_id'])
+                                           for interval in burst)))
+    return boundaries
+
+
+def compare_outputs(reference, candidate, rtol=1e-9, atol=1e-12):
+    """
+        Diff two analysed Data objects. Returns a list of human readable differences, empty if they match.
+    """
+    differences = []
+    for field in SPIKE_FIELDS + BURSTLET_FIELDS + BURST_FIELDS:
+        differences += compare_dicts(field, getattr(reference, field), getattr(candidate, field), rtol, atol)
+    for field in ['TSR', 'TSR_times', 'burst_activation', 'burst_deactivation']:
+        if hasattr(reference, field) or hasattr(candidate, field):
+            differences += compare_values(field, getattr(reference, field, None), getattr(candidate, field, None),
+                                          rtol, atol)
+    if burst_boundaries(reference) != burst_boundaries(candidate):
+        differences.append("bursts: burst boundaries differ")
+    for field in TABLE_FIELDS:
+        reference_table = getattr(reference, field, {})
+        candidate_table = getattr(candidate, field, {})
+        if field == 'graph_hub' and reference_table and candidate_table:
+            reference_table = sort_hub_table(reference_table)
+            candidate_table = sort_hub_table(candidate_table)
+        # new columns of the candidate are not differences, changed or missing ones are
+        differences += compare_dicts(field, reference_table, candidate_table, rtol, atol, allow_new_keys=True)
+    return differences
+
+
+def compare_errors(reference_errors, candidate_errors):
+    differences = []
+    for stage in set(reference_errors) | set(candidate_errors):
+        reference_error = reference_errors.get(stage)
+        candidate_error = candidate_errors.get(stage)
+        if type(reference_error) is not type(candidate_error):
+            differences.append(f"{stage}: reference raised {reference_error!r}, candidate raised {candidate_error!r}")
+    return differences
+
+
+def run_fixture(name, data, reference, candidate, rtol, atol):
+    end = int(np.ceil(data.time[-1] / 60))
+    fixture_ok = True
+    for burst_method in PARAMS['burst_params']:
+        reference_data, reference_timings, reference_errors = run_implementation(reference, data, burst_method, end)
+        candidate_data, candidate_timings, candidate_errors = run_implementation(candidate, data, burst_method, end)
+        differences = compare_errors(reference_errors, candidate_errors)
+        differences += compare_outputs(reference_data, candidate_data, rtol, atol)
+        status = 'OK' if not differences else 'MISMATCH'
+        fixture_ok = fixture_ok and not differences
+        print(f"{name} [{burst_method}]: {status}")
+        for stage in reference_timings:
+            reference_time = reference_timings[stage]
+            candidate_time = candidate_timings.get(stage, float('nan'))
+            speedup = reference_time / candidate_time if candidate_time > 0 else float('nan')
+            note = f" (raised {type(reference_errors[stage]).__name__})" if stage in reference_errors else ''
+            print(f"    {stage:32} {reference_time:10.4f} s -> {candidate_time:10.4f} s  x{speedup:7.2f}{note}")
+        for difference in differences[:20]:
+            print(f"    {difference}")
+    return fixture_ok
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Compare a candidate MEAXtd pipeline with the reference one')
+    parser.add_argument('--reference', nargs='+', default=REFERENCE_MODULES, help='reference modules')
+    parser.add_argument('--candidate', nargs='+', default=CANDIDATE_MODULES, help='candidate modules')
+    parser.add_argument('--h5', nargs='*', default=[], help='recorded fixtures')
+    parser.add_argument('--no-synthetic', action='store_true', help='skip the synthetic fixtures')
+    parser.add_argument('--rtol', type=float, default=1e-9)
+    parser.add_argument('--atol', type=float, default=1e-12)
+    args = parser.parse_args(args)
+
+    reference = load_implementation(args.reference)
+    candidate = load_implementation(args.candidate)
+
+    fixtures = []
+    if not args.no_synthetic:
+        for spec in SYNTHETIC_FIXTURES:
+            fixtures.append((f"synthetic {spec}", lambda spec=spec: generate_recording(network_burst_rate=0.3, **spec)))
+    McsPy.McsData.VERBOSE = False
+    for path in args.h5:
+        fixtures.append((path, lambda path=path: read_h5_file(path, NullProgress())))
+
+    all_ok = True
+    for name, load in fixtures:
+        all_ok = run_fixture(name, load(), reference, candidate, args.rtol, args.atol) and all_ok
+    return 0 if all_ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+    Timing benchmarks of the MEAXtd analysis pipeline on deterministic synthetic recordings.
+
+    Usage:
+        python benchmarks/run_benchmarks.py --channels 60 64 120 252 256 --durations 10 60 --output timings.csv
+
+    Each stage is run --repeat times on a fresh copy of the recording and the best time is reported.
+    The resulting csv (stage, burst method, channels, duration, fs, seconds) can be used to plot scaling curves.
+"""
+import os
+import sys
+import csv
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import McsPy.McsData  # noqa: E402
+from meaxtd.synthetic import generate_recording, write_h5_file, MEA_CHANNEL_COUNTS  # noqa: E402
+from meaxtd.read_h5 import read_h5_file  # noqa: E402
+from meaxtd.find_bursts import find_spikes, find_burstlets, find_bursts, calculate_characteristics  # noqa: E402
+from meaxtd.construct_graph import construct_delayed_spikes_graph  # noqa: E402
+from meaxtd.progress import NullProgress  # noqa: E402
+
+SPIKE_METHOD = 'Median'
+SPIKE_COEFF = -5.0
+BURST_WINDOW = 100
+BURST_PARAMS = {'TSR': 0.1, 'Burstlet': 5}
+GRAPH_PARAMS = {'delta': 0.05, 'num_frames': 50, 'cutoff': 5}
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def largest_burst_id(data):
+    num_spikes = data.burst_characteristics['Num spikes']
+    return max(range(0, len(num_spikes)), key=lambda burst_id: num_spikes[burst_id])
+
+
+def run_pipeline(data, burst_method, end, timings):
+    """
+        Run the analysis stages in GUI order on data and fill timings with {stage: seconds}.
+    """
+    progress = NullProgress()
+    data.clear_calculated()
+    timings['find_spikes'] = timed(find_spikes, data, [], SPIKE_METHOD, SPIKE_COEFF, 0, end, progress)
+    if burst_method == 'Burstlet':
+        timings['find_burstlets'] = timed(find_burstlets, data, [], SPIKE_METHOD, SPIKE_COEFF, BURST_WINDOW,
+                                          0, end, progress)
+    timings['find_bursts'] = timed(find_bursts, data, [], SPIKE_METHOD, SPIKE_COEFF, burst_method, BURST_WINDOW,
+                                   BURST_PARAMS[burst_method], 0, end, progress)
+    if not data.bursts:
+        return
+    timings['calculate_characteristics'] = timed(calculate_characteristics, data, 0, end, progress)
+    timings['construct_delayed_spikes_graph'] = timed(construct_delayed_spikes_graph, data, progress, burst_method,
+                                                      GRAPH_PARAMS['delta'], GRAPH_PARAMS['num_frames'],
+                                                      GRAPH_PARAMS['cutoff'], largest_burst_id(data))
+
+
+def benchmark_recording(num_channels, duration, fs, repeat, seed):
+    data = generate_recording(num_channels=num_channels, duration=duration, fs=fs, seed=seed)
+    end = int(duration // 60) + 1
+    results = {}
+
+    McsPy.McsData.VERBOSE = False
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'synthetic.h5')
+        write_h5_file(data, path)
+        results[('read_h5_file', '')] = min(timed(read_h5_file, path, NullProgress()) for _ in range(repeat))
+
+    for burst_method in BURST_PARAMS:
+        for _ in range(0, repeat):
+            timings = {}
+            try:
+                run_pipeline(data, burst_method, end, timings)
+            except Exception as error:
+                print(f"{burst_method} pipeline failed on {num_channels} channels: {error!r}")
+            for stage, seconds in timings.items():
+                key = (stage, '' if stage == 'find_spikes' else burst_method)
+                results[key] = min(results.get(key, seconds), seconds)
+    return results
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='MEAXtd pipeline benchmarks on synthetic recordings')
+    parser.add_argument('--channels', type=int, nargs='+', default=list(MEA_CHANNEL_COUNTS))
+    parser.add_argument('--durations', type=float, nargs='+', default=[10.0], help='recording lengths, s')
+    parser.add_argument('--fs', type=int, default=10000, help='sampling frequency, Hz')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default=None, help='csv file for the timings')
+    args = parser.parse_args(args)
+
+    rows = []
+    for duration in args.durations:
+        for num_channels in args.channels:
+            results = benchmark_recording(num_channels, duration, args.fs, args.repeat, args.seed)
+            for (stage, burst_method), seconds in results.items():
+                rows.append({'stage': stage, 'burst method': burst_method, 'channels': num_channels,
+                             'duration, s': duration, 'fs, Hz': args.fs, 'seconds': seconds})
+                print(f"{stage:32} {burst_method:9} {num_channels:4} ch {duration:8.1f} s {seconds:10.4f} s")
+
+    if args.output:
+        with open(args.output, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+            writer.writeheader()
+            writer.writerows(rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,5 @@
 import sys
+import multiprocessing
 from meaxtd import MEAXtd
 
 sys._excepthook = sys.excepthook
@@ -13,6 +14,7 @@ def my_exception_hook(exctype, value, traceback):
 sys.excepthook = my_exception_hook
 
 if __name__ == '__main__':
+    multiprocessing.freeze_support()
     try:
         sys.exit(MEAXtd.main())
     except:
@@ -1,22 +1,34 @@
 import sys
 import re
+import copy
 import traceback
 import pyqtgraph as pg
 import numpy as np
 import logging
 from meaxtd.read_h5 import read_h5_file
 from meaxtd.hdf5plot import HDF5PlotXY
-from meaxtd.find_bursts import find_spikes, find_bursts, calculate_characteristics
-from meaxtd.construct_graph import construct_delayed_spikes_graph
-from meaxtd.save_result import save_tables_to_file, save_plots_to_file, save_params_to_file, save_graph_to_file
-from meaxtd.stat_plots import raster_plot, tsr_plot, colormap_plot, tsr_plot_threshold
-from PySide6.QtCore import Qt, QRunnable, Slot, QThreadPool, QObject, Signal, QPoint, QRectF
+from meaxtd.lod import get_pyramid, get_pyramids
+from meaxtd.viewport import ViewportScheduler
+from meaxtd.construct_graph import construct_delayed_spikes_graph, construct_all_graphs, get_max_delay, GRAPH_LAYOUTS
+from meaxtd.connectivity import ConnectivityAccumulator
+from meaxtd.save_result import (create_result_dir, export_tables, save_params_to_file, save_graph_to_file,
+                                save_all_graph_hubs_to_file, save_connectivity_to_file, GRAPH_IMAGE_FORMATS,
+                                GRAPH_DATA_FORMATS)
+from meaxtd.figures import (get_figure_data, render_all_figures, shutdown_render_executor, ACTIVATION_LABEL,
+                            DEACTIVATION_LABEL)
+from meaxtd.export_queue import ExportQueue
+from meaxtd.analysis import AnalysisProcess, PartialResult, apply_analysis_result
+from meaxtd.progress import NullProgress, JobCancelled, Jobs
+from meaxtd.table_model import ColumnTableModel
+from meaxtd.stat_plots import raster_plot, tsr_plot, colormap_plot, tsr_plot_threshold, RasterPlot, EnvelopePlot
+from meaxtd.electrode_layout import get_layout
+from PySide6.QtCore import Qt, QRunnable, Slot, QThreadPool, QObject, Signal, QPoint, QRectF, QTimer
 from PySide6.QtGui import QIcon, QFont, QAction, QScreen, QPixmap, QBrush, QColor
 from PySide6.QtWidgets import (QApplication, QDialog, QFileDialog, QLayout, QFrame, QSizePolicy,
                                QHBoxLayout, QLabel, QMainWindow, QVBoxLayout, QWidget, QTabWidget, QSpacerItem,
                                QGroupBox, QGridLayout, QPushButton, QComboBox, QRadioButton, QPlainTextEdit,
-                               QProgressBar, QDoubleSpinBox, QSpinBox, QTableWidget, QTableWidgetItem, QHeaderView,
-                               QStyleFactory, QGraphicsView, QGraphicsScene, QGraphicsPixmapItem)
+                               QProgressBar, QDoubleSpinBox, QSpinBox, QTableView, QHeaderView, QCheckBox,
+                               QStyleFactory, QGraphicsView, QGraphicsScene, QGraphicsPixmapItem, QScrollBar)
 
 pg.setConfigOption('background', 'w')
 pg.setConfigOption('foreground', 'k')
@@ -71,6 +83,9 @@ class Worker(QRunnable):
         """
         try:
             result = self.fn(*self.args, **self.kwargs)
+        except JobCancelled:
+            # cancelled or superseded by a newer job, nothing to report
+            pass
         except:
             traceback.print_exc()
             exctype, value = sys.exc_info()[:2]
@@ -98,14 +113,6 @@ class ThreadLogger(logging.Handler):
         self.log.signal.emit(msg)
 
 
-class TableWidgetItem(QTableWidgetItem):
-    def __lt__(self, other):
-        try:
-            return float(self.text()) < float(other.text())
-        except ValueError:
-            return self.text() < other.text()
-
-
 class PhotoViewer(QGraphicsView):
     photoClicked = Signal(QPoint)
 
@@ -263,8 +270,25 @@ class MEAXtd(QMainWindow):
         self.center()
 
         self.threadpool = QThreadPool()
+        self.export_queue = ExportQueue(parent=self)
+        self.export_queue.finished.connect(self.export_finished)
+        self.export_queue.error.connect(self.logger.info)
+        self.analysis = AnalysisProcess(parent=self)
+        self.analysis.progress.connect(self.set_progress_value)
+        self.analysis.finished.connect(self.analysis_finished)
+        self.analysis.error.connect(self.logger.info)
+        self.analysis.channel_found.connect(self.channel_found)
+        self.partial = None
+        # partial results are shown at most every 200 ms, however fast the channels arrive
+        self.partial_timer = QTimer(self)
+        self.partial_timer.setSingleShot(True)
+        self.partial_timer.setInterval(200)
+        self.partial_timer.timeout.connect(self.show_partial)
+        self.jobs = Jobs()
         self.param_change = False
         self.excluded_channels = []
+        # (file, start, end) of the time window opened last, None for a whole file
+        self.loaded_window = None
 
     def center(self):
         frame_gm = self.frameGeometry()
@@ -296,12 +320,32 @@ class MEAXtd(QMainWindow):
         self.open_action.setShortcut('CTRL+O')
         self.open_action.triggered.connect(lambda: self.open_file())
 
+        self.open_window_action = QAction('Open Time Window', self)
+        self.open_window_action.setStatusTip('Open only the Signal start-end minutes of the included channels of a file.')
+        self.open_window_action.setShortcut('CTRL+SHIFT+O')
+        self.open_window_action.triggered.connect(lambda: self.open_file(window=True))
+
+        self.cancel_action = QAction('Cancel Running Jobs', self)
+        self.cancel_action.setStatusTip('Stop loading a file, the analysis and building graphs.')
+        self.cancel_action.triggered.connect(lambda: self.cancel_jobs())
+
         self.exit_action = QAction('Exit Application', self)
         self.exit_action.setStatusTip('Exit the application.')
         self.exit_action.setShortcut('CTRL+Q')
         self.exit_action.triggered.connect(lambda: QApplication.quit())
 
+        self.export_actions = []
+        for table_format in ['Excel', 'Parquet', 'Feather']:
+            export_action = QAction(f'Export Tables to {table_format}', self)
+            export_action.setStatusTip(f'Write the result tables of the last analysis as {table_format} files.')
+            export_action.triggered.connect(lambda checked=False, table_format=table_format: self.export_tables(table_format))
+            self.export_actions.append(export_action)
+
         self.file_sub_menu.addAction(self.open_action)
+        self.file_sub_menu.addAction(self.open_window_action)
+        for export_action in self.export_actions:
+            self.file_sub_menu.addAction(export_action)
+        self.file_sub_menu.addAction(self.cancel_action)
         self.file_sub_menu.addAction(self.exit_action)
 
     def help_menu(self):
@@ -315,13 +359,17 @@ class MEAXtd(QMainWindow):
 
         self.help_sub_menu.addAction(self.about_action)
 
-    def read_h5_data(self, filename, progress_callback):
-        data = read_h5_file(filename, progress_callback)
+    def read_h5_data(self, filename, progress_callback, start=None, end=None, excluded_channels=()):
+        data = read_h5_file(filename, progress_callback, start, end, excluded_channels)
         return data
 
     def set_data(self, data):
         self.data = data
 
+    def data_loaded(self, data):
+        self.set_data(data)
+        self.configure_buttons_after_open()
+
     def configure_buttons_after_open(self):
         if self.data:
             self.logger.info(f"File loaded.")
@@ -331,6 +379,10 @@ class MEAXtd(QMainWindow):
             self.plot.set_data(self.data, 0, int(np.ceil(self.data.time[-1] / 60)))
             self.stat.set_data(self.data, 0, int(np.ceil(self.data.time[-1] / 60)))
             self.plot.plot_signals(self.plot_grid)
+            self.plot_channel_combobox.blockSignals(True)
+            self.plot_channel_combobox.clear()
+            self.plot_channel_combobox.addItems([str(num) for num in range(1, self.data.stream.shape[1] + 1)])
+            self.plot_channel_combobox.blockSignals(False)
             self.signal_start.setValue(0)
             self.signal_end.setValue(int(np.ceil(self.data.time[-1] / 60)))
             self.signal_start.valueChanged.connect(self.start_time_spinbox_change)
@@ -340,28 +392,70 @@ class MEAXtd(QMainWindow):
         if value > self.progressBar.value() or self.progressBar.value() > 99:
             self.progressBar.setValue(value)
 
-    def open_file(self):
-        """Open a QFileDialog to allow the user to open a file into the application."""
+    def open_file(self, window=False):
+        """
+            Open a QFileDialog to allow the user to open a file into the application.
+            With window=True only the Signal start-end minutes of the included channels are read.
+        """
+        if window and self.signal_start.value() >= self.signal_end.value():
+            self.logger.info("End time must be later than Start time.")
+            return
         filename, accepted = QFileDialog.getOpenFileName(self, 'Open File', filter="*.h5")
         self.filename = filename
 
         if accepted:
-            self.signal_start.valueChanged.disconnect()
-            self.signal_end.valueChanged.disconnect()
-            if getattr(self, 'data', None) is not None:
-                self.data.clear_calculated()
-                self.clear_all()
-                self.plot.remove_signals(self.plot_grid)
+            if window:
+                self.loaded_window = (filename, self.signal_start.value(), self.signal_end.value())
+                self.load_file(*self.loaded_window, excluded_channels=list(self.excluded_channels))
+            else:
+                self.loaded_window = None
+                self.load_file(filename)
+
+    def load_file(self, filename, start=None, end=None, excluded_channels=()):
+        self.signal_start.valueChanged.disconnect()
+        self.signal_end.valueChanged.disconnect()
+        self.jobs.cancel_all()
+        self.analysis.cancel()
+        self.clear_partial()
+        if getattr(self, 'data', None) is not None:
+            self.data.clear_calculated()
+            self.clear_all()
+            self.plot.remove_signals(self.plot_grid)
+        if start is not None:
+            self.logger.info(f"File {filename} from {start} to {end} min loading...")
+        else:
             self.logger.info(f"File {filename} loading...")
-            worker = Worker(self.read_h5_data, filename=filename)
-            worker.signals.result.connect(self.set_data)
-            worker.signals.finished.connect(self.configure_buttons_after_open)
-            worker.signals.progress.connect(self.set_progress_value)
-            self.threadpool.start(worker)
+        worker = Worker(self.read_h5_data, filename=filename, start=start, end=end, excluded_channels=excluded_channels)
+        # a cancelled load has no result, the buttons are configured for the file loaded last
+        worker.signals.result.connect(self.data_loaded)
+        worker.signals.progress.connect(self.set_progress_value)
+        self.start_job('open', worker)
+
+    def get_unloaded_channels(self):
+        """
+            Included channels that were excluded when the time window was read, their stream columns are zeros.
+        """
+        data = getattr(self, 'data', None)
+        if data is None or data.loaded_channels is None:
+            return []
+        return [channel for channel in range(0, data.stream.shape[1])
+                if channel not in self.excluded_channels and channel not in data.loaded_channels]
+
+    def cancel_jobs(self):
+        self.jobs.cancel_all()
+        self.analysis.cancel()
+        self.logger.info("Running jobs cancelled.")
+
+    def set_param_change(self):
+        """
+            The analysis parameters changed: a running analysis is for the old ones and is cancelled.
+        """
+        self.param_change = True
+        self.analysis.cancel()
 
     def spike_combobox_change(self):
         self.logger.info(f"Spike method: {self.spike_method_combobox.currentText()}")
-        self.param_change = True
+        self.set_param_change()
 
     def burst_combobox_change(self):
         self.logger.info(f"Burst method: {self.burst_method_combobox.currentText()}")
@@ -379,46 +473,49 @@ class MEAXtd(QMainWindow):
             self.burst_param.setMinimum(-100.0)
             self.burst_param.setMaximum(100.0)
             self.burst_param.setValue(0.1)
-        self.param_change = True
+        self.set_param_change()
 
     def spike_spinbox_change(self):
         self.logger.info(f"Spike coefficient: {self.spike_coeff.value()}")
-        self.param_change = True
+        self.set_param_change()
 
     def burst_window_spinbox_change(self):
         self.logger.info(f"Burst window: {self.burst_window_size.value()} ms")
-        self.param_change = True
+        self.set_param_change()
 
     def burst_parameter_spinbox_change(self):
         if self.burst_method_combobox.currentText() == 'Burstlet':
             self.logger.info(f"Num channels for bursting: {int(self.burst_param.value())}")
         if self.burst_method_combobox.currentText() == 'TSR':
             self.logger.info(f"TSR threshold coefficient: {self.burst_param.value()}")
-        self.param_change = True
+        self.set_param_change()
 
     def start_time_spinbox_change(self):
         self.logger.info(f"Start time: {self.signal_start.value()} min")
         self.plot.set_data(self.data, self.signal_start.value(), self.signal_end.value())
         self.stat.set_data(self.data, self.signal_start.value(), self.signal_end.value())
-        self.param_change = True
+        self.set_param_change()
 
     def end_time_spinbox_change(self):
         self.logger.info(f"End time: {self.signal_end.value()} min")
         self.plot.set_data(self.data, self.signal_start.value(), self.signal_end.value())
         self.stat.set_data(self.data, self.signal_start.value(), self.signal_end.value())
-        self.param_change = True
+        self.set_param_change()
 
     def include_exclude_channel(self, button):
         if button.styleSheet() == u"background-color: rgb(85, 255, 127);":
             button.setStyleSheet(u"background-color: rgb(255, 85, 127);")
             self.logger.info(f"Channel {button.text()} excluded.")
             self.excluded_channels.append(int(button.text()) - 1)
-            self.param_change = True
+            self.set_param_change()
         else:
             button.setStyleSheet(u"background-color: rgb(85, 255, 127);")
             self.logger.info(f"Channel {button.text()} included.")
             self.excluded_channels.remove(int(button.text()) - 1)
-            self.param_change = True
+            self.set_param_change()
+            if self.get_unloaded_channels() and self.loaded_window is not None:
+                self.logger.info(f"Channel {button.text()} was not read from the file, the time window is reloading...")
+                self.load_file(*self.loaded_window, excluded_channels=list(self.excluded_channels))
 
     def configure_signal_button(self, button):
         size_policy_flag = button.sizePolicy().hasHeightForWidth()
@@ -439,6 +536,15 @@ class MEAXtd(QMainWindow):
     def cutoff_spinbox_change(self):
         self.logger.info(f"Cutoff: {self.graph_params_cutoff_spinbox.value()}% from top")
 
+    def graph_layout_combobox_change(self):
+        self.logger.info(f"Graph layout: {self.graph_params_layout_combobox.currentText()}")
+
+    def graph_format_checkbox_change(self):
+        self.logger.info(f"Graph formats: {', '.join(self.get_graph_formats()) or 'none'}")
+
+    def get_graph_formats(self):
+        return [graph_format for graph_format, checkbox in self.graph_format_checkboxes.items() if checkbox.isChecked()]
+
     def burst_id_spinbox_change(self):
         self.logger.info(f"Build graph for burst {self.burst_id_spinbox.value()}")
 
@@ -681,31 +787,76 @@ class MEAXtd(QMainWindow):
         self.main_tab_button_layout.addWidget(self.processqbtn)
         self.processqbtn.clicked.connect(lambda: self.process())
 
-    def process_all(self, progress_callback):
-        spike_method = self.spike_method_combobox.currentText()
-        spike_coeff = self.spike_coeff.value()
-        start = self.signal_start.value()
-        end = self.signal_end.value()
-        self.logger.info("Spikes and bursts finding...")
-        find_spikes(self.data, self.excluded_channels, spike_method, spike_coeff, start, end, progress_callback)
+    def get_analysis_params(self):
+        burst_method = self.burst_method_combobox.currentText()
+        if burst_method == 'Burstlet':
+            burst_param = int(self.burst_param.value())
+        if burst_method == 'TSR':
+            burst_param = self.burst_param.value()
 
+        excluded_channels = self.excluded_channels
+        excluded_channels.sort()
+        excluded_channels = [channel + 1 for channel in excluded_channels]
+
+        params_dict = {'Signal start, min': self.signal_start.value(),
+                       'Signal end, min': self.signal_end.value(),
+                       'Spike method': self.spike_method_combobox.currentText(),
+                       'Spike coefficient': self.spike_coeff.value(),
+                       'Burst method': burst_method,
+                       'Burst window, ms': self.burst_window_size.value(),
+                       'Burst param': burst_param,
+                       'Excluded channels': excluded_channels}
+        if self.data.time_offset:
+            # a time window of the file was opened, the signal start and end are relative to it
+            params_dict['Time window start in file, s'] = self.data.time_offset
+        return params_dict
+
+    def channel_found(self, data, signal_id, spikes, TSR_bins):
+        if self.partial is None or data is not self.partial.data:
+            return
+        self.partial.add_channel(signal_id, spikes, TSR_bins)
+        if not self.partial_timer.isActive():
+            self.partial_timer.start()
+
+    def show_partial(self):
+        """
+            Raster, TSR and channel table of the channels found so far, while the analysis is running.
+        """
+        if self.partial is None or self.partial.data is not self.data:
+            return
+        self.stat.plot_partial(self.stat_left_groupbox_layout, self.partial)
+        self.char_channel_table.setModel(ColumnTableModel(self.partial.get_channel_columns(self.excluded_channels),
+                                                          decimals=4, parent=self))
+
+    def clear_partial(self):
+        self.partial = None
+        self.partial_timer.stop()
+        self.stat.remove_partial(self.stat_left_groupbox_layout)
+
+    def analysis_finished(self, data, result):
+        if result is None or data is not self.data:
+            if not self.analysis.is_busy():
+                # cancelled, no newer analysis fills the plots
+                self.clear_partial()
+            return
+        self.clear_partial()
+        apply_analysis_result(self.data, result)
+        self.show_analysis()
+        self.set_progress_value(100)
+        self.save_characteristics()
+
+    def show_analysis(self):
+        """
+            Show the results of the analysis in the widgets (on the GUI thread).
+        """
         if self.data.spikes:
             self.logger.info("Spikes found.")
             self.highlight_none_rb.setCheckable(True)
             self.highlight_none_rb.setChecked(True)
             self.highlight_spike_rb.setCheckable(True)
             self.stat.plot_raster(self.stat_left_groupbox_layout)
-            self.stat.plot_tsr(self.stat_left_groupbox_layout)
-
-        burst_method = self.burst_method_combobox.currentText()
-        burst_window = self.burst_window_size.value()
-        if burst_method == 'Burstlet':
-            burst_param = int(self.burst_param.value())
-        if burst_method == 'TSR':
-            burst_param = self.burst_param.value()
-        find_bursts(self.data, self.excluded_channels, spike_method, spike_coeff, burst_method, burst_window,
-                    burst_param, start, end, progress_callback)
 
+        burst_param = self.params_dict['Burst param']
         self.TSR_threshold = np.mean(self.data.TSR) + burst_param * np.std(self.data.TSR)
         self.stat.set_threshold(self.TSR_threshold)
         self.stat.plot_tsr(self.stat_left_groupbox_layout)
@@ -716,112 +867,48 @@ class MEAXtd(QMainWindow):
         self.tabs.setCurrentWidget(self.stat_tab)
         self.tabs.setCurrentWidget(self.main_tab)
 
-        excluded_channels = self.excluded_channels
-        excluded_channels.sort()
-        excluded_channels = [channel + 1 for channel in excluded_channels]
-
-        params_dict = {'Signal start, min': start,
-                       'Signal end, min': end,
-                       'Spike method': spike_method,
-                       'Spike coefficient': spike_coeff,
-                       'Burst method': burst_method,
-                       'Burst window, ms': burst_window,
-                       'Burst param': burst_param,
-                       'Excluded channels': excluded_channels}
-
         if self.data.bursts:
             self.logger.info("Bursts found.")
             self.highlight_none_rb.setCheckable(True)
             self.highlight_none_rb.setChecked(True)
             self.highlight_spike_rb.setCheckable(True)
-            if self.burst_method_combobox.currentText() == 'Burstlet':
+            if self.params_dict['Burst method'] == 'Burstlet':
                 self.highlight_burstlet_rb.setCheckable(True)
             self.highlight_burst_rb.setCheckable(True)
             self.stat.plot_colormap(self.stat_right_groupbox_layout)
 
-        self.logger.info("Characteristics calculating...")
-        calculate_characteristics(self.data, start, end, progress_callback)
-
         if self.data.global_characteristics:
             self.logger.info("Characteristics calculated.")
-            self.char_global_table.setRowCount(len(list(self.data.global_characteristics.keys())))
-            for n, key in enumerate(self.data.global_characteristics):
-                curr_tab_item_0 = TableWidgetItem()
-                curr_tab_item_0.setData(Qt.EditRole, key)
-                self.char_global_table.setItem(n, 0, curr_tab_item_0)
+        self.fill_char_tables()
 
-                curr_item = round(self.data.global_characteristics[key], 4)
-                curr_tab_item_1 = TableWidgetItem(str(curr_item))
-                self.char_global_table.setItem(n, 1, curr_tab_item_1)
+        if self.data.bursts:
+            self.build_graph_btn.setEnabled(True)
+            self.build_all_graphs_btn.setEnabled(True)
+            self.burst_id_spinbox.setEnabled(True)
+            self.curr_graph_key = None
+            # setKeyboardTracking(False)
+
+    def fill_char_tables(self):
+        """
+            Show the characteristics in the tables once the analysis is finished (on the GUI thread).
+            The models read the characteristics columns, the burst model is shared with the graph tab table.
+        """
+        if self.data.global_characteristics:
+            global_columns = {'Characteristic': list(self.data.global_characteristics.keys()),
+                              'Value': list(self.data.global_characteristics.values())}
+            self.char_global_table.setModel(ColumnTableModel(global_columns, decimals=4, parent=self))
 
         if self.data.channel_characteristics:
-            headers = list(self.data.channel_characteristics.keys())
-            self.char_channel_table.setColumnCount(len(headers))
-            self.char_channel_table.setHorizontalHeaderLabels(headers)
-            signal_shift = 0
-            for signal_id in range(0, self.data.stream.shape[1]):
-                if signal_id not in self.excluded_channels:
-                    for n, key in enumerate(self.data.channel_characteristics):
-                        curr_item = self.data.channel_characteristics[key][signal_id]
-                        if isinstance(self.data.channel_characteristics[key][signal_id], float):
-                            curr_item = round(self.data.channel_characteristics[key][signal_id], 4)
-                            curr_tab_item = TableWidgetItem(str(curr_item))
-                            self.char_channel_table.setItem(signal_id - signal_shift, n, curr_tab_item)
-                        elif isinstance(self.data.channel_characteristics[key][signal_id], np.int32):
-                            curr_tab_item = TableWidgetItem(str(curr_item))
-                            self.char_channel_table.setItem(signal_id - signal_shift, n, curr_tab_item)
-                        else:
-                            curr_tab_item = TableWidgetItem()
-                            curr_tab_item.setData(Qt.EditRole, curr_item)
-                            self.char_channel_table.setItem(signal_id - signal_shift, n, curr_tab_item)
-                else:
-                    signal_shift += 1
+            rows = [signal_id for signal_id in range(0, self.data.stream.shape[1]) if signal_id not in self.excluded_channels]
+            self.char_channel_model = ColumnTableModel(self.data.channel_characteristics, rows, decimals=4, parent=self)
+            self.char_channel_table.setModel(self.char_channel_model)
             self.char_channel_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
 
         if self.data.burst_characteristics:
-            headers = list(self.data.burst_characteristics.keys())
-            self.char_burst_table.setColumnCount(len(headers))
-            self.char_burst_table.setRowCount(len(self.data.bursts))
-            self.char_burst_table.setHorizontalHeaderLabels(headers)
-
-            self.graph_table.setColumnCount(len(headers))
-            self.graph_table.setRowCount(len(self.data.bursts))
-            self.graph_table.setHorizontalHeaderLabels(headers)
-
-            for burst_id in range(0, len(self.data.bursts)):
-                for n, key in enumerate(self.data.burst_characteristics):
-                    curr_item = self.data.burst_characteristics[key][burst_id]
-                    if isinstance(self.data.burst_characteristics[key][burst_id], float):
-                        curr_item = round(self.data.burst_characteristics[key][burst_id], 2)
-                        if curr_item == 0.0:
-                            curr_item = round(self.data.burst_characteristics[key][burst_id], 6)
-                        curr_tab_item = TableWidgetItem(str(curr_item))
-                        self.char_burst_table.setItem(burst_id, n, curr_tab_item)
-                    elif isinstance(self.data.burst_characteristics[key][burst_id], np.int32):
-                        curr_tab_item = TableWidgetItem(str(curr_item))
-                        self.char_burst_table.setItem(burst_id, n, curr_tab_item)
-                    else:
-                        curr_tab_item = TableWidgetItem()
-                        curr_tab_item.setData(Qt.EditRole, curr_item)
-                        self.char_burst_table.setItem(burst_id, n, curr_tab_item)
-
-            for burst_id in range(0, len(self.data.bursts)):
-                for n, key in enumerate(self.data.burst_characteristics):
-                    curr_item = self.data.burst_characteristics[key][burst_id]
-                    if isinstance(self.data.burst_characteristics[key][burst_id], float):
-                        curr_item = round(self.data.burst_characteristics[key][burst_id], 2)
-                        if curr_item == 0.0:
-                            curr_item = round(self.data.burst_characteristics[key][burst_id], 6)
-                        curr_tab_item = TableWidgetItem(str(curr_item))
-                        self.graph_table.setItem(burst_id, n, curr_tab_item)
-                    elif isinstance(self.data.burst_characteristics[key][burst_id], np.int32):
-                        curr_tab_item = TableWidgetItem(str(curr_item))
-                        self.graph_table.setItem(burst_id, n, curr_tab_item)
-                    else:
-                        curr_tab_item = TableWidgetItem()
-                        curr_tab_item.setData(Qt.EditRole, curr_item)
-                        self.graph_table.setItem(burst_id, n, curr_tab_item)
-
+            self.burst_model = ColumnTableModel(self.data.burst_characteristics, parent=self)
+            self.graph_burst_model = ColumnTableModel(self.data.burst_characteristics, parent=self)
+            self.char_burst_table.setModel(self.burst_model)
+            self.graph_table.setModel(self.graph_burst_model)
             self.char_burst_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
             self.graph_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
 
@@ -829,53 +916,43 @@ class MEAXtd(QMainWindow):
             self.burst_id_spinbox.setMaximum(len(self.data.bursts))
 
         if self.data.time_characteristics:
-            headers = list(self.data.time_characteristics.keys())
-            self.char_time_table.setColumnCount(len(headers))
-            self.char_time_table.setRowCount(len(self.data.bursts))
-            self.char_time_table.setHorizontalHeaderLabels(headers)
-            for minute_id in range(0, len(self.data.time_characteristics['Start'])):
-                for n, key in enumerate(self.data.time_characteristics):
-                    curr_item = self.data.time_characteristics[key][minute_id]
-                    if isinstance(self.data.time_characteristics[key][minute_id], float):
-                        curr_item = round(self.data.time_characteristics[key][minute_id], 2)
-                        curr_tab_item = TableWidgetItem(str(curr_item))
-                        self.char_time_table.setItem(minute_id, n, curr_tab_item)
-                    elif isinstance(self.data.time_characteristics[key][minute_id], np.int32):
-                        curr_tab_item = TableWidgetItem(str(curr_item))
-                        self.char_time_table.setItem(minute_id, n, curr_tab_item)
-                    else:
-                        curr_tab_item = TableWidgetItem()
-                        curr_tab_item.setData(Qt.EditRole, curr_item)
-                        self.char_time_table.setItem(minute_id, n, curr_tab_item)
+            self.char_time_table.setModel(ColumnTableModel(self.data.time_characteristics, parent=self))
             self.char_time_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
 
         self.char_global_table.setSortingEnabled(True)
         self.char_channel_table.setSortingEnabled(True)
-        self.char_channel_table.sortItems(0, Qt.AscendingOrder)
+        self.char_channel_table.sortByColumn(0, Qt.AscendingOrder)
         self.char_burst_table.setSortingEnabled(True)
-        self.char_burst_table.sortItems(0, Qt.AscendingOrder)
+        self.char_burst_table.sortByColumn(0, Qt.AscendingOrder)
         self.char_time_table.setSortingEnabled(True)
-        self.char_time_table.sortItems(0, Qt.AscendingOrder)
+        self.char_time_table.sortByColumn(0, Qt.AscendingOrder)
         self.graph_table.setSortingEnabled(True)
-        self.graph_table.sortItems(0, Qt.AscendingOrder)
-
-        self.path_to_save = save_tables_to_file(self.data, self.filename, progress_callback)
-
-        save_plots_to_file(self.path_to_save, progress_callback,
-                           self.stat_left_groupbox, self.stat_right_groupbox,
-                           self.stat_left_groupbox_layout, self.stat_right_groupbox_layout)
-
-        save_params_to_file(self.path_to_save, progress_callback, params_dict)
-
-        if self.data.bursts:
-            self.build_graph_btn.setEnabled(True)
-            self.burst_id_spinbox.setEnabled(True)
-            self.curr_burst_id = None
-            # setKeyboardTracking(False)
+        self.graph_table.sortByColumn(0, Qt.AscendingOrder)
 
     def save_characteristics(self):
-        self.logger.info(f"Characteristics saved to {self.path_to_save}")
+        """
+            Queue the result files once the analysis worker is done: tables and parameters are written
+            in the background, figures are rendered from the result arrays in a separate process.
+        """
         self.param_change = False
+        if not self.data.global_characteristics:
+            return
+        self.path_to_save = create_result_dir(self.filename)
+        # the export reads the results in the background while a new analysis clears and refills them,
+        # so every result dict and list is copied; the arrays in them are never modified in place
+        data = copy.copy(self.data)
+        for key, value in list(vars(data).items()):
+            if isinstance(value, (dict, list)):
+                setattr(data, key, copy.copy(value))
+        figure_data = get_figure_data(self.data, self.params_dict['Signal start, min'], self.TSR_threshold)
+        background_jobs = [(export_tables, (data, self.path_to_save, NullProgress())),
+                           (save_params_to_file, (self.path_to_save, NullProgress(), self.params_dict)),
+                           (render_all_figures, ([(figure_data, self.path_to_save)],))]
+        self.logger.info("Characteristics saving...")
+        self.export_queue.start(self.path_to_save, background_jobs, [])
+
+    def export_finished(self, path):
+        self.logger.info(f"Characteristics saved to {path}")
 
     def process(self):
         if self.signal_start.value() >= self.signal_end.value():
@@ -883,15 +960,24 @@ class MEAXtd(QMainWindow):
         elif self.signal_end.value() > int(np.ceil(self.data.time[-1] / 60)):
             self.signal_end.setValue(int(np.ceil(self.data.time[-1] / 60)))
             self.logger.info(f"End time is set to {self.signal_end.value()}")
+        elif self.analysis.is_busy() and not self.param_change:
+            self.logger.info("Analysis is already running.")
+        elif self.get_unloaded_channels():
+            channels = ', '.join(str(channel + 1) for channel in self.get_unloaded_channels())
+            self.logger.warning(f"Channels {channels} were not read from the file, open the time window again "
+                                f"or exclude them.")
         else:
             if self.param_change:
                 self.data.clear_calculated()
                 self.clear_all()
+                self.param_change = False
             if not self.data.spikes:
-                worker = Worker(self.process_all)
-                worker.signals.finished.connect(self.save_characteristics)
-                worker.signals.progress.connect(self.set_progress_value)
-                self.threadpool.start(worker)
+                self.params_dict = self.get_analysis_params()
+                self.logger.info("Spikes and bursts finding...")
+                self.clear_partial()
+                self.partial = PartialResult(self.data, self.params_dict['Signal start, min'],
+                                             self.params_dict['Signal end, min'])
+                self.analysis.start(self.data, self.params_dict)
             else:
                 self.logger.info("Spikes and bursts already found.")
 
@@ -901,31 +987,86 @@ class MEAXtd(QMainWindow):
         delta = self.graph_params_delta_spinbox.value()
         num_frames = self.graph_params_tau_spinbox.value()
         cutoff = self.graph_params_cutoff_spinbox.value()
+        layout = self.graph_params_layout_combobox.currentText()
+        formats = self.get_graph_formats()
         burst_id = self.burst_id_spinbox.value() - 1
 
-        if burst_id == self.curr_burst_id:
+        if (burst_id, delta, num_frames, cutoff, layout, tuple(formats)) == self.curr_graph_key:
             return
 
         self.logger.info(f"Graph for burst {burst_id + 1} building...")
 
         construct_delayed_spikes_graph(self.data, progress_callback, burst_method, delta, num_frames, cutoff, burst_id)
-        self.curr_burst_id = burst_id
+        self.curr_graph_key = (burst_id, delta, num_frames, cutoff, layout, tuple(formats))
 
         if len(self.data.graph_hub['Electrode']) > 0:
             self.logger.info(f"Graph for burst {burst_id + 1} built.")
             graph_file = save_graph_to_file(self.path_to_save, progress_callback,
-                                            self.data.graph, self.data.graph_hub, burst_id)
+                                            self.data.graph, self.data.graph_hub, burst_id,
+                                            self.data.graph_connectivity, formats=formats, layout=layout,
+                                            num_channels=self.data.stream.shape[1])
         else:
             self.logger.info(f"Graph for burst {burst_id + 1} is empty.")
             graph_file = None
 
-        self.graph_picture.setPhoto(QPixmap(graph_file))
+        # without png (or edges) there is no picture, the view is cleared
+        self.graph_picture.setPhoto(QPixmap(graph_file) if graph_file else None)
 
     def process_graph(self):
         if self.data.bursts:
             worker = Worker(self.process_graph_pipeline)
             worker.signals.progress.connect(self.set_progress_value)
+            self.start_job('graph', worker)
+
+    def process_all_graphs_pipeline(self, progress_callback):
+        burst_method = self.burst_method_combobox.currentText()
+
+        delta = self.graph_params_delta_spinbox.value()
+        num_frames = self.graph_params_tau_spinbox.value()
+        cutoff = self.graph_params_cutoff_spinbox.value()
+        data_formats = [f for f in self.get_graph_formats() if f in GRAPH_DATA_FORMATS]
+
+        self.logger.info(f"Graphs for all {len(self.data.bursts)} bursts building...")
+
+        accumulator = ConnectivityAccumulator(self.data.stream.shape[1], get_max_delay(self.data, delta, num_frames))
+        connectivity = construct_all_graphs(self.data, progress_callback, burst_method, delta, num_frames, cutoff,
+                                            accumulator=accumulator)
+        hubs = {burst_id: connectivity[burst_id]['hub'] for burst_id in connectivity}
+        recording_hub = accumulator.connectivity(cutoff)['hub']
+        hub_file = save_all_graph_hubs_to_file(self.path_to_save, progress_callback, hubs, recording_hub)
+        for burst_id in connectivity:
+            save_connectivity_to_file(f"{self.path_to_save}/graph/", connectivity[burst_id], burst_id, data_formats)
+
+        self.logger.info(f"Graphs for all bursts built. Hub tables saved to {hub_file}")
+
+    def export_tables_pipeline(self, table_format, progress_callback):
+        self.logger.info(f"Exporting tables to {table_format}...")
+        export_tables(self.data, self.path_to_save, progress_callback, table_format)
+        self.logger.info(f"Tables exported to {self.path_to_save}")
+
+    def export_tables(self, table_format):
+        if hasattr(self, 'path_to_save'):
+            worker = Worker(self.export_tables_pipeline, table_format)
+            worker.signals.progress.connect(self.set_progress_value)
             self.threadpool.start(worker)
+        else:
+            self.logger.info("Run the analysis before exporting tables")
+
+    def process_all_graphs(self):
+        if self.data.bursts:
+            worker = Worker(self.process_all_graphs_pipeline)
+            worker.signals.progress.connect(self.set_progress_value)
+            self.start_job('all graphs', worker)
+
+    def start_job(self, key, worker):
+        """
+            Run a worker as a cancellable job: a newer job with the same key, or opening another file,
+            stops it at its next progress checkpoint.
+        """
+        handle = self.jobs.start(key)
+        worker.kwargs['progress_callback'] = handle.progress(worker.signals.progress)
+        worker.signals.finished.connect(lambda: self.jobs.finish(handle))
+        self.threadpool.start(worker)
 
     def create_param_groupbox(self):
         self.param_layout = QHBoxLayout(self.main_tab_param_widget)
@@ -1257,6 +1398,7 @@ class MEAXtd(QMainWindow):
             self.plot.burstlet_id = None
         if getattr(self.plot, 'burst_id', None) is not None:
             self.plot.burst_id = None
+        self.plot.show_channel(int(self.plot_channel_combobox.currentText()) - 1)
         self.plot_grid.layout().itemAtPosition(0, 0).widget().setXRange(0, 1)
 
     def remove_plot_data(self):
@@ -1342,33 +1484,30 @@ class MEAXtd(QMainWindow):
         self.stat = StatDialog(self.stat_left_groupbox_layout, self.stat_right_groupbox_layout)
 
     def create_char_layout(self):
-        self.char_global_table = QTableWidget(self.char_tab)
+        self.char_global_table = QTableView(self.char_tab)
         size_policy_char_left = QSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         size_policy_char_left.setHorizontalStretch(1)
         size_policy_char_left.setVerticalStretch(0)
         size_policy_char_left_flag = self.char_global_table.sizePolicy().hasHeightForWidth()
         size_policy_char_left.setHeightForWidth(size_policy_char_left_flag)
         self.char_global_table.setSizePolicy(size_policy_char_left)
-        headers = ['Characteristic', 'Value']
-        self.char_global_table.setColumnCount(2)
-        self.char_global_table.setHorizontalHeaderLabels(headers)
+        self.char_global_table.setModel(ColumnTableModel({'Characteristic': [], 'Value': []}, parent=self))
         self.char_global_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeToContents)
         self.char_global_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
         self.char_global_table.verticalHeader().setVisible(False)
         self.char_tab_layout.addWidget(self.char_global_table, 1, 0, 1, 1)
 
-        self.char_channel_table = QTableWidget(self.char_tab)
+        self.char_channel_table = QTableView(self.char_tab)
         size_policy_char_center = QSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         size_policy_char_center.setHorizontalStretch(2)
         size_policy_char_center.setVerticalStretch(0)
         size_policy_char_center_flag = self.char_channel_table.sizePolicy().hasHeightForWidth()
         size_policy_char_center.setHeightForWidth(size_policy_char_center_flag)
         self.char_channel_table.setSizePolicy(size_policy_char_center)
-        self.char_channel_table.setRowCount(60)
         self.char_channel_table.verticalHeader().setVisible(False)
         self.char_tab_layout.addWidget(self.char_channel_table, 1, 2, 1, 1)
 
-        self.char_burst_table = QTableWidget(self.char_tab)
+        self.char_burst_table = QTableView(self.char_tab)
         size_policy_char_right = QSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         size_policy_char_right.setHorizontalStretch(2)
         size_policy_char_right.setVerticalStretch(0)
@@ -1378,7 +1517,7 @@ class MEAXtd(QMainWindow):
         self.char_burst_table.verticalHeader().setVisible(False)
         self.char_tab_layout.addWidget(self.char_burst_table, 1, 3, 1, 1)
 
-        self.char_time_table = QTableWidget(self.char_tab)
+        self.char_time_table = QTableView(self.char_tab)
         size_policy_char_right = QSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         size_policy_char_right.setHorizontalStretch(2)
         size_policy_char_right.setVerticalStretch(0)
@@ -1405,8 +1544,8 @@ class MEAXtd(QMainWindow):
         self.char_tab_layout.addWidget(self.char_time_label, 0, 4, 1, 1)
 
     def choose_burst_cell(self):
-        curr_row = self.graph_table.currentRow()
-        cell_value = self.graph_table.item(curr_row, 0).text()
+        curr_row = self.graph_table.currentIndex().row()
+        cell_value = self.graph_burst_model.index(curr_row, 0).data(Qt.UserRole)
         burst_id = int(cell_value)
         self.burst_id_spinbox.setValue(burst_id)
 
@@ -1420,8 +1559,8 @@ class MEAXtd(QMainWindow):
         self.graph_info_panel.setSizePolicy(size_policy_graph_left)
         self.graph_info_panel_layout = QGridLayout(self.graph_info_panel)
 
-        self.graph_table = QTableWidget(self.graph_info_panel)
-        self.graph_table.cellClicked.connect(lambda: self.choose_burst_cell())
+        self.graph_table = QTableView(self.graph_info_panel)
+        self.graph_table.clicked.connect(lambda: self.choose_burst_cell())
         self.graph_info_panel_layout.addWidget(self.graph_table, 0, 0, 1, 1)
         self.graph_table.verticalHeader().setVisible(False)
 
@@ -1474,6 +1613,31 @@ class MEAXtd(QMainWindow):
         self.graph_params_cutoff_spinbox.valueChanged.connect(self.cutoff_spinbox_change)
         self.graph_params_groupbox_layout.addWidget(self.graph_params_cutoff_spinbox, 2, 1, 1, 1)
 
+        self.graph_layout_param_label = QLabel(self.graph_params_groupbox, text="Layout")
+        self.graph_params_groupbox_layout.addWidget(self.graph_layout_param_label, 3, 0, 1, 1)
+        self.graph_layout_param_label.setToolTip("Graphviz dot layout or nodes at electrode positions")
+        self.graph_layout_param_label.setToolTipDuration(1000)
+
+        self.graph_params_layout_combobox = QComboBox(self.graph_params_groupbox)
+        self.graph_params_layout_combobox.addItems(GRAPH_LAYOUTS)
+        self.graph_params_layout_combobox.currentIndexChanged.connect(self.graph_layout_combobox_change)
+        self.graph_params_groupbox_layout.addWidget(self.graph_params_layout_combobox, 3, 1, 1, 1)
+
+        self.graph_format_param_label = QLabel(self.graph_params_groupbox, text="Save as")
+        self.graph_params_groupbox_layout.addWidget(self.graph_format_param_label, 4, 0, 1, 1)
+        self.graph_format_param_label.setToolTip("Graph files to save, png is shown in the graph view")
+        self.graph_format_param_label.setToolTipDuration(1000)
+
+        self.graph_format_layout = QGridLayout()
+        self.graph_format_checkboxes = {}
+        for format_id, graph_format in enumerate(GRAPH_IMAGE_FORMATS + GRAPH_DATA_FORMATS):
+            checkbox = QCheckBox(graph_format, self.graph_params_groupbox)
+            checkbox.setChecked(graph_format == 'png')
+            checkbox.stateChanged.connect(self.graph_format_checkbox_change)
+            self.graph_format_layout.addWidget(checkbox, format_id // 3, format_id % 3, 1, 1)
+            self.graph_format_checkboxes[graph_format] = checkbox
+        self.graph_params_groupbox_layout.addLayout(self.graph_format_layout, 4, 1, 1, 1)
+
         self.graph_params_panel_layout.addWidget(self.graph_params_groupbox)
 
         self.graph_navigation_groupbox = QGroupBox(self.graph_params_panel, title="Navigation")
@@ -1510,6 +1674,14 @@ class MEAXtd(QMainWindow):
 
         self.graph_navigation_groupbox_layout.addWidget(self.build_graph_btn, 1, 0, 1, 2)
 
+        self.build_all_graphs_btn = QPushButton(self.graph_navigation_groupbox, text="Build All Graphs")
+        self.build_all_graphs_btn.setSizePolicy(size_policy_build_graph_btn)
+        self.build_all_graphs_btn.setDisabled(True)
+        self.build_all_graphs_btn.setToolTip("Compute graphs of all bursts and save their hub tables to one workbook")
+        self.build_all_graphs_btn.clicked.connect(lambda: self.process_all_graphs())
+
+        self.graph_navigation_groupbox_layout.addWidget(self.build_all_graphs_btn, 2, 0, 1, 2)
+
         self.graph_info_panel_layout.addWidget(self.graph_params_panel, 0, 1, 1, 1)
 
         self.graph_params_panel_layout.addWidget(self.graph_navigation_groupbox)
@@ -1605,13 +1777,29 @@ class AboutDialog(QDialog):
 
 
 class PlotDialog(QDialog):
+    """
+        Grid of channel plots sized to the number of channels of the recording. Only the plots of one screen
+        (max_rows x num_columns) exist, scrolling assigns other channels to them, so off-screen channels
+        have no plot items and no curves to update.
+    """
+    layer_pens = {'spike': pg.mkPen(color='k', width=2), 'burstlet': pg.mkPen(color='g', width=2),
+                  'burst': pg.mkPen(color='b', width=2)}
 
-    def __init__(self, plot_grid, data=None):
+    def __init__(self, plot_grid, data=None, num_columns=10, max_rows=6):
         super().__init__()
         self.data = data
+        self.num_columns = num_columns
+        self.max_rows = max_rows
+        self.first_row = 0
+        self.layer = None
+        self.signals_shown = data is not None
+        self.scheduler = ViewportScheduler(parent=self)
         self.init_ui(plot_grid)
 
     def set_data(self, data, start, end):
+        if data is not self.data:
+            # cached windows are keyed by (channel, layer), they belong to the previous recording
+            self.scheduler.clear()
         self.data = data
         self.start = start
         self.end = end
@@ -1620,47 +1808,116 @@ class PlotDialog(QDialog):
         self.fill_grid_layout(plot_grid)
 
     def fill_grid_layout(self, plot_grid):
-        num_rows = 10
-        num_columns = 6
-
-        plots = []
-
-        for row_id in range(0, num_rows):
-            plot_grid.setColumnStretch(row_id, num_columns)
-        for column_id in range(0, num_columns):
-            plot_grid.setRowStretch(column_id, num_rows)
-
-        for col_id in range(0, num_columns):
-            for row_id in range(0, num_rows):
-                curr_id = col_id * num_rows + row_id
-                curr_plot = pg.PlotWidget(title='#' + str(curr_id + 1))
+        self.slots = []
+        self.slot_curves = []
+        self.slot_channels = []
+
+        for column_id in range(0, self.num_columns):
+            plot_grid.setColumnStretch(column_id, self.max_rows)
+        for row_id in range(0, self.max_rows):
+            plot_grid.setRowStretch(row_id, self.num_columns)
+
+        for row_id in range(0, self.max_rows):
+            for column_id in range(0, self.num_columns):
+                slot_id = row_id * self.num_columns + column_id
+                curr_plot = pg.PlotWidget(title='#' + str(slot_id + 1))
                 curr_plot.enableAutoRange(False, False)
                 curr_plot.setXRange(0, 1)
                 curr_plot.setYRange(-0.002, 0.002)
                 curr_plot.setLabel('left', 'Voltage (μV)')
                 curr_plot.setLabel('bottom', 'Time (s)')
-                if self.data:
-                    curve = HDF5PlotXY()
-                    curr_data = self.data.stream[:, curr_id]
-                    curr_time = self.data.time
-                    curve.setHDF5(curr_time, curr_data, self.data.fs)
-                    curr_plot.addItem(curve)
-                plot_grid.addWidget(curr_plot, col_id, row_id)
-                plots.append(curr_plot)
-                if curr_id > 0:
-                    plots[curr_id - 1].getViewBox().setXLink(plots[curr_id])
-                    plots[curr_id - 1].getViewBox().setYLink(plots[curr_id])
+                plot_grid.addWidget(curr_plot, row_id, column_id)
+                self.slots.append(curr_plot)
+                self.slot_curves.append({})
+                self.slot_channels.append(None)
+                if slot_id > 0:
+                    self.slots[slot_id - 1].getViewBox().setXLink(curr_plot)
+                    self.slots[slot_id - 1].getViewBox().setYLink(curr_plot)
+
+        self.scroll_bar = QScrollBar(Qt.Vertical)
+        self.scroll_bar.setVisible(False)
+        self.scroll_bar.valueChanged.connect(self.scroll)
+        plot_grid.addWidget(self.scroll_bar, 0, self.num_columns, self.max_rows, 1)
+        self.update_grid()
+
+    def get_num_channels(self):
+        if self.data is None:
+            return len(self.slots)
+        return self.data.stream.shape[1]
+
+    def update_grid(self):
+        num_rows = int(np.ceil(self.get_num_channels() / self.num_columns))
+        self.first_row = min(self.first_row, max(num_rows - self.max_rows, 0))
+        self.scroll_bar.blockSignals(True)
+        self.scroll_bar.setRange(0, max(num_rows - self.max_rows, 0))
+        self.scroll_bar.setPageStep(self.max_rows)
+        self.scroll_bar.setValue(self.first_row)
+        self.scroll_bar.blockSignals(False)
+        self.scroll_bar.setVisible(num_rows > self.max_rows)
+        self.update_slots()
+
+    def scroll(self, first_row):
+        self.first_row = first_row
+        self.update_slots()
+
+    def show_channel(self, channel):
+        row_id = channel // self.num_columns
+        if not self.first_row <= row_id < self.first_row + self.max_rows:
+            self.scroll_bar.setValue(min(row_id, self.scroll_bar.maximum()))
+
+    def update_slots(self):
+        num_channels = self.get_num_channels()
+        channels = [self.first_row * self.num_columns + slot_id for slot_id in range(0, len(self.slots))]
+        channels = [channel if channel < num_channels else None for channel in channels]
+        if self.signals_shown:
+            # pyramids of the channels scrolled into view are built together in one pass
+            get_pyramids(self.data, 'signal', [channel for channel in channels if channel is not None])
+        for slot_id, channel in enumerate(channels):
+            self.set_slot_channel(slot_id, channel)
+
+    def get_layers(self, channel):
+        if channel is None or not self.signals_shown:
+            return []
+        layers = ['signal']
+        if self.layer is not None and channel in getattr(self.data, f"{self.layer}_stream"):
+            layers.append(self.layer)
+        return layers
+
+    def set_slot_channel(self, slot_id, channel):
+        """
+            Show a channel in a slot plot, reusing its curves. Curves of layers not shown are removed,
+            a slot without a channel is hidden.
+        """
+        curr_plot = self.slots[slot_id]
+        curr_curves = self.slot_curves[slot_id]
+        channel_changed = self.slot_channels[slot_id] != channel
+        self.slot_channels[slot_id] = channel
+        curr_plot.setVisible(channel is not None)
+        if channel is not None:
+            curr_plot.setTitle('#' + str(channel + 1))
+        layers = self.get_layers(channel)
+        for layer in list(curr_curves):
+            if layer not in layers:
+                curr_plot.removeItem(curr_curves.pop(layer))
+        for layer in layers:
+            if layer in curr_curves and not channel_changed:
+                continue
+            if layer not in curr_curves:
+                curr_curves[layer] = HDF5PlotXY()
+                curr_plot.addItem(curr_curves[layer])
+            if layer == 'signal':
+                curr_curves[layer].setHDF5(self.data.time, self.data.stream[:, channel], self.data.fs,
+                                           pyramid=get_pyramid(self.data, layer, channel), scheduler=self.scheduler,
+                                           cache_key=(channel, layer))
+            else:
+                curr_curves[layer].setHDF5(self.data.time, getattr(self.data, f"{layer}_stream")[channel], self.data.fs,
+                                           pen=self.layer_pens[layer], pyramid=get_pyramid(self.data, layer, channel),
+                                           scheduler=self.scheduler, cache_key=(channel, layer))
 
     def plot_signals(self, plot_grid):
-        num_rows = 10
-        num_columns = 6
-        for col_id in range(0, num_columns):
-            for row_id in range(0, num_rows):
-                curr_id = col_id * num_rows + row_id
-                curve = HDF5PlotXY()
-                curr_data = self.data.stream[:, curr_id]
-                curve.setHDF5(self.data.time, curr_data, self.data.fs)
-                plot_grid.layout().itemAtPosition(col_id, row_id).widget().addItem(curve)
+        self.signals_shown = True
+        self.first_row = 0
+        self.update_grid()
 
     def remove_data(self, plot_grid):
         if getattr(self, 'spike_id', None) is not None:
@@ -1669,183 +1926,109 @@ class PlotDialog(QDialog):
             self.burstlet_id = None
         if getattr(self, 'burst_id', None) is not None:
             self.burst_id = None
-        curr_curves = plot_grid.layout().itemAtPosition(0, 0).widget().plotItem.curves
-        if len(curr_curves) > 1:
-            num_rows = 10
-            num_columns = 6
-            for curve_id in range(len(curr_curves) - 1, 0, -1):
-                for col_id in range(0, num_columns):
-                    for row_id in range(0, num_rows):
-                        curr_plot_item = plot_grid.layout().itemAtPosition(col_id, row_id).widget().plotItem
-                        curr_plot_item.removeItem(curr_plot_item.curves[curve_id])
+        self.layer = None
+        self.scheduler.clear()
+        self.update_slots()
 
     def remove_signals(self, plot_grid):
-        num_rows = 10
-        num_columns = 6
-        for col_id in range(0, num_columns):
-            for row_id in range(0, num_rows):
-                curr_plot_item = plot_grid.layout().itemAtPosition(col_id, row_id).widget().plotItem
-                curr_plot_item.removeItem(curr_plot_item.curves[0])
+        self.signals_shown = False
+        self.layer = None
+        self.scheduler.clear()
+        self.update_slots()
 
     def add_spike_data(self, plot_grid):
-        num_rows = 10
-        num_columns = 6
-        for col_id in range(0, num_columns):
-            for row_id in range(0, num_rows):
-                curr_id = col_id * num_rows + row_id
-                spikes = HDF5PlotXY()
-                curr_spike_data = self.data.spike_stream[curr_id]
-                spikes.setHDF5(self.data.time, curr_spike_data, self.data.fs, pen=pg.mkPen(color='k', width=2))
-                plot_grid.layout().itemAtPosition(col_id, row_id).widget().addItem(spikes)
+        self.layer = 'spike'
+        self.update_slots()
 
     def add_burstlet_data(self, plot_grid):
-        num_rows = 10
-        num_columns = 6
-        for col_id in range(0, num_columns):
-            for row_id in range(0, num_rows):
-                curr_id = col_id * num_rows + row_id
-                burstlets = HDF5PlotXY()
-                curr_burstlet_data = self.data.burstlet_stream[curr_id]
-                burstlets.setHDF5(self.data.time, curr_burstlet_data, self.data.fs,
-                                  pen=pg.mkPen(color='g', width=2))
-                plot_grid.layout().itemAtPosition(col_id, row_id).widget().addItem(burstlets)
+        self.layer = 'burstlet'
+        self.update_slots()
 
     def add_burst_data(self, plot_grid):
-        num_rows = 10
-        num_columns = 6
-        for col_id in range(0, num_columns):
-            for row_id in range(0, num_rows):
-                curr_id = col_id * num_rows + row_id
-                bursts = HDF5PlotXY()
-                curr_burst_data = self.data.burst_stream[curr_id]
-                bursts.setHDF5(self.data.time, curr_burst_data, self.data.fs,
-                               pen=pg.mkPen(color='b', width=2))
-                plot_grid.layout().itemAtPosition(col_id, row_id).widget().addItem(bursts)
-                bursts_borders = HDF5PlotXY()
-                # curr_burst_borders = self.data.burst_borders[curr_id]
-                # bursts_borders.setHDF5(self.data.time, curr_burst_borders, self.data.fs,
-                #                       pen=pg.mkPen(color='r', width=1.5))
-                plot_grid.layout().itemAtPosition(col_id, row_id).widget().addItem(bursts_borders)
+        self.layer = 'burst'
+        self.update_slots()
 
-    def change_range_next(self, plot_grid, data_type, signal_id):
+    def get_num_events(self, data_type, curr_signal):
+        events = {'spike': self.data.spikes, 'burstlet': self.data.burstlets, 'burst': self.data.bursts_starts}[data_type]
+        if curr_signal not in events:
+            return 0
+        return len(events[curr_signal])
+
+    def get_event_range(self, data_type, curr_signal, event_id):
+        """
+            (left border, right border, amplitude) of the view showing an event of a channel, bursts have no amplitude.
+        """
         start_index = np.where(self.data.time == self.start * 60)[0][0]
-        curr_signal = signal_id - 1
         if data_type == 'spike':
-            if getattr(self, 'spike_id', None) is None:
-                self.spike_id = 0
-            else:
-                if self.spike_id < len(self.data.spikes[curr_signal]) - 1:
-                    self.spike_id += 1
-            if curr_signal in self.data.spikes and self.data.spikes[curr_signal].size > 0:
-                curr_spike = self.data.spikes[curr_signal][self.spike_id] + start_index
-                curr_spike_amplitude = self.data.spikes_amplitudes[curr_signal][self.spike_id]
-                left_border = max(0, self.data.time[curr_spike] - 0.5)
-                right_border = min(len(self.data.time), self.data.time[curr_spike] + 0.5)
-                plot_grid.layout().itemAtPosition(0, 0).widget().setXRange(left_border, right_border)
-                if curr_spike_amplitude > 0.004:
-                    top_border = max(0.002, curr_spike_amplitude / 2 + 0.0001)
-                    bottom_border = min(-0.002, curr_spike_amplitude / 2 - 0.0001)
-                    plot_grid.layout().itemAtPosition(0, 0).widget().setYRange(top_border, bottom_border)
+            curr_spike = self.data.spikes[curr_signal][event_id] + start_index
+            left_border = max(0, self.data.time[curr_spike] - 0.5)
+            right_border = min(len(self.data.time), self.data.time[curr_spike] + 0.5)
+            return left_border, right_border, self.data.spikes_amplitudes[curr_signal][event_id]
         if data_type == 'burstlet':
-            if getattr(self, 'burstlet_id', None) is None:
-                self.burstlet_id = 0
-            else:
-                if self.burstlet_id < len(self.data.burstlets[curr_signal]) - 1:
-                    self.burstlet_id += 1
-            if curr_signal in self.data.burstlets and len(self.data.burstlets[curr_signal]) > 0:
-                curr_burstlet = self.data.burstlets[curr_signal][self.burstlet_id] + start_index
-                curr_burstlet_start = self.data.burstlets_starts[curr_signal][self.burstlet_id] + start_index
-                curr_burstlet_end = self.data.burstlets_ends[curr_signal][self.burstlet_id] + start_index
-                curr_burstlet_len = self.data.time[curr_burstlet_end] - self.data.time[curr_burstlet_start]
-                if curr_burstlet_len > 1:
-                    left_border = self.data.time[curr_burstlet_start] - 0.1
-                    right_border = self.data.time[curr_burstlet_end] + 0.1
-                else:
-                    left_border = self.data.time[curr_burstlet_start] - (1 - curr_burstlet_len) / 2
-                    right_border = self.data.time[curr_burstlet_end] + (1 - curr_burstlet_len) / 2
-                plot_grid.layout().itemAtPosition(0, 0).widget().setXRange(left_border, right_border)
-                curr_burstlet_amplitude = self.data.burstlets_amplitudes[curr_signal][self.burstlet_id]
-                if curr_burstlet_amplitude > 0.004:
-                    top_border = max(0.002, curr_burstlet_amplitude / 2 + 0.0001)
-                    bottom_border = min(-0.002, curr_burstlet_amplitude / 2 - 0.0001)
-                    plot_grid.layout().itemAtPosition(0, 0).widget().setYRange(top_border, bottom_border)
-        if data_type == 'burst':
-            if getattr(self, 'burst_id', None) is None:
-                self.burst_id = 0
-            else:
-                if self.burst_id < len(self.data.bursts_starts[curr_signal]) - 1:
-                    self.burst_id += 1
-            if curr_signal in self.data.bursts_starts and len(self.data.bursts_starts[curr_signal]) > 0:
-                curr_burst_start = self.data.bursts_starts[curr_signal][self.burst_id] + start_index
-                curr_burst_end = self.data.bursts_ends[curr_signal][self.burst_id] + start_index
-                curr_burst_len = self.data.time[curr_burst_end] - self.data.time[curr_burst_start]
-                if curr_burst_len > 1:
-                    left_border = self.data.time[curr_burst_start] - 0.1
-                    right_border = self.data.time[curr_burst_end] + 0.1
-                else:
-                    left_border = self.data.time[curr_burst_start] - (1 - curr_burst_len) / 2
-                    right_border = self.data.time[curr_burst_end] + (1 - curr_burst_len) / 2
-                plot_grid.layout().itemAtPosition(0, 0).widget().setXRange(left_border, right_border)
+            curr_start = self.data.burstlets_starts[curr_signal][event_id] + start_index
+            curr_end = self.data.burstlets_ends[curr_signal][event_id] + start_index
+            curr_amplitude = self.data.burstlets_amplitudes[curr_signal][event_id]
+        else:
+            curr_start = self.data.bursts_starts[curr_signal][event_id] + start_index
+            curr_end = self.data.bursts_ends[curr_signal][event_id] + start_index
+            curr_amplitude = None
+        curr_len = self.data.time[curr_end] - self.data.time[curr_start]
+        if curr_len > 1:
+            left_border = self.data.time[curr_start] - 0.1
+            right_border = self.data.time[curr_end] + 0.1
+        else:
+            left_border = self.data.time[curr_start] - (1 - curr_len) / 2
+            right_border = self.data.time[curr_end] + (1 - curr_len) / 2
+        return left_border, right_border, curr_amplitude
+
+    def show_event(self, plot_grid, data_type, curr_signal):
+        event_id = getattr(self, f"{data_type}_id")
+        if self.get_num_events(data_type, curr_signal) == 0:
+            return
+        left_border, right_border, curr_amplitude = self.get_event_range(data_type, curr_signal, event_id)
+        plot_grid.layout().itemAtPosition(0, 0).widget().setXRange(left_border, right_border)
+        if curr_amplitude is not None and curr_amplitude > 0.004:
+            top_border = max(0.002, curr_amplitude / 2 + 0.0001)
+            bottom_border = min(-0.002, curr_amplitude / 2 - 0.0001)
+            plot_grid.layout().itemAtPosition(0, 0).widget().setYRange(top_border, bottom_border)
+        self.prefetch_events(data_type, curr_signal, event_id)
+
+    def prefetch_events(self, data_type, curr_signal, event_id, num_events=3):
+        """
+            Decimate the windows of the next and previous events in the background, so stepping to them is instant.
+            The ranges are padded the way setXRange pads them, to match the windows the view will request.
+        """
+        padding = self.slots[0].getViewBox().suggestPadding(0)
+        num_all_events = self.get_num_events(data_type, curr_signal)
+        x_ranges = []
+        for curr_id in range(max(event_id - num_events, 0), min(event_id + num_events + 1, num_all_events)):
+            if curr_id != event_id:
+                left_border, right_border, _ = self.get_event_range(data_type, curr_signal, curr_id)
+                margin = (right_border - left_border) * padding
+                x_ranges.append((left_border - margin, right_border + margin))
+        self.scheduler.prefetch(x_ranges)
+
+    def change_range_next(self, plot_grid, data_type, signal_id):
+        curr_signal = signal_id - 1
+        self.show_channel(curr_signal)
+        event_id = getattr(self, f"{data_type}_id", None)
+        if event_id is None:
+            event_id = 0
+        elif event_id < self.get_num_events(data_type, curr_signal) - 1:
+            event_id += 1
+        setattr(self, f"{data_type}_id", event_id)
+        self.show_event(plot_grid, data_type, curr_signal)
 
     def change_range_prev(self, plot_grid, data_type, signal_id):
-        start_index = np.where(self.data.time == self.start * 60)[0][0]
         curr_signal = signal_id - 1
-        if data_type == 'spike':
-            if getattr(self, 'spike_id', None) is None:
-                self.spike_id = 0
-            else:
-                if self.spike_id > 0:
-                    self.spike_id -= 1
-            if curr_signal in self.data.spikes and self.data.spikes[curr_signal].size > 0:
-                curr_spike = self.data.spikes[curr_signal][self.spike_id] + start_index
-                curr_spike_amplitude = self.data.spikes_amplitudes[curr_signal][self.spike_id]
-                left_border = max(0, self.data.time[curr_spike] - 0.5)
-                right_border = min(len(self.data.time), self.data.time[curr_spike] + 0.5)
-                plot_grid.layout().itemAtPosition(0, 0).widget().setXRange(left_border, right_border)
-                if curr_spike_amplitude > 0.004:
-                    top_border = max(0.002, curr_spike_amplitude / 2 + 0.0001)
-                    bottom_border = min(-0.002, curr_spike_amplitude / 2 - 0.0001)
-                    plot_grid.layout().itemAtPosition(0, 0).widget().setYRange(top_border, bottom_border)
-        if data_type == 'burstlet':
-            if getattr(self, 'burstlet_id', None) is None:
-                self.burstlet_id = 0
-            else:
-                if self.burstlet_id > 0:
-                    self.burstlet_id -= 1
-            if curr_signal in self.data.burstlets and len(self.data.burstlets[curr_signal]) > 0:
-                curr_burstlet = self.data.burstlets[curr_signal][self.burstlet_id] + start_index
-                curr_burstlet_start = self.data.burstlets_starts[curr_signal][self.burstlet_id] + start_index
-                curr_burstlet_end = self.data.burstlets_ends[curr_signal][self.burstlet_id] + start_index
-                curr_burstlet_len = curr_burstlet_end - curr_burstlet_start
-                if curr_burstlet_len > 1:
-                    left_border = self.data.time[curr_burstlet_start] - 0.1
-                    right_border = self.data.time[curr_burstlet_end] + 0.1
-                else:
-                    left_border = self.data.time[curr_burstlet_start] - (1 - curr_burstlet_len) / 2
-                    right_border = self.data.time[curr_burstlet_end] + (1 - curr_burstlet_len) / 2
-                plot_grid.layout().itemAtPosition(0, 0).widget().setXRange(left_border, right_border)
-                curr_burstlet_amplitude = self.data.burstlets_amplitudes[curr_signal][self.burstlet_id]
-                if curr_burstlet_amplitude > 0.004:
-                    top_border = max(0.002, curr_burstlet_amplitude / 2 + 0.0001)
-                    bottom_border = min(-0.002, curr_burstlet_amplitude / 2 - 0.0001)
-                    plot_grid.layout().itemAtPosition(0, 0).widget().setYRange(top_border, bottom_border)
-        if data_type == 'burst':
-            if getattr(self, 'burst_id', None) is None:
-                self.burst_id = 0
-            else:
-                if self.burst_id > 0:
-                    self.burst_id -= 1
-            if curr_signal in self.data.bursts_starts and len(self.data.bursts_starts[curr_signal]) > 0:
-                curr_burst_start = self.data.bursts_starts[curr_signal][self.burst_id] + start_index
-                curr_burst_end = self.data.bursts_ends[curr_signal][self.burst_id] + start_index
-                curr_burst_len = self.data.time[curr_burst_end] - self.data.time[curr_burst_start]
-                if curr_burst_len > 1:
-                    left_border = self.data.time[curr_burst_start] - 0.1
-                    right_border = self.data.time[curr_burst_end] + 0.1
-                else:
-                    left_border = self.data.time[curr_burst_start] - (1 - curr_burst_len) / 2
-                    right_border = self.data.time[curr_burst_end] + (1 - curr_burst_len) / 2
-                plot_grid.layout().itemAtPosition(0, 0).widget().setXRange(left_border, right_border)
+        self.show_channel(curr_signal)
+        event_id = getattr(self, f"{data_type}_id", None)
+        if event_id is None:
+            event_id = 0
+        elif event_id > 0:
+            event_id -= 1
+        setattr(self, f"{data_type}_id", event_id)
+        self.show_event(plot_grid, data_type, curr_signal)
 
 
 class StatDialog(QDialog):
@@ -1853,6 +2036,7 @@ class StatDialog(QDialog):
     def __init__(self, left_layout, right_layout, data=None):
         super().__init__()
         self.data = data
+        self.partial_items = None
         self.init_ui(left_layout, right_layout)
 
     def set_data(self, data, start, end):
@@ -1863,6 +2047,32 @@ class StatDialog(QDialog):
     def set_threshold(self, thr):
         self.TSR_threshold = thr
 
+    def plot_partial(self, left_layout, partial):
+        """
+            Update the raster and TSR of a running analysis from its PartialResult.
+        """
+        t_plot = left_layout.layout().itemAtPosition(0, 0).widget()
+        r_plot = left_layout.layout().itemAtPosition(1, 0).widget()
+        if self.partial_items is None:
+            self.partial_items = (EnvelopePlot(), RasterPlot(size=2, pen=None, brush=pg.mkBrush('k')))
+            t_plot.addItem(self.partial_items[0])
+            r_plot.addItem(self.partial_items[1])
+            t_plot.setLimits(xMin=0, xMax=self.data.time[-1])
+            r_plot.setLimits(xMin=0, xMax=self.data.time[-1])
+            r_plot.setXRange(0, self.data.time[-1])
+        tplot, rplot = self.partial_items
+        tplot.setEnvelope(partial.TSR_times, partial.TSR, pen=pg.mkPen('k'))
+        rplot.setRaster(*partial.raster_points(), self.data.stream.shape[1])
+        max_TSR = np.max(partial.TSR, initial=0)
+        t_plot.setLimits(yMin=-0.1, yMax=max_TSR + 1)
+        t_plot.setYRange(-1, max_TSR + 1)
+
+    def remove_partial(self, left_layout):
+        if self.partial_items is not None:
+            left_layout.layout().itemAtPosition(0, 0).widget().removeItem(self.partial_items[0])
+            left_layout.layout().itemAtPosition(1, 0).widget().removeItem(self.partial_items[1])
+            self.partial_items = None
+
     def init_ui(self, left_layout, right_layout):
         self.configure_left(left_layout)
         self.configure_right(right_layout)
@@ -1937,6 +2147,11 @@ class StatDialog(QDialog):
 
     def plot_colormap(self, right_layout):
         cm = pg.colormap.get('CET-R4')
+        num_rows, num_columns = get_layout(len(self.data.burst_activation)).grid_shape
+        for row in range(0, 2):
+            right_layout.layout().itemAtPosition(row, 0).widget().setXRange(0, num_columns)
+            right_layout.layout().itemAtPosition(row, 0).widget().setYRange(0, num_rows)
+
         act_max_value = np.max(self.data.burst_activation)
         act_plot = colormap_plot(self.data.burst_activation)
         right_layout.layout().itemAtPosition(0, 0).widget().addItem(act_plot)
@@ -1947,7 +2162,7 @@ class StatDialog(QDialog):
             act_bar = pg.ColorBarItem(interactive=False,
                                       values=(0, act_max_value),
                                       cmap=cm,
-                                      label="Spike times, ms")
+                                      label=ACTIVATION_LABEL)
         act_bar.setImageItem(act_plot, insert_in=right_layout.layout().itemAtPosition(0, 0).widget().plotItem)
 
         deact_max_value = np.max(self.data.burst_deactivation)
@@ -1960,10 +2175,11 @@ class StatDialog(QDialog):
             deact_bar = pg.ColorBarItem(interactive=False,
                                         values=(0, deact_max_value),
                                         cmap=cm,
-                                        label="Spike times, ms")
+                                        label=DEACTIVATION_LABEL)
         deact_bar.setImageItem(deact_plot, insert_in=right_layout.layout().itemAtPosition(1, 0).widget().plotItem)
 
     def remove_plots(self, left_layout, right_layout):
+        self.partial_items = None
         left_layout.layout().itemAtPosition(0, 0).widget().clear()
         left_layout.layout().itemAtPosition(1, 0).widget().clear()
         right_layout.layout().itemAtPosition(0, 0).widget().clear()
@@ -1976,5 +2192,7 @@ def main(args=sys.argv):
     screen = application.primaryScreen()
     rect = screen.availableGeometry()
     window = MEAXtd(rect)
+    application.aboutToQuit.connect(window.analysis.shutdown)
+    application.aboutToQuit.connect(shutdown_render_executor)
     window.show()
     sys.exit(application.exec_())
@@ -0,0 +1,266 @@
+import traceback
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from PySide6.QtCore import QObject, QTimer, Signal
+from meaxtd.data import Data
+from meaxtd.find_bursts import find_spikes, find_bursts, calculate_characteristics, get_time_indices, get_tsr_bins
+from meaxtd.progress import CancellableProgress, JobCancelled
+from meaxtd.shared_array import share_array, attach_array
+from meaxtd.stat_plots import raster_points
+
+INPUT_ATTRIBUTES = ['stream', 'time', 'time_offset', 'loaded_channels', 'fs', 'pyramids', 'graph_cache']
+STREAM_ATTRIBUTES = ['spike_stream', 'burstlet_stream', 'burst_stream', 'burst_borders']
+
+
+def analyse(data, params, progress_callback, channel_callback=None):
+    """
+        Spikes, bursts and characteristics of a recording for the parameters of the analysis (params_dict of the GUI).
+        channel_callback gets the spikes of every channel as soon as it is done, see find_spikes.
+    """
+    excluded_channels = [channel - 1 for channel in params['Excluded channels']]
+    start = params['Signal start, min']
+    end = params['Signal end, min']
+    find_spikes(data, excluded_channels, params['Spike method'], params['Spike coefficient'], start, end,
+                progress_callback, channel_callback)
+    find_bursts(data, excluded_channels, params['Spike method'], params['Spike coefficient'], params['Burst method'],
+                params['Burst window, ms'], params['Burst param'], start, end, progress_callback)
+    calculate_characteristics(data, start, end, progress_callback)
+
+
+def encode_stream(values):
+    """
+        Highlight streams are NaN outside the highlighted samples, only the indices and values of the others are sent.
+    """
+    indices = np.flatnonzero(~np.isnan(values))
+    return len(values), indices, values[indices]
+
+
+def decode_stream(encoded):
+    num_samples, indices, values = encoded
+    stream = np.full(num_samples, np.nan)
+    stream[indices] = values
+    return stream
+
+
+def get_analysis_result(data):
+    """
+        Everything the analysis added to data, without the recording itself, highlight streams encoded.
+    """
+    result = {}
+    for key, value in vars(data).items():
+        if key in INPUT_ATTRIBUTES:
+            continue
+        if key in STREAM_ATTRIBUTES:
+            value = {channel: encode_stream(values) for channel, values in value.items()}
+        result[key] = value
+    return result
+
+
+def apply_analysis_result(data, result):
+    for key, value in result.items():
+        if key in STREAM_ATTRIBUTES:
+            value = {channel: decode_stream(encoded) for channel, encoded in value.items()}
+        setattr(data, key, value)
+
+
+class PartialResult:
+    """
+        Spikes and TSR of the channels found so far, collected from channel_callback while the analysis runs,
+        so the raster, the TSR and the channel table can be shown before the analysis is finished.
+    """
+
+    def __init__(self, data, start, end):
+        self.data = data
+        self.start = start
+        start_index, end_index = get_time_indices(data, start, end)
+        self.num_seconds = data.time[end_index] - data.time[start_index]
+        self.TSR_times, num_bins = get_tsr_bins(data, start_index, end_index)
+        self.TSR = np.zeros(num_bins, dtype=int)
+        self.spikes = {}
+
+    def add_channel(self, signal_id, spikes, TSR_bins):
+        self.spikes[signal_id] = spikes
+        # the bins of one channel may repeat, like data.TSR[TSR_index - 1] += 1 of find_spikes
+        np.add.at(self.TSR, TSR_bins, 1)
+
+    def raster_points(self):
+        return raster_points(self.data, self.start, self.spikes)
+
+    def get_channel_columns(self, excluded_channels=()):
+        """
+            Channel table columns known before the analysis is finished, for the channels found so far.
+        """
+        channels = [signal_id for signal_id in sorted(self.spikes) if signal_id not in excluded_channels]
+        num_spikes = [len(self.spikes[signal_id]) for signal_id in channels]
+        return {'Channel': [signal_id + 1 for signal_id in channels],
+                'Num spikes': num_spikes,
+                'Num spikes per second': [channel_spikes / self.num_seconds for channel_spikes in num_spikes]}
+
+
+class QueueProgress:
+    """
+        Progress callback of the analysis process, values are read by the GUI process from the queue
+        as (job_id, value). channel_done() is the channel_callback of the analysis, the spikes of the job
+        are sent as (job_id, signal_id, spikes, TSR_bins).
+    """
+
+    def __init__(self, queue, job_id=0):
+        self.queue = queue
+        self.job_id = job_id
+        self.value = None
+
+    def emit(self, value):
+        if value != self.value:
+            self.value = value
+            self.queue.put((self.job_id, value))
+
+    def channel_done(self, signal_id, spikes, TSR_bins):
+        self.queue.put((self.job_id, signal_id, spikes, TSR_bins))
+
+
+progress_queue = None
+cancelled_job = None
+
+
+def init_analysis_process(queue, cancelled):
+    global progress_queue, cancelled_job
+    progress_queue = queue
+    cancelled_job = cancelled
+
+
+def run_analysis(stream_spec, time_spec, fs, params, job_id=0):
+    """
+        Analysis process: reads the recording from shared memory and returns the compact result.
+        Jobs up to the id in the shared cancelled_job value stop at their next progress checkpoint.
+    """
+    queue_progress = QueueProgress(progress_queue, job_id)
+    progress_callback = CancellableProgress(queue_progress, lambda: cancelled_job.value >= job_id)
+    if progress_callback.is_cancelled():
+        # superseded while queued, the shared memory of its recording may be released already
+        raise JobCancelled()
+    data = Data()
+    data.stream = attach_array(stream_spec)
+    data.time = attach_array(time_spec)
+    data.fs = fs
+    analyse(data, params, progress_callback, queue_progress.channel_done)
+    return get_analysis_result(data)
+
+
+class AnalysisProcess(QObject):
+    """
+        Runs the analysis of the GUI in a separate process, so the GUI thread keeps its interpreter to itself.
+        A stream read by read_h5_file is in shared memory already and the process maps it without a copy,
+        other streams (and the time) are copied into shared memory once and reused by every analysis of the stream,
+        the process returns compact results and finished(data, result) is emitted on the GUI thread,
+        where apply_analysis_result() puts them into data. result is None when the analysis failed or was cancelled.
+        Starting a job supersedes the older ones: in the GUI they are either for the same recording with other
+        parameters or for a recording that is not open any more, so they are cancelled at their next checkpoint.
+        channel_found(data, signal_id, spikes, TSR_bins) is emitted for every channel of the latest job
+        as soon as the process has found its spikes.
+    """
+    progress = Signal(int)
+    channel_found = Signal(object, int, object, object)
+    finished = Signal(object, object)
+    error = Signal(str)
+    job_done = Signal(object, object)
+
+    def __init__(self, poll_interval=50, parent=None):
+        super().__init__(parent)
+        self.executor = None
+        self.queue = None
+        self.cancelled = None
+        self.num_jobs = 0
+        self.job_data = None
+        self.stream = None
+        self.shared = []
+        self.specs = None
+        self.num_running = 0
+        self.timer = QTimer(self)
+        self.timer.setInterval(poll_interval)
+        self.timer.timeout.connect(self.read_progress)
+        self.job_done.connect(self.finish_job)
+
+    def get_executor(self):
+        if self.executor is None:
+            context = multiprocessing.get_context('spawn')
+            self.queue = context.Queue()
+            self.cancelled = context.Value('q', self.num_jobs - 1)
+            self.executor = ProcessPoolExecutor(max_workers=1, mp_context=context, initializer=init_analysis_process,
+                                                initargs=(self.queue, self.cancelled))
+        return self.executor
+
+    def share(self, data):
+        if self.stream is not data.stream:
+            self.release()
+            shared_stream, stream_spec = share_array(data.stream)
+            shared_time, time_spec = share_array(np.asarray(data.time))
+            self.stream = data.stream
+            # the copies are freed, and their files removed, by release()
+            self.shared = [shared_stream, shared_time]
+            self.specs = (stream_spec, time_spec)
+        return self.specs
+
+    def release(self):
+        self.shared = []
+        self.stream = None
+
+    def start(self, data, params):
+        executor = self.get_executor()
+        self.cancel()
+        stream_spec, time_spec = self.share(data)
+        job_id = self.num_jobs
+        self.num_jobs += 1
+        self.job_data = data
+        future = executor.submit(run_analysis, stream_spec, time_spec, data.fs, params, job_id)
+        self.num_running += 1
+        self.timer.start()
+        future.add_done_callback(lambda future: self.finish(data, future))
+        return future
+
+    def cancel(self):
+        """
+            Cancel every job started so far.
+        """
+        if self.cancelled is not None:
+            self.cancelled.value = self.num_jobs - 1
+
+    def is_busy(self):
+        return self.num_running > 0
+
+    def finish(self, data, future):
+        # executor thread: the signals are queued to the GUI thread
+        if isinstance(future.exception(), JobCancelled):
+            self.job_done.emit(data, None)
+        elif future.exception() is not None:
+            exception = future.exception()
+            self.error.emit(''.join(traceback.format_exception(type(exception), exception, exception.__traceback__)))
+            self.job_done.emit(data, None)
+        else:
+            self.job_done.emit(data, future.result())
+
+    def read_progress(self):
+        while not self.queue.empty():
+            message = self.queue.get()
+            # messages of cancelled and superseded jobs are dropped
+            if message[0] != self.num_jobs - 1 or message[0] <= self.cancelled.value:
+                continue
+            if len(message) == 2:
+                self.progress.emit(message[1])
+            else:
+                self.channel_found.emit(self.job_data, *message[1:])
+
+    def finish_job(self, data, result):
+        self.read_progress()
+        self.num_running -= 1
+        if self.num_running == 0:
+            self.timer.stop()
+        self.finished.emit(data, result)
+
+    def shutdown(self):
+        # a running analysis stops at its next checkpoint instead of keeping the application from quitting
+        self.cancel()
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+        self.release()
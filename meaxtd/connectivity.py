@@ -0,0 +1,121 @@
+from collections import deque
+import numpy as np
+from meaxtd.construct_graph import (count_delayed_spikes, connectivity_from_counts, get_burst_spike_trains,
+                                    get_max_delay)
+
+
+class ConnectivityAccumulator:
+    """
+        Delayed coincidence counts summed over segments of a recording (bursts or time windows).
+        Holds a channels x channels x delay tensor and the number of spikes per channel, segments can be added
+        and subtracted, so a sliding window is updated with the segments entering and leaving it.
+        Connectivity (C_ij, edges, hubs, sources and sinks) is taken from the sums without re-scanning spikes.
+    """
+
+    def __init__(self, num_channels, max_delay):
+        self.num_channels = num_channels
+        self.max_delay = max_delay
+        self.delayed_counts = np.zeros((num_channels, num_channels, max_delay), dtype=np.int64)
+        self.num_spikes = np.zeros(num_channels, dtype=np.int64)
+        self.num_segments = 0
+
+    def update(self, channels, spike_trains, sign=1):
+        """
+            Add (sign=1) or subtract (sign=-1) the counts of one segment, spike_trains[i] belongs to channels[i].
+        """
+        if len(channels) == 0:
+            return
+        self.update_counts(channels, [len(spikes) for spikes in spike_trains],
+                           count_delayed_spikes(spike_trains, self.max_delay), sign)
+
+    def update_counts(self, channels, num_spikes, delayed_counts, sign=1):
+        """
+            Add or subtract a segment whose spikes are counted already (num_spikes and delayed_counts of the channels).
+        """
+        channels = np.asarray(channels, dtype=int)
+        if len(channels) == 0:
+            return
+        self.delayed_counts[np.ix_(channels, channels)] += sign * delayed_counts
+        self.num_spikes[channels] += sign * np.asarray(num_spikes)
+        self.num_segments += sign
+
+    def add(self, channels, spike_trains):
+        self.update(channels, spike_trains, 1)
+
+    def subtract(self, channels, spike_trains):
+        self.update(channels, spike_trains, -1)
+
+    def add_burst(self, data, burst_method, burst_id):
+        self.add(*get_burst_spike_trains(data, burst_method, burst_id))
+
+    def subtract_burst(self, data, burst_method, burst_id):
+        self.subtract(*get_burst_spike_trains(data, burst_method, burst_id))
+
+    def add_window(self, data, start, end):
+        self.add(*get_window_spike_trains(data, start, end))
+
+    def subtract_window(self, data, start, end):
+        self.subtract(*get_window_spike_trains(data, start, end))
+
+    def connectivity(self, cutoff):
+        """
+            Connectivity of the accumulated segments in the format of compute_delayed_connectivity.
+        """
+        return connectivity_from_counts(np.arange(0, self.num_channels), self.num_spikes, self.delayed_counts, cutoff)
+
+
+def get_window_spike_trains(data, start, end):
+    """
+        Channels with spikes in [start, end) samples and their spikes inside the window.
+    """
+    channels = []
+    spike_trains = []
+    for channel in sorted(data.spikes):
+        start_id = np.searchsorted(data.spikes[channel], start)
+        end_id = np.searchsorted(data.spikes[channel], end)
+        if end_id > start_id:
+            channels.append(channel)
+            spike_trains.append(data.spikes[channel][start_id:end_id])
+    return channels, spike_trains
+
+
+def accumulate_bursts(data, progress_callback, burst_method, delta, num_frames):
+    """
+        Accumulator with the delayed coincidence counts of all bursts of the recording.
+    """
+    accumulator = ConnectivityAccumulator(data.stream.shape[1], get_max_delay(data, delta, num_frames))
+    for burst_id in range(0, len(data.bursts)):
+        progress_callback.emit(round(burst_id * 99 / len(data.bursts)))
+        accumulator.add_burst(data, burst_method, burst_id)
+    return accumulator
+
+
+def sliding_window_connectivity(data, progress_callback, delta, num_frames, cutoff, window, step, start=0, end=None):
+    """
+        Connectivity in windows of `window` samples moved by `step` samples (window must be a multiple of step).
+        Each step is counted once, the window is updated by adding the entering step and subtracting the stored counts
+        of the leaving one, so coincidences between spikes in different steps are not counted.
+        Returns a list of (window start, connectivity).
+    """
+    if window % step != 0:
+        raise ValueError(f"Window {window} must be a multiple of step {step}")
+    if end is None:
+        end = data.stream.shape[0]
+    steps_per_window = window // step
+    accumulator = ConnectivityAccumulator(data.stream.shape[1], get_max_delay(data, delta, num_frames))
+    step_starts = list(range(start, end - step + 1, step))
+    # (channels, num_spikes, delayed_counts) of the steps in the window
+    window_steps = deque()
+    result = []
+    for step_id, step_start in enumerate(step_starts):
+        progress_callback.emit(round(step_id * 99 / len(step_starts)))
+        channels, spike_trains = get_window_spike_trains(data, step_start, step_start + step)
+        window_steps.append((channels, [len(spikes) for spikes in spike_trains],
+                             count_delayed_spikes(spike_trains, accumulator.max_delay)))
+        accumulator.update_counts(*window_steps[-1])
+        if len(window_steps) > steps_per_window:
+            accumulator.update_counts(*window_steps.popleft(), sign=-1)
+        if step_id >= steps_per_window - 1:
+            window_start = step_starts[step_id - steps_per_window + 1]
+            result.append((window_start, accumulator.connectivity(cutoff)))
+    return result
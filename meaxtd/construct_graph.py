@@ -1,88 +1,53 @@
 import numpy as np
-import pandas as pd
-import datetime
-import operator
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 import pygraphviz as pgv
+from meaxtd.electrode_layout import get_layout
+
+GRAPH_LAYOUTS = ['dot', 'electrode']
 
 
 def get_electrode_info(num_channels):
-    electrode_info = {}
-    if num_channels == 60:
-        electrode_info[0] = {'X': 150.0, 'Y': 0.0}
-        electrode_info[1] = {'X': 300.0, 'Y': 0.0}
-        electrode_info[2] = {'X': 450.0, 'Y': 0.0}
-        electrode_info[3] = {'X': 600.0, 'Y': 0.0}
-        electrode_info[4] = {'X': 750.0, 'Y': 0.0}
-        electrode_info[5] = {'X': 900.0, 'Y': 0.0}
-
-        electrode_info[6] = {'X': 0.0, 'Y': 150.0}
-        electrode_info[7] = {'X': 150.0, 'Y': 150.0}
-        electrode_info[8] = {'X': 300.0, 'Y': 150.0}
-        electrode_info[9] = {'X': 450.0, 'Y': 150.0}
-        electrode_info[10] = {'X': 600.0, 'Y': 150.0}
-        electrode_info[11] = {'X': 750.0, 'Y': 150.0}
-        electrode_info[12] = {'X': 900.0, 'Y': 150.0}
-        electrode_info[13] = {'X': 1050.0, 'Y': 150.0}
-
-        electrode_info[14] = {'X': 0.0, 'Y': 300.0}
-        electrode_info[15] = {'X': 150.0, 'Y': 300.0}
-        electrode_info[16] = {'X': 300.0, 'Y': 300.0}
-        electrode_info[17] = {'X': 450.0, 'Y': 300.0}
-        electrode_info[18] = {'X': 600.0, 'Y': 300.0}
-        electrode_info[19] = {'X': 750.0, 'Y': 300.0}
-        electrode_info[20] = {'X': 900.0, 'Y': 300.0}
-        electrode_info[21] = {'X': 1050.0, 'Y': 300.0}
-
-        electrode_info[22] = {'X': 0.0, 'Y': 450.0}
-        electrode_info[23] = {'X': 150.0, 'Y': 450.0}
-        electrode_info[24] = {'X': 300.0, 'Y': 450.0}
-        electrode_info[25] = {'X': 450.0, 'Y': 450.0}
-        electrode_info[26] = {'X': 600.0, 'Y': 450.0}
-        electrode_info[27] = {'X': 750.0, 'Y': 450.0}
-        electrode_info[28] = {'X': 900.0, 'Y': 450.0}
-        electrode_info[29] = {'X': 1050.0, 'Y': 450.0}
-
-        electrode_info[30] = {'X': 0.0, 'Y': 600.0}
-        electrode_info[31] = {'X': 150.0, 'Y': 600.0}
-        electrode_info[32] = {'X': 300.0, 'Y': 600.0}
-        electrode_info[33] = {'X': 450.0, 'Y': 600.0}
-        electrode_info[34] = {'X': 600.0, 'Y': 600.0}
-        electrode_info[35] = {'X': 750.0, 'Y': 600.0}
-        electrode_info[36] = {'X': 900.0, 'Y': 600.0}
-        electrode_info[37] = {'X': 1050.0, 'Y': 600.0}
-
-        electrode_info[38] = {'X': 0.0, 'Y': 750.0}
-        electrode_info[39] = {'X': 150.0, 'Y': 750.0}
-        electrode_info[40] = {'X': 300.0, 'Y': 750.0}
-        electrode_info[41] = {'X': 450.0, 'Y': 750.0}
-        electrode_info[42] = {'X': 600.0, 'Y': 750.0}
-        electrode_info[43] = {'X': 750.0, 'Y': 750.0}
-        electrode_info[44] = {'X': 900.0, 'Y': 750.0}
-        electrode_info[45] = {'X': 1050.0, 'Y': 750.0}
-
-        electrode_info[46] = {'X': 0.0, 'Y': 900.0}
-        electrode_info[47] = {'X': 150.0, 'Y': 900.0}
-        electrode_info[48] = {'X': 300.0, 'Y': 900.0}
-        electrode_info[49] = {'X': 450.0, 'Y': 900.0}
-        electrode_info[50] = {'X': 600.0, 'Y': 900.0}
-        electrode_info[51] = {'X': 750.0, 'Y': 900.0}
-        electrode_info[52] = {'X': 900.0, 'Y': 900.0}
-        electrode_info[53] = {'X': 1050.0, 'Y': 900.0}
-
-        electrode_info[54] = {'X': 150.0, 'Y': 1050.0}
-        electrode_info[55] = {'X': 300.0, 'Y': 1050.0}
-        electrode_info[56] = {'X': 450.0, 'Y': 1050.0}
-        electrode_info[57] = {'X': 600.0, 'Y': 1050.0}
-        electrode_info[58] = {'X': 750.0, 'Y': 1050.0}
-        electrode_info[59] = {'X': 900.0, 'Y': 1050.0}
-    elif num_channels == 64:
-        for channel_id in range(0, num_channels):
-            electrode_info[channel_id] = {'X': channel_id % 8 * 150.0, 'Y': channel_id // 8 * 150.0}
-    return electrode_info
+    """
+        {channel: {'X': x, 'Y': y}} electrode positions in um of the default layout for num_channels.
+    """
+    positions = get_layout(num_channels).positions
+    return {channel_id: {'X': float(positions[channel_id, 0]), 'Y': float(positions[channel_id, 1])}
+            for channel_id in range(0, num_channels)}
 
 
-def construct_delayed_spikes_graph(data, progress_callback, burst_method, delta, num_frames, cutoff, burst_id):
-    num_channels = data.stream.shape[1]
+def count_delayed_spikes(spike_trains, max_delay, progress_callback=None):
+    """
+        Count delayed coincidences between all ordered pairs of sorted spike trains.
+        Each spike of train j is matched to the first spike of train i that precedes it by 1..max_delay samples,
+        which is the greedy first-match rule of the pairwise spike scan.
+        Returns counts of shape (trains, trains, max_delay), counts[i, j, tau - 1] holds the matches at delay tau.
+    """
+    num_trains = len(spike_trains)
+    counts = np.zeros((num_trains, num_trains, max_delay), dtype=np.int64)
+    if num_trains == 0 or max_delay == 0:
+        return counts
+    spike_trains = [np.asarray(spikes, dtype=np.int64) for spikes in spike_trains]
+    all_spikes = np.concatenate(spike_trains)
+    all_trains = np.repeat(np.arange(num_trains), [len(spikes) for spikes in spike_trains])
+    for train_id, spikes_1 in enumerate(spike_trains):
+        if progress_callback is not None:
+            progress_callback.emit(30 + round(train_id * 50 / num_trains))
+        if len(spikes_1) == 0:
+            continue
+        first_ids = np.searchsorted(spikes_1, all_spikes - max_delay, 'left')
+        has_candidate = first_ids < len(spikes_1)
+        delays = all_spikes[has_candidate] - spikes_1[first_ids[has_candidate]]
+        is_delayed = delays >= 1
+        bins = all_trains[has_candidate][is_delayed] * max_delay + delays[is_delayed] - 1
+        counts[train_id] = np.bincount(bins, minlength=num_trains * max_delay).reshape(num_trains, max_delay)
+    return counts
+
+
+def get_burst_window(data, burst_method, burst_id):
+    """
+        Start and end sample of a burst and the sorted list of its channels.
+    """
     curr_burst = data.bursts[burst_id]
     if burst_method == 'Burstlet':
         curr_burst = list(curr_burst)
@@ -95,6 +60,13 @@ def construct_delayed_spikes_graph(data, progress_callback, burst_method, delta,
         curr_burst_start = curr_burst['start']
         curr_burst_end = curr_burst['end']
         curr_channels = curr_burst['channels']
+    return curr_burst_start, curr_burst_end, curr_channels
+
+
+def get_max_delay(data, delta, num_frames):
+    """
+        Longest delay in samples checked for delayed spikes.
+    """
     sampling_rate = (data.time[1] - data.time[0]) * 1000  # in ms
     if sampling_rate >= delta:  # frame size = delta (should be equal or higher than sampling rate, default: 0.05 ms)
         frame_size = 1
@@ -102,114 +74,217 @@ def construct_delayed_spikes_graph(data, progress_callback, burst_method, delta,
         frame_size = int(delta // sampling_rate)
     # num_frames = round((curr_burst_end - curr_burst_start + 1) / frame_size)
     tau_list = list(range(1, num_frames + 1)) * frame_size
+    return max(tau_list) if tau_list else 0
 
-    progress_callback.emit(10)
 
-    electrode_info = get_electrode_info(num_channels)
-    electrode_frame_dict = {}
-    channel_id = 0
-    for channel in curr_channels:
-        progress_callback.emit(10 + round(channel_id * 20 / len(curr_channels)))
-        electrode_frame_dict[channel] = {}
-        electrode_frame_dict[channel]['X'] = electrode_info[channel]['X']
-        electrode_frame_dict[channel]['Y'] = electrode_info[channel]['Y']
+def get_burst_spike_trains(data, burst_method, burst_id, progress_callback=None):
+    """
+        Channels of a burst and their spikes inside the burst window.
+    """
+    curr_burst_start, curr_burst_end, curr_channels = get_burst_window(data, burst_method, burst_id)
+    spike_trains = []
+    for channel_id, channel in enumerate(curr_channels):
+        if progress_callback is not None:
+            progress_callback.emit(10 + round(channel_id * 20 / len(curr_channels)))
         start_id = np.searchsorted(data.spikes[channel], curr_burst_start)
         end_id = np.searchsorted(data.spikes[channel], curr_burst_end)
-        electrode_frame_dict[channel]['Spikes'] = data.spikes[channel][start_id:end_id]
-        channel_id += 1
-
-    c_ij_dict = {'Channel 1': [], 'Channel 2': [], 'Num spikes channel 1': [], 'Num spikes channel 2': [],
-                 'Num delayed spikes': [], 'C_ij_max': [], 'tau': []}
-    channel_id = 0
-    for channel_1 in curr_channels:
-        progress_callback.emit(30 + round(channel_id * 50 / len(curr_channels)))
-        for channel_2 in curr_channels:
-            if channel_2 != channel_1:
-                spikes_channel_1 = electrode_frame_dict[channel_1]['Spikes']
-                spikes_channel_2 = electrode_frame_dict[channel_2]['Spikes']
-                if len(spikes_channel_1) > 4 and len(spikes_channel_2) > 4:
-                    curr_tau_dict = dict.fromkeys(tau_list, 0)
-                    sync_ids = []
-                    for spike_1 in spikes_channel_1:
-                        curr_distances = [spike_2 - spike_1 for spike_2 in spikes_channel_2]
-                        for curr_id in range(0, len(curr_distances)):
-                            if curr_id not in sync_ids:
-                                curr_distance = curr_distances[curr_id]
-                                if curr_distance in curr_tau_dict:
-                                    curr_tau_dict[curr_distance] += 1
-                                    sync_ids.append(curr_id)
-                    max_tau = max(curr_tau_dict.items(), key=operator.itemgetter(1))[0]
-                    max_tau_id = tau_list.index(max_tau)
-                    num_del_sync_spikes = 0
-                    for curr_tau in tau_list[0:(max_tau_id + 1)]:
-                        num_del_sync_spikes += curr_tau_dict[curr_tau]
-                    c_ij = num_del_sync_spikes / len(spikes_channel_2)
-                    if c_ij > 0.0:
-                        c_ij_dict['Channel 1'].append(channel_1)
-                        c_ij_dict['Channel 2'].append(channel_2)
-                        c_ij_dict['Num spikes channel 1'].append(len(spikes_channel_1))
-                        c_ij_dict['Num spikes channel 2'].append(len(spikes_channel_2))
-                        c_ij_dict['Num delayed spikes'].append(num_del_sync_spikes)
-                        c_ij_dict['C_ij_max'].append(c_ij)
-                        c_ij_dict['tau'].append(max_tau)
-        channel_id += 1
-
-    c_ij_unsorted_df = pd.DataFrame.from_dict(c_ij_dict)
-    c_ij_sorted_df = c_ij_unsorted_df.sort_values(by=['C_ij_max'], ascending=False)
-    if len(c_ij_sorted_df['C_ij_max']) > 0:
-        percentile_value = np.percentile(c_ij_sorted_df['C_ij_max'], 100 - cutoff)
+        spike_trains.append(data.spikes[channel][start_id:end_id])
+    return curr_channels, spike_trains
+
+
+def compute_delayed_connectivity(channels, spike_trains, max_delay, cutoff, progress_callback=None, keep_counts=False):
+    """
+        Delayed-synchrony connectivity of one burst.
+        Takes and returns only arrays and dicts, so it can run in a worker process.
+        Returns a dict with the C_ij and best delay matrices over channels, the edges above the cutoff,
+        the node degrees and the hub table. With keep_counts it also holds the int32 delayed coincidence counts
+        of the burst channels ('delayed_counts'), so recording-wide connectivity is summed from them
+        without counting the spikes of the bursts again.
+    """
+    num_spikes = np.asarray([len(spikes) for spikes in spike_trains])
+    delayed_counts = count_delayed_spikes(spike_trains, max_delay, progress_callback)
+    connectivity = connectivity_from_counts(channels, num_spikes, delayed_counts, cutoff)
+    if keep_counts:
+        connectivity['delayed_counts'] = delayed_counts.astype(np.int32)
+    return connectivity
+
+
+def connectivity_from_counts(channels, num_spikes, delayed_counts, cutoff):
+    """
+        Connectivity result from spike numbers and delayed coincidence counts of shape (channels, channels, max_delay).
+    """
+    max_delay = delayed_counts.shape[2]
+    num_spikes = np.asarray(num_spikes)
+    pairs = (num_spikes[:, np.newaxis] > 4) & (num_spikes[np.newaxis, :] > 4)
+    np.fill_diagonal(pairs, False)
+    if max_delay > 0:
+        max_tau_ids = np.argmax(delayed_counts, axis=2)
+        cumulative_counts = np.cumsum(delayed_counts, axis=2)
+        num_del_sync_spikes = np.take_along_axis(cumulative_counts, max_tau_ids[:, :, np.newaxis], axis=2)[:, :, 0]
+    else:
+        max_tau_ids = np.zeros(pairs.shape, dtype=int)
+        num_del_sync_spikes = np.zeros(pairs.shape, dtype=int)
+    c_ij = np.where(pairs, num_del_sync_spikes / np.maximum(num_spikes[np.newaxis, :], 1), 0.0)
+    tau = np.where(pairs, max_tau_ids + 1, 0)
+    ids_1, ids_2 = np.nonzero(c_ij > 0.0)
+    channels = np.asarray(channels, dtype=int)
+
+    edges = {'Channel 1': channels[ids_1],
+             'Channel 2': channels[ids_2],
+             'Num spikes channel 1': num_spikes[ids_1],
+             'Num spikes channel 2': num_spikes[ids_2],
+             'Num delayed spikes': num_del_sync_spikes[ids_1, ids_2],
+             'C_ij_max': c_ij[ids_1, ids_2],
+             'tau': tau[ids_1, ids_2]}
+
+    if len(edges['C_ij_max']) > 0:
+        percentile_value = get_percentile(edges['C_ij_max'], 100 - cutoff)
     else:
         percentile_value = 0
-    c_ij_top = c_ij_sorted_df[c_ij_sorted_df['C_ij_max'] > percentile_value]
+    top_ids = np.flatnonzero(edges['C_ij_max'] > percentile_value)
+    top_ids = top_ids[np.argsort(-edges['C_ij_max'][top_ids], kind='stable')]
+    edges = {key: edges[key][top_ids] for key in edges}
 
-    progress_callback.emit(90)
+    num_nodes = channels.max() + 1 if len(channels) > 0 else 0
+    num_outgoing = np.bincount(edges['Channel 1'], minlength=num_nodes)
+    num_incoming = np.bincount(edges['Channel 2'], minlength=num_nodes)
+    num_connections = num_outgoing + num_incoming
+    node_channels = np.flatnonzero(num_connections)
+    total_num_edges = num_connections.sum()
+
+    hub_dict = {'Electrode': (node_channels + 1).tolist(),
+                'Num connections': num_connections[node_channels].tolist(),
+                'Hub coefficient': (num_connections[node_channels] / max(total_num_edges, 1)).tolist(),
+                'Num outgoing connections': num_outgoing[node_channels].tolist(),
+                'Num incoming connections': num_incoming[node_channels].tolist(),
+                'Source': np.where(num_incoming[node_channels] == 0, 'yes', 'no').tolist(),
+                'Sink': np.where(num_outgoing[node_channels] == 0, 'yes', 'no').tolist()}
+
+    return {'channels': channels, 'num_spikes': num_spikes, 'C_ij': c_ij, 'tau': tau,
+            'edges': edges, 'hub': hub_dict}
 
+
+def get_percentile(values, percent):
+    """
+        Percentile with linear interpolation, the default method of np.percentile,
+        taken from the two neighbouring order statistics with np.partition instead of a full sort.
+    """
+    virtual_id = (len(values) - 1) * (percent / 100)
+    previous_id = min(int(np.floor(virtual_id)), len(values) - 1)
+    next_id = min(previous_id + 1, len(values) - 1)
+    gamma = virtual_id - previous_id
+    partitioned = np.partition(values, [previous_id, next_id])
+    previous_value = partitioned[previous_id]
+    next_value = partitioned[next_id]
+    difference = next_value - previous_value
+    if gamma >= 0.5:
+        return next_value - difference * (1 - gamma)
+    return previous_value + difference * gamma
+
+
+def build_graph(connectivity):
+    """
+        Graphviz graph of the edges of a connectivity result, every node has the channel attribute (0-based).
+        The graph has no layout yet, see layout_graph.
+    """
     graph = pgv.AGraph(directed=True, strict=True)
-    curr_nodes = set(c_ij_top['Channel 1']).union(c_ij_top['Channel 2'])
-    nodes = {}
-    for node in curr_nodes:
-        nodes[f"Electrode {node + 1}"] = {'total': 0, 'post': 0}
-    for pre_node in list(c_ij_top['Channel 1']):
-        nodes[f"Electrode {pre_node + 1}"]['total'] += 1
-    for post_node in list(c_ij_top['Channel 2']):
-        nodes[f"Electrode {post_node + 1}"]['total'] += 1
-        nodes[f"Electrode {post_node + 1}"]['post'] += 1
-    total_num_edges = 0
-    for node in nodes:
-        graph.add_node(node,
-                       label=f"{node} [{nodes[node]['total']}]",
-                       width=nodes[node]['total'] / 4,
-                       height=nodes[node]['total'] / 5)
-        total_num_edges += nodes[node]['total']
-    for edge_id in range(0, len(c_ij_top['Channel 1'])):
-        cell_1 = f"Electrode {list(c_ij_top['Channel 1'])[edge_id] + 1}"
-        cell_2 = f"Electrode {list(c_ij_top['Channel 2'])[edge_id] + 1}"
-        graph.add_edge(cell_1, cell_2, weight=nodes[cell_2]['post'], label=f"{list(c_ij_top['tau'])[edge_id]}ms")
-    graph.layout("dot")
-    data.graph = graph
-
-    hub_dict = {'Electrode': [],
-                'Num connections': [],
-                'Hub coefficient': [],
-                'Num outgoing connections': [],
-                'Num incoming connections': [],
-                'Source': [],
-                'Sink': []}
-    for node in nodes:
-        hub_dict['Electrode'].append(int(node[10:]))
-        hub_dict['Num connections'].append(nodes[node]['total'])
-        hub_dict['Hub coefficient'].append(nodes[node]['total'] / total_num_edges)
-        hub_dict['Num outgoing connections'].append(nodes[node]['total'] - nodes[node]['post'])
-        hub_dict['Num incoming connections'].append(nodes[node]['post'])
-        if nodes[node]['post'] == 0:
-            hub_dict['Source'].append('yes')
-        else:
-            hub_dict['Source'].append('no')
-        if nodes[node]['total'] - nodes[node]['post'] == 0:
-            hub_dict['Sink'].append('yes')
-        else:
-            hub_dict['Sink'].append('no')
-
-    data.graph_hub = hub_dict
+    hub = connectivity['hub']
+    edges = connectivity['edges']
+    num_incoming = {}
+    for electrode, total, incoming in zip(hub['Electrode'], hub['Num connections'], hub['Num incoming connections']):
+        graph.add_node(f"Electrode {electrode}",
+                       label=f"Electrode {electrode} [{total}]",
+                       channel=electrode - 1,
+                       width=total / 4,
+                       height=total / 5)
+        num_incoming[electrode] = incoming
+    for channel_1, channel_2, tau in zip(edges['Channel 1'].tolist(), edges['Channel 2'].tolist(), edges['tau'].tolist()):
+        graph.add_edge(f"Electrode {channel_1 + 1}", f"Electrode {channel_2 + 1}",
+                       weight=num_incoming[channel_2 + 1], label=f"{tau}ms")
+    return graph
+
+
+def layout_graph(graph, layout='dot', num_channels=60):
+    """
+        Position the nodes of a graph once, later draws reuse the positions.
+        'dot' runs the Graphviz hierarchical layout, 'electrode' pins every node at its electrode position
+        so Graphviz only routes the edges.
+    """
+    if layout == 'electrode':
+        positions = get_layout(num_channels).positions
+        for node in graph.nodes():
+            channel = int(node.attr['channel'])
+            # pinned neato input positions are in inches, 1 um of the array is drawn as 1 point
+            node.attr['pos'] = f"{positions[channel, 0] / 72},{-positions[channel, 1] / 72}!"
+        graph.layout('neato')
+    else:
+        graph.layout(layout)
+
+
+def construct_delayed_spikes_graph(data, progress_callback, burst_method, delta, num_frames, cutoff, burst_id):
+    graph_key = (burst_id, delta, num_frames, cutoff)
+    progress_callback.emit(10)
+
+    if graph_key in data.graph_cache:
+        connectivity = data.graph_cache[graph_key]
+    else:
+        max_delay = get_max_delay(data, delta, num_frames)
+        curr_channels, spike_trains = get_burst_spike_trains(data, burst_method, burst_id, progress_callback)
+        connectivity = compute_delayed_connectivity(curr_channels, spike_trains, max_delay, cutoff, progress_callback)
+        data.graph_cache[graph_key] = connectivity
+
+    progress_callback.emit(90)
+
+    data.graph = build_graph(connectivity)
+    data.graph_hub = connectivity['hub']
+    data.graph_connectivity = connectivity
 
     progress_callback.emit(99)
+
+
+def construct_all_graphs(data, progress_callback, burst_method, delta, num_frames, cutoff, max_workers=None,
+                         accumulator=None):
+    """
+        Delayed-synchrony connectivity of every burst, computed in a process pool.
+        Results are kept in data.graph_cache under (burst_id, delta, num_frames, cutoff),
+        bursts that are already there are not recomputed.
+        The delayed counts of every burst are added to accumulator (a ConnectivityAccumulator) as the bursts complete
+        and are not kept in the cache, the counts of cached bursts are computed again in the pool.
+        Returns {burst_id: connectivity} for all bursts.
+        A progress callback raising JobCancelled stops the pool without waiting for the pending bursts.
+    """
+    max_delay = get_max_delay(data, delta, num_frames)
+    pending_ids = set(burst_id for burst_id in range(0, len(data.bursts))
+                      if (burst_id, delta, num_frames, cutoff) not in data.graph_cache)
+    count_ids = [] if accumulator is None else sorted(set(range(0, len(data.bursts))) - pending_ids)
+    if pending_ids or count_ids:
+        # spawn instead of fork: the GUI calls this from a worker thread of a running Qt application
+        mp_context = multiprocessing.get_context('spawn')
+        executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=mp_context)
+        try:
+            futures = {}
+            for burst_id in sorted(pending_ids) + count_ids:
+                curr_channels, spike_trains = get_burst_spike_trains(data, burst_method, burst_id)
+                if burst_id in pending_ids:
+                    future = executor.submit(compute_delayed_connectivity, curr_channels, spike_trains, max_delay, cutoff,
+                                             None, accumulator is not None)
+                else:
+                    future = executor.submit(count_delayed_spikes, spike_trains, max_delay)
+                futures[future] = (burst_id, curr_channels, [len(spikes) for spikes in spike_trains])
+            for num_done, future in enumerate(as_completed(futures)):
+                burst_id, curr_channels, num_spikes = futures[future]
+                if burst_id in pending_ids:
+                    connectivity = future.result()
+                    delayed_counts = connectivity.pop('delayed_counts', None)
+                    data.graph_cache[(burst_id, delta, num_frames, cutoff)] = connectivity
+                else:
+                    delayed_counts = future.result()
+                if accumulator is not None:
+                    accumulator.update_counts(curr_channels, num_spikes, delayed_counts)
+                progress_callback.emit(round((num_done + 1) * 99 / len(futures)))
+        except BaseException:
+            # cancelled (or failed): bursts not started yet are dropped, finished ones stay cached
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown(wait=True)
+    return {burst_id: data.graph_cache[(burst_id, delta, num_frames, cutoff)] for burst_id in range(0, len(data.bursts))}
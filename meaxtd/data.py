@@ -5,6 +5,10 @@ class Data:
     def __init__(self):
         self.stream = np.empty(shape=(1, 1))
         self.time = np.empty(shape=(1, 1))
+        # time of the first loaded sample in the recording file, s
+        self.time_offset = 0.0
+        # channels read from the file, None if the stream holds all of them
+        self.loaded_channels = None
         self.spikes = {}
         self.spikes_starts = {}
         self.spikes_ends = {}
@@ -25,6 +29,8 @@ class Data:
         self.channel_characteristics = {}
         self.burst_characteristics = {}
         self.time_characteristics = {}
+        self.graph_cache = {}
+        self.pyramids = {}
 
     def clear_calculated(self):
         self.spikes = {}
@@ -47,3 +53,5 @@ class Data:
         self.channel_characteristics = {}
         self.burst_characteristics = {}
         self.time_characteristics = {}
+        self.graph_cache = {}
+        self.pyramids = {key: pyramid for key, pyramid in self.pyramids.items() if key[0] == 'signal'}
@@ -0,0 +1,106 @@
+import numpy as np
+
+
+class ElectrodeLayout:
+    """
+        Electrode geometry of an MEA. Channel i sits at positions[i] = (X, Y) in um and in grid cell cells[i] = (row, column).
+        The distance matrix and the neighbour order are computed once, so spatial analyses index them
+        instead of looping over channel pairs. The pitch defaults to the smallest distance between two electrodes.
+    """
+
+    def __init__(self, name, positions, pitch=None):
+        self.name = name
+        self.positions = np.asarray(positions, dtype=float)
+        self.num_channels = self.positions.shape[0]
+        differences = self.positions[:, np.newaxis, :] - self.positions[np.newaxis, :, :]
+        self.distances = np.sqrt(np.sum(differences ** 2, axis=2))
+        if pitch is None:
+            pitch = float(np.min(self.distances[self.distances > 0]))
+        self.pitch = pitch
+        self.cells = np.rint((self.positions - self.positions.min(axis=0)) / pitch).astype(int)[:, ::-1]
+        self.grid_shape = tuple(int(size) for size in self.cells.max(axis=0) + 1)
+        # neighbours[i] lists the other channels from the nearest to the farthest one
+        self.neighbours = np.argsort(self.distances, axis=1, kind='stable')[:, 1:]
+
+    def get_neighbour_mask(self, radius):
+        """
+            Boolean channels x channels matrix of electrode pairs closer than radius um (a channel is not its own neighbour).
+        """
+        mask = self.distances <= radius
+        np.fill_diagonal(mask, False)
+        return mask
+
+    def to_grid(self, values, fill=np.nan):
+        """
+            Per-channel values placed on the electrode grid, cells without an electrode are filled with fill.
+        """
+        grid = np.full(self.grid_shape, fill, dtype=float)
+        grid[self.cells[:, 0], self.cells[:, 1]] = values
+        return grid
+
+
+def get_grid_cells(num_rows, num_columns, excluded=()):
+    """
+        Row-major (row, column) cells of a grid without the excluded ones.
+    """
+    return [(row, column) for row in range(0, num_rows) for column in range(0, num_columns)
+            if (row, column) not in excluded]
+
+
+def get_corner_cells(size, corner_size):
+    """
+        Triangles of corner_size * (corner_size + 1) / 2 cells in each corner of a size x size grid.
+    """
+    corner_cells = []
+    for row in range(0, corner_size):
+        for column in range(0, corner_size - row):
+            for corner_row, corner_column in [(row, column), (row, size - 1 - column),
+                                              (size - 1 - row, column), (size - 1 - row, size - 1 - column)]:
+                corner_cells.append((corner_row, corner_column))
+    return set(corner_cells)
+
+
+def grid_layout(name, cells, pitch):
+    cells = np.asarray(cells, dtype=float)
+    return ElectrodeLayout(name, cells[:, ::-1] * pitch, pitch)
+
+
+LAYOUTS = {'60MEA': grid_layout('60MEA', get_grid_cells(8, 8, get_corner_cells(8, 1)), 150.0),
+           '64MEA': grid_layout('64MEA', get_grid_cells(8, 8), 150.0),
+           '120MEA': grid_layout('120MEA', get_grid_cells(12, 12, get_corner_cells(12, 3)), 100.0),
+           '252MEA': grid_layout('252MEA', get_grid_cells(16, 16, get_corner_cells(16, 1)), 100.0),
+           '256MEA': grid_layout('256MEA', get_grid_cells(16, 16), 100.0)}
+
+DEFAULT_LAYOUTS = {60: '60MEA', 64: '64MEA', 120: '120MEA', 252: '252MEA', 256: '256MEA'}
+
+
+def get_layout(num_channels, name=None):
+    """
+        Layout by name or, without a name, the default layout for the number of channels.
+        Channel counts without a registered layout get a square grid filled row by row,
+        which is registered as grid<num_channels> on first use.
+    """
+    if name is not None:
+        return LAYOUTS[name]
+    if num_channels in DEFAULT_LAYOUTS:
+        return LAYOUTS[DEFAULT_LAYOUTS[num_channels]]
+    name = f"grid{num_channels}"
+    if name not in LAYOUTS:
+        num_columns = int(np.ceil(np.sqrt(num_channels)))
+        cells = [(channel_id // num_columns, channel_id % num_columns) for channel_id in range(0, num_channels)]
+        LAYOUTS[name] = grid_layout(name, cells, 150.0)
+    return LAYOUTS[name]
+
+
+def load_layout(path, name=None, pitch=None):
+    """
+        Read a custom layout from a csv file with X and Y columns in um, one row per channel in channel order,
+        and register it under name (the file name by default).
+        The pitch defaults to the smallest distance between two electrodes.
+    """
+    table = np.genfromtxt(path, delimiter=',', names=True)
+    positions = np.column_stack([table['X'], table['Y']])
+    if name is None:
+        name = path.replace('\\', '/').split('/')[-1].rsplit('.', 1)[0]
+    LAYOUTS[name] = ElectrodeLayout(name, positions, pitch)
+    return LAYOUTS[name]
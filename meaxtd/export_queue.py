@@ -0,0 +1,74 @@
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from PySide6.QtCore import QObject, QTimer, Signal
+
+
+class ExportQueue(QObject):
+    """
+        Writes results once the analysis is finished, so the GUI is interactive while files are written.
+        File-only jobs (tables, parameters) run concurrently in a thread pool. Jobs rendering Qt scenes must stay
+        on the GUI thread, they are run one per event loop iteration so the window keeps responding between them.
+        finished(path) is emitted when every job of an export is done, error(message) for each failed job.
+    """
+    finished = Signal(str)
+    error = Signal(str)
+    job_done = Signal(int)
+
+    def __init__(self, max_workers=2, parent=None):
+        super().__init__(parent)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.num_exports = 0
+        self.paths = {}
+        self.num_pending = {}
+        self.render_jobs = []
+        self.job_done.connect(self.finish_job)
+
+    def start(self, path, background_jobs, render_jobs):
+        """
+            Queue one export. Jobs are (function, args) tuples, background ones must not touch Qt objects.
+        """
+        export_id = self.num_exports
+        self.num_exports += 1
+        if len(background_jobs) + len(render_jobs) == 0:
+            self.finished.emit(path)
+            return export_id
+        self.paths[export_id] = path
+        self.num_pending[export_id] = len(background_jobs) + len(render_jobs)
+        for fn, args in background_jobs:
+            future = self.executor.submit(fn, *args)
+            future.add_done_callback(lambda future, export_id=export_id: self.finish_future(export_id, future))
+        if not self.render_jobs:
+            QTimer.singleShot(0, self.run_render_job)
+        self.render_jobs.extend([(export_id, fn, args) for fn, args in render_jobs])
+        return export_id
+
+    def is_busy(self):
+        return len(self.num_pending) > 0
+
+    def finish_future(self, export_id, future):
+        # pool thread: the signal is queued to the GUI thread
+        if future.exception() is not None:
+            exception = future.exception()
+            self.error.emit(''.join(traceback.format_exception(type(exception), exception, exception.__traceback__)))
+        self.job_done.emit(export_id)
+
+    def run_render_job(self):
+        if not self.render_jobs:
+            return
+        export_id, fn, args = self.render_jobs.pop(0)
+        try:
+            fn(*args)
+        except Exception:
+            self.error.emit(traceback.format_exc())
+        self.finish_job(export_id)
+        if self.render_jobs:
+            QTimer.singleShot(0, self.run_render_job)
+
+    def finish_job(self, export_id):
+        self.num_pending[export_id] -= 1
+        if self.num_pending[export_id] == 0:
+            del self.num_pending[export_id]
+            self.finished.emit(self.paths.pop(export_id))
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
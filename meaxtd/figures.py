@@ -0,0 +1,178 @@
+import os
+import threading
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pyqtgraph as pg
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import QApplication
+from meaxtd.stat_plots import RasterPlot, EnvelopePlot, raster_points, colormap_plot
+from meaxtd.electrode_layout import get_layout
+from meaxtd.save_result import save_scene_to_file
+
+FIGURE_FORMATS = ['pdf', 'png']
+FIGURE_SIZES = {'TSR': (1200, 300), 'plot': (1200, 600), 'activation': (500, 400), 'deactivation': (500, 400)}
+# pyqtgraph options of the figures, set only while rendering (or for good in a render process)
+FIGURE_OPTIONS = {'background': 'w', 'foreground': 'k', 'imageAxisOrder': 'row-major'}
+ACTIVATION_LABEL = "First spike after burst start, ms"
+DEACTIVATION_LABEL = "Last spike before burst end, ms"
+
+render_executor = None
+render_executor_lock = threading.Lock()
+
+
+def get_figure_data(data, start, threshold=None):
+    """
+        Arrays behind the TSR, raster, activation and deactivation figures of an analysed recording.
+        The dict is small and picklable, so figures can be rendered in other processes.
+    """
+    figure_data = {'duration': float(data.time[-1]), 'num_channels': data.stream.shape[1],
+                   'TSR_times': np.asarray(data.TSR_times), 'TSR': np.asarray(data.TSR), 'threshold': threshold}
+    figure_data['raster_x'], figure_data['raster_y'] = raster_points(data, start)
+    if data.bursts:
+        figure_data['activation'] = np.asarray(data.burst_activation)
+        figure_data['deactivation'] = np.asarray(data.burst_deactivation)
+    return figure_data
+
+
+@contextmanager
+def figure_options():
+    """
+        FIGURE_OPTIONS while the block runs, the previous pyqtgraph options of the process are restored after it.
+    """
+    previous = {key: pg.getConfigOption(key) for key in FIGURE_OPTIONS}
+    pg.setConfigOptions(**FIGURE_OPTIONS)
+    try:
+        yield
+    finally:
+        pg.setConfigOptions(**previous)
+
+
+def get_application():
+    """
+        The running QApplication or a new one. Without a display set QT_QPA_PLATFORM=offscreen before the first call.
+    """
+    application = QApplication.instance()
+    if application is None:
+        application = QApplication([])
+    return application
+
+
+def tsr_figure(figure_data):
+    figure = pg.PlotWidget()
+    figure.setLabel('left', 'TSR, spikes per bin')
+    figure.setLabel('bottom', 'Time (s)')
+    curve = EnvelopePlot()
+    figure.addItem(curve)
+    curve.setEnvelope(figure_data['TSR_times'], figure_data['TSR'], pen=pg.mkPen('k'))
+    if figure_data['threshold'] is not None:
+        figure.addItem(pg.PlotCurveItem(x=figure_data['TSR_times'][[0, -1]],
+                                        y=np.zeros(2) + figure_data['threshold'], pen=pg.mkPen('r', width=2)))
+    figure.setXRange(0, figure_data['duration'], padding=0)
+    figure.setYRange(-1, np.max(figure_data['TSR'], initial=0) + 1, padding=0)
+    return figure
+
+
+def raster_figure(figure_data):
+    figure = pg.PlotWidget()
+    figure.setLabel('left', 'Electrode')
+    figure.setLabel('bottom', 'Time (s)')
+    raster = RasterPlot(size=2, pen=None, brush=pg.mkBrush('k'))
+    figure.addItem(raster)
+    raster.setRaster(figure_data['raster_x'], figure_data['raster_y'], figure_data['num_channels'])
+    figure.setXRange(0, figure_data['duration'], padding=0)
+    figure.setYRange(0, figure_data['num_channels'] + 0.5, padding=0)
+    return figure
+
+
+def colormap_figure(values, title, label):
+    figure = pg.PlotWidget(title=title)
+    figure.getViewBox().invertY(True)
+    figure.setLabel('left', 'Electrode')
+    figure.setLabel('bottom', 'Electrode')
+    layout = get_layout(len(values))
+    image = colormap_plot(values, layout)
+    figure.addItem(image)
+    num_rows, num_columns = layout.grid_shape
+    figure.setXRange(0, num_columns)
+    figure.setYRange(0, num_rows)
+    color_bar = pg.ColorBarItem(interactive=False, values=(0, np.max(values)), cmap=pg.colormap.get('CET-R4'),
+                                label=label)
+    color_bar.setImageItem(image, insert_in=figure.plotItem)
+    return figure
+
+
+def create_figures(figure_data):
+    """
+        {file name: (widget, add_margin)} of offscreen figures, colormaps only for recordings with bursts.
+    """
+    figures = {'TSR': (tsr_figure(figure_data), False), 'plot': (raster_figure(figure_data), False)}
+    if 'activation' in figure_data:
+        figures['activation'] = (colormap_figure(figure_data['activation'], 'Burst activation',
+                                                 ACTIVATION_LABEL), True)
+        figures['deactivation'] = (colormap_figure(figure_data['deactivation'], 'Burst deactivation',
+                                                   DEACTIVATION_LABEL), True)
+    return figures
+
+
+def render_figures(figure_data, path, formats=FIGURE_FORMATS):
+    """
+        Render the figures of one recording to path without showing any window. Call it from the thread
+        owning the QApplication; render_all_figures runs it in worker processes instead.
+    """
+    application = get_application()
+    files = []
+    with figure_options():
+        for name, (figure, add_margin) in create_figures(figure_data).items():
+            # shown without a window, so the scene gets laid out at the figure size
+            figure.setAttribute(Qt.WA_DontShowOnScreen)
+            figure.resize(*FIGURE_SIZES[name])
+            figure.show()
+            application.processEvents()
+            for extension in formats:
+                files.append(f"{path}{name}.{extension}")
+                save_scene_to_file(figure.scene(), files[-1], add_margin and extension == 'pdf')
+            figure.close()
+            figure.deleteLater()
+    return files
+
+
+def init_render_process():
+    if 'QT_QPA_PLATFORM' not in os.environ and 'DISPLAY' not in os.environ:
+        os.environ['QT_QPA_PLATFORM'] = 'offscreen'
+    pg.setConfigOptions(**FIGURE_OPTIONS)
+
+
+def get_render_executor(max_workers=None):
+    """
+        The process pool of render_all_figures, started on first use and reused, so Qt is imported once per worker.
+    """
+    global render_executor
+    with render_executor_lock:
+        if render_executor is None:
+            if max_workers is None:
+                max_workers = min(4, multiprocessing.cpu_count())
+            context = multiprocessing.get_context('spawn')
+            render_executor = ProcessPoolExecutor(max_workers=max(max_workers, 1), mp_context=context,
+                                                  initializer=init_render_process)
+        return render_executor
+
+
+def shutdown_render_executor():
+    global render_executor
+    with render_executor_lock:
+        if render_executor is not None:
+            render_executor.shutdown(wait=True, cancel_futures=True)
+            render_executor = None
+
+
+def render_all_figures(jobs, formats=FIGURE_FORMATS, max_workers=None):
+    """
+        Render the figures of several recordings in parallel processes, each with its own offscreen QApplication.
+        jobs is a list of (figure_data, path), returns the written files of each job in the same order.
+        The pool (get_render_executor) is kept for the next call, max_workers only applies when it is started.
+    """
+    executor = get_render_executor(max_workers)
+    futures = [executor.submit(render_figures, figure_data, path, formats) for figure_data, path in jobs]
+    return [future.result() for future in futures]
@@ -6,23 +6,46 @@ import pyqtgraph.exporters
 import datetime
 from intervaltree import IntervalTree
 from PySide6.QtGui import QPixmap, QImage, QPainter
+from meaxtd.electrode_layout import get_layout
+from meaxtd.propagation import fit_propagation
 
 
-def find_spikes(data, excluded_channels, method, coefficient, start, end, progress_callback):
-    num_signals = data.stream.shape[1]
-
+def get_time_indices(data, start, end):
+    """
+        Sample indices of the start and the end (in minutes) of the analysed part of the recording.
+    """
     start_index = np.where(data.time == start * 60)[0][0]
     if end < int(np.ceil(data.time[-1] / 60)):
         end_index = np.where(data.time == end * 60)[0][0]
     else:
         end_index = np.where(data.time == data.time[-1])[0][0]
+    return start_index, end_index
 
+
+def get_tsr_bins(data, start_index, end_index):
+    """
+        Start times of the 50 ms TSR bins of the analysed part and the number of bins.
+    """
     total_time_in_ms = int(np.ceil((data.time[end_index] - data.time[start_index]) * 1000))
-    data.TSR = np.zeros(int(total_time_in_ms / 50), dtype=int)
-    data.TSR_times = np.arange(data.time[start_index], data.time[end_index], 0.05)
-    data.TSR_channels = np.empty(int(total_time_in_ms / 50), dtype=object)
+    return np.arange(data.time[start_index], data.time[end_index], 0.05), int(total_time_in_ms / 50)
+
+
+def find_spikes(data, excluded_channels, method, coefficient, start, end, progress_callback, channel_callback=None):
+    """
+        Spikes of every channel and the TSR. channel_callback(signal_id, spikes, TSR_bins), when given,
+        is called as soon as a channel is done with its spikes and the TSR bins they were counted in,
+        so partial results can be shown before all channels are processed.
+    """
+    num_signals = data.stream.shape[1]
+
+    start_index, end_index = get_time_indices(data, start, end)
+
+    data.TSR_times, num_bins = get_tsr_bins(data, start_index, end_index)
+    data.TSR = np.zeros(num_bins, dtype=int)
+    data.TSR_channels = np.empty(num_bins, dtype=object)
     for signal_id in range(0, num_signals):
         progress_callback.emit(round(signal_id * 30 / num_signals))
+        TSR_bins = []
 
         if signal_id in excluded_channels:
             data.spikes[signal_id] = np.asarray([])
@@ -64,6 +87,7 @@ def find_spikes(data, excluded_channels, method, coefficient, start, end, progre
             for peak_id in range(0, len(spikes)):
                 TSR_index = int(np.ceil(spikes[peak_id] * data.time[1] * 1000 / 50))
                 data.TSR[TSR_index - 1] += 1
+                TSR_bins.append(TSR_index - 1)
                 if data.TSR_channels[TSR_index - 1]:
                     data.TSR_channels[TSR_index - 1].append(signal_id)
                 else:
@@ -72,6 +96,9 @@ def find_spikes(data, excluded_channels, method, coefficient, start, end, progre
                     curr_id_mod = start_index + curr_id
                     data.spike_stream[signal_id][curr_id_mod] = data.stream[curr_id_mod, signal_id]
 
+        if channel_callback is not None:
+            channel_callback(signal_id, data.spikes[signal_id], np.asarray(TSR_bins, dtype=np.int64))
+
 
 def detect_threshold_crossings(signal, fs, threshold, dead_time):
     dead_time_idx = dead_time * fs
@@ -123,11 +150,7 @@ def find_burstlets(data, excluded_channels, spike_method, spike_coeff, burst_win
     if not data.spikes:
         find_spikes(data, excluded_channels, spike_method, spike_coeff, start, end, progress_callback)
 
-    start_index = np.where(data.time == start * 60)[0][0]
-    if end < int(np.ceil(data.time[-1] / 60)):
-        end_index = np.where(data.time == end * 60)[0][0]
-    else:
-        end_index = np.where(data.time == data.time[-1])[0][0]
+    start_index, end_index = get_time_indices(data, start, end)
 
     num_signals = data.stream.shape[1]
     window = 10 * burst_window  # sampling frequency 0.1 ms
@@ -189,11 +212,7 @@ def create_interval_tree(data):
 
 def find_bursts(data, excluded_channels, spike_method, spike_coeff, burst_method, burst_window, burst_param,
                 start, end, progress_callback):
-    start_index = np.where(data.time == start * 60)[0][0]
-    if end < int(np.ceil(data.time[-1] / 60)):
-        end_index = np.where(data.time == end * 60)[0][0]
-    else:
-        end_index = np.where(data.time == data.time[-1])[0][0]
+    start_index, end_index = get_time_indices(data, start, end)
 
     signal_len = len(data.stream[start_index:end_index, 0])
     num_signals = data.stream.shape[1]
@@ -321,6 +340,7 @@ def find_bursts(data, excluded_channels, spike_method, spike_coeff, burst_method
             data.bursts[burst_id]['std amplitude'] = np.std(burst_amplitudes)
             data.bursts[burst_id]['median amplitude'] = np.median(burst_amplitudes)
 
+    data.burst_activation_times = burst_activation_vector  # in s from the burst start, NaN outside the burst
     data.burst_activation = np.zeros(num_signals)
     data.burst_deactivation = np.zeros(num_signals)
     for signal_id in range(0, num_signals):
@@ -373,11 +393,7 @@ def find_bursts(data, excluded_channels, spike_method, spike_coeff, burst_method
 def calculate_characteristics(data, start, end, progress_callback):
     progress_callback.emit(80)
 
-    start_index = np.where(data.time == start * 60)[0][0]
-    if end < int(np.ceil(data.time[-1] / 60)):
-        end_index = np.where(data.time == end * 60)[0][0]
-    else:
-        end_index = np.where(data.time == data.time[-1])[0][0]
+    start_index, end_index = get_time_indices(data, start, end)
 
     num_signals = data.stream.shape[1]
     num_seconds = data.time[end_index] - data.time[start_index]
@@ -448,8 +464,9 @@ def calculate_characteristics(data, start, end, progress_callback):
     signals = []
     num_channels = []
     num_spikes_per_burst = []
-    num_bursts_per_channel = [0] * 60
+    num_bursts_per_channel = [0] * num_signals
     for burst_id in range(0, len(data.bursts)):
+        progress_callback.emit(85 + int(burst_id * 2 / len(data.bursts)))
         curr_burst = data.bursts[burst_id]
         activation_time = len(data.time)
         deactivation_time = 0
@@ -496,6 +513,7 @@ def calculate_characteristics(data, start, end, progress_callback):
     if data.burstlets:
         bursts_amps = []
         for burst_id in range(0, len(bursts_starts)):
+            progress_callback.emit(87)
             curr_burst = data.bursts[burst_id]
             channels = [interval.data['signal_id'] for interval in curr_burst]
             for signal_id in channels:
@@ -539,6 +557,12 @@ def calculate_characteristics(data, start, end, progress_callback):
     data.burst_characteristics['Median amplitude, μV'] = bursts_amps_median
     data.burst_characteristics['Channels'] = signals
 
+    propagation = fit_propagation(data.burst_activation_times, get_layout(num_signals).positions)
+    data.burst_characteristics['Propagation speed, m/s'] = propagation['speed'].tolist()
+    data.burst_characteristics['Propagation direction, deg'] = propagation['direction'].tolist()
+    data.burst_characteristics['Initiation electrode'] = [int(channel) + 1 if channel >= 0 else np.nan
+                                                          for channel in propagation['initiation']]
+
     num_small_bursts = 0
     num_large_bursts = 0
     for b_type in burst_type:
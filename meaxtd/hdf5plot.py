@@ -1,5 +1,7 @@
+import itertools
 import pyqtgraph as pg
 import numpy as np
+from meaxtd.lod import MinMaxPyramid
 
 
 class HDF5Plot(pg.PlotCurveItem):
@@ -67,23 +69,47 @@ class HDF5Plot(pg.PlotCurveItem):
 
 
 class HDF5PlotXY(pg.PlotCurveItem):
+    """
+        Signal curve drawn from a min/max pyramid: every view change reads about `limit` points of the visible range
+        from the level matching the zoom, instead of reducing the raw samples again.
+        With a ViewportScheduler the curve leaves view changes to it and is updated together with the linked plots,
+        its windows are cached under cache_key (a new unique key when none is given).
+    """
+    cache_keys = itertools.count()
+
     def __init__(self, *args, **kwds):
         self.x = None
         self.y = None
         self.fs = None
+        self.pyramid = None
+        self.cache_key = None
+        self.scheduler = None
         self.pen = pg.mkPen()
         self.limit = 20000
         pg.PlotCurveItem.__init__(self, *args, **kwds)
 
-    def setHDF5(self, x, y, fs, pen=pg.mkPen()):
+    def setHDF5(self, x, y, fs, pen=pg.mkPen(), pyramid=None, scheduler=None, cache_key=None):
         self.x = x
         self.y = y
         self.fs = fs
+        self.pyramid = pyramid if pyramid is not None else MinMaxPyramid(y)
+        self.cache_key = cache_key if cache_key is not None else next(self.cache_keys)
         self.pen = pen
+        self.scheduler = scheduler
+        if scheduler is not None:
+            scheduler.add_curve(self)
         self.updateHDF5Plot()
 
     def viewRangeChanged(self):
-        self.updateHDF5Plot()
+        vb = self.getViewBox()
+        if self.scheduler is not None and vb is not None:
+            self.scheduler.request(vb.viewRange()[0])
+        else:
+            self.updateHDF5Plot()
+
+    def setEnvelope(self, x, y):
+        self.setData(x=x, y=y, pen=self.pen, connect="finite")
+        self.resetTransform()
 
     def updateHDF5Plot(self):
         if self.y is None:
@@ -96,50 +122,7 @@ class HDF5PlotXY(pg.PlotCurveItem):
 
         xrange = [i * self.fs for i in vb.viewRange()[0]]
         start = max(0, int(xrange[0]) - 1)
-        stop = min(len(self.y), int(xrange[1]+2))
-
-        ds = int((stop - start) / self.limit) + 1
+        stop = min(len(self.y), int(xrange[1] + 2))
 
-        if ds == 1:
-            visible_y = self.y[start:stop]
-            visible_x = self.x[start:stop]
-            scale = 1
-        else:
-            samples = 1 + ((stop - start) // ds)
-            visible_y = np.zeros(samples * 2, dtype=self.y.dtype)
-            visible_x = np.zeros(samples * 2, dtype=self.x.dtype)
-            sourcePtr = start
-            targetPtr = 0
-
-            chunkSize = (1000000 // ds) * ds
-            while sourcePtr < stop - 1:
-                chunk_y = self.y[sourcePtr:min(stop, sourcePtr + chunkSize)]
-                chunk_x = self.x[sourcePtr:min(stop, sourcePtr + chunkSize)]
-
-                sourcePtr += len(chunk_y)
-
-                chunk_y = chunk_y[:(len(chunk_y) // ds) * ds].reshape(len(chunk_y) // ds, ds)
-                chunk_x = chunk_x[:(len(chunk_x) // ds) * ds].reshape(len(chunk_x) // ds, ds)
-
-                mx_inds = np.argmax(chunk_y, axis=1)
-                mi_inds = np.argmin(chunk_y, axis=1)
-                row_inds = np.arange(chunk_y.shape[0])
-
-                chunkMax_y = chunk_y[row_inds, mx_inds]
-                chunkMin_y = chunk_y[row_inds, mi_inds]
-                chunkMax_x = chunk_x[row_inds, mx_inds]
-                chunkMin_x = chunk_x[row_inds, mi_inds]
-
-                visible_y[targetPtr:targetPtr + chunk_y.shape[0] * 2:2] = chunkMin_y
-                visible_y[1 + targetPtr:1 + targetPtr + chunk_y.shape[0] * 2:2] = chunkMax_y
-                visible_x[targetPtr:targetPtr + chunk_x.shape[0] * 2:2] = chunkMin_x
-                visible_x[1 + targetPtr:1 + targetPtr + chunk_x.shape[0] * 2:2] = chunkMax_x
-
-                targetPtr += chunk_x.shape[0] * 2
-
-            visible_x = visible_x[:targetPtr]
-            visible_y = visible_y[:targetPtr]
-            scale = ds * 0.5
-
-        self.setData(x=visible_x, y=visible_y, pen=self.pen, connect="finite")
-        self.resetTransform()
+        indices, visible_y = self.pyramid.envelope(start, stop, self.limit)
+        self.setEnvelope(self.x[indices], visible_y)
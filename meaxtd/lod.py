@@ -0,0 +1,187 @@
+import numpy as np
+
+
+def get_block_min_max(values, base_block=64, chunk_size=1000000, columns=None):
+    """
+        Minimum and maximum of every base_block samples along the first axis, the last block may be shorter.
+        For 2D (samples x channels) arrays all channels, or the given columns, are reduced in one pass over the rows.
+    """
+    num_blocks = int(np.ceil(len(values) / base_block))
+    shape = values.shape[1:] if columns is None else (len(columns),)
+    minima = np.empty((num_blocks,) + shape, dtype=values.dtype)
+    maxima = np.empty((num_blocks,) + shape, dtype=values.dtype)
+    chunk_size = max(chunk_size // base_block, 1) * base_block
+    for chunk_start in range(0, len(values), chunk_size):
+        chunk = values[chunk_start:chunk_start + chunk_size]
+        if columns is not None:
+            chunk = chunk[:, columns]
+        num_full = len(chunk) // base_block
+        block_id = chunk_start // base_block
+        full = chunk[:num_full * base_block].reshape((num_full, base_block) + shape)
+        minima[block_id:block_id + num_full] = np.fmin.reduce(full, axis=1)
+        maxima[block_id:block_id + num_full] = np.fmax.reduce(full, axis=1)
+        if len(chunk) > num_full * base_block:
+            minima[block_id + num_full] = np.fmin.reduce(chunk[num_full * base_block:], axis=0)
+            maxima[block_id + num_full] = np.fmax.reduce(chunk[num_full * base_block:], axis=0)
+    return minima, maxima
+
+
+class MinMaxPyramid:
+    """
+        Minimum and maximum of a signal over blocks of base_block * 2**level samples, built once.
+        envelope() then returns about max_points values for any sample range, read from the level with one block
+        per two points, so the cost depends on the number of points and not on the length of the range.
+        NaN samples (gaps in highlight layers) are skipped, all-NaN blocks stay NaN.
+        base_minima and base_maxima take the first level when it was computed for several channels at once.
+    """
+
+    def __init__(self, values, base_block=64, chunk_size=1000000, base_minima=None, base_maxima=None):
+        self.values = values
+        self.base_block = base_block
+        self.block_sizes = []
+        self.minima = []
+        self.maxima = []
+        if len(values) == 0:
+            return
+
+        if base_minima is None:
+            minima, maxima = get_block_min_max(values, base_block, chunk_size)
+        else:
+            minima, maxima = base_minima, base_maxima
+
+        block_size = base_block
+        while True:
+            self.block_sizes.append(block_size)
+            self.minima.append(minima)
+            self.maxima.append(maxima)
+            if len(minima) < 2:
+                break
+            if len(minima) % 2:
+                minima = np.append(minima, minima[-1])
+                maxima = np.append(maxima, maxima[-1])
+            minima = np.fmin(minima[0::2], minima[1::2])
+            maxima = np.fmax(maxima[0::2], maxima[1::2])
+            block_size *= 2
+
+    def get_level(self, samples_per_block):
+        """
+            Finest level whose blocks hold at least samples_per_block samples (the coarsest level if none does).
+        """
+        for level, block_size in enumerate(self.block_sizes):
+            if block_size >= samples_per_block:
+                return level
+        return len(self.block_sizes) - 1
+
+    def envelope(self, start, stop, max_points):
+        """
+            Sample indices and values of the [start, stop) range: raw samples when they fit into max_points,
+            otherwise a min, max pair for every block of the chosen level (about max_points values).
+        """
+        indices, values = envelope_many([self], start, stop, max_points)
+        return indices, values[0]
+
+
+class CountPyramid:
+    """
+        Event counts per row (electrode) in time bins, the finest level has max_bins bins over [start, end),
+        every next level merges pairs of bins. counts() returns the level matching a pixel width.
+    """
+
+    def __init__(self, x, rows, num_rows, start, end, max_bins=2 ** 15):
+        self.start = start
+        self.end = max(end, start + 1e-9)
+        self.num_rows = num_rows
+        self.bin_widths = []
+        self.levels = []
+        bin_width = (self.end - self.start) / max_bins
+        bins = np.clip(((np.asarray(x) - self.start) / bin_width).astype(np.int64), 0, max_bins - 1)
+        rows = np.asarray(rows, dtype=np.int64)
+        counts = np.bincount(rows * max_bins + bins, minlength=num_rows * max_bins).astype(np.int32)
+        counts = counts.reshape(num_rows, max_bins)
+        while True:
+            self.bin_widths.append(bin_width)
+            self.levels.append(counts)
+            if counts.shape[1] < 2:
+                break
+            if counts.shape[1] % 2:
+                counts = np.concatenate([counts, np.zeros((num_rows, 1), dtype=counts.dtype)], axis=1)
+            counts = counts[:, 0::2] + counts[:, 1::2]
+            bin_width *= 2
+
+    def counts(self, x_start, x_end, num_pixels):
+        """
+            (counts, left edge, bin width) of the coarsest level with bins not wider than a pixel over [x_start, x_end),
+            or None when the view is zoomed in further than the finest level.
+        """
+        pixel_width = (x_end - x_start) / max(num_pixels, 1)
+        level = -1
+        for bin_width in self.bin_widths:
+            if bin_width > pixel_width:
+                break
+            level += 1
+        if level < 0:
+            return None
+        bin_width = self.bin_widths[level]
+        first = max(int(np.floor((x_start - self.start) / bin_width)), 0)
+        last = min(int(np.ceil((x_end - self.start) / bin_width)), self.levels[level].shape[1])
+        if last <= first:
+            return None
+        return self.levels[level][:, first:last], self.start + first * bin_width, bin_width
+
+
+def get_pyramids(data, layer, channels):
+    """
+        Min/max pyramids of channels of the signal or of a highlight layer ('spike', 'burstlet', 'burst'),
+        built on first use and kept in data.pyramids until the analysis results are cleared.
+        Missing signal pyramids of the requested channels are built together in one pass over the stream rows.
+    """
+    missing = [channel for channel in channels if (layer, channel) not in data.pyramids]
+    if missing and layer == 'signal':
+        minima, maxima = get_block_min_max(data.stream, columns=missing)
+        for channel_id, channel in enumerate(missing):
+            data.pyramids[('signal', channel)] = MinMaxPyramid(data.stream[:, channel],
+                                                               base_minima=np.ascontiguousarray(minima[:, channel_id]),
+                                                               base_maxima=np.ascontiguousarray(maxima[:, channel_id]))
+    elif missing:
+        for channel in missing:
+            data.pyramids[(layer, channel)] = MinMaxPyramid(getattr(data, f"{layer}_stream")[channel])
+    return [data.pyramids[(layer, channel)] for channel in channels]
+
+
+def get_pyramid(data, layer, channel):
+    return get_pyramids(data, layer, [channel])[0]
+
+
+def get_envelope_block_size(pyramid, start, stop, max_points):
+    """
+        Samples per value pair of the envelope of [start, stop) with max_points, 1 when it holds the raw samples.
+        Envelopes with the same block size are slices of each other.
+    """
+    if stop - start <= max_points or not pyramid.block_sizes:
+        return 1
+    return pyramid.block_sizes[pyramid.get_level(2 * (stop - start) / max(max_points, 2))]
+
+
+def envelope_many(pyramids, start, stop, max_points):
+    """
+        envelope() of several equally long signals over the same range in one pass:
+        sample indices and a (signals x points) array of values.
+    """
+    pyramid = pyramids[0]
+    start = max(int(start), 0)
+    stop = min(int(stop), len(pyramid.values))
+    if stop <= start:
+        return np.empty(0, dtype=np.int64), np.empty((len(pyramids), 0))
+    if stop - start <= max_points or not pyramid.block_sizes:
+        return np.arange(start, stop), np.stack([curr_pyramid.values[start:stop] for curr_pyramid in pyramids])
+
+    level = pyramid.get_level(2 * (stop - start) / max(max_points, 2))
+    block_size = pyramid.block_sizes[level]
+    first = start // block_size
+    last = min(-(-stop // block_size), len(pyramid.minima[level]))
+    indices = np.repeat(np.arange(first, last) * block_size, 2)
+    indices[1::2] += block_size // 2
+    values = np.empty((len(pyramids), 2 * (last - first)), dtype=np.result_type(*[p.minima[level] for p in pyramids]))
+    values[:, 0::2] = np.stack([curr_pyramid.minima[level][first:last] for curr_pyramid in pyramids])
+    values[:, 1::2] = np.stack([curr_pyramid.maxima[level][first:last] for curr_pyramid in pyramids])
+    return indices, values
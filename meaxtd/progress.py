@@ -0,0 +1,82 @@
+import threading
+
+
+class NullProgress:
+    """
+        Stand-in for the worker progress signal when analysis functions are called outside the GUI
+        (benchmarks, batch jobs, tests). Accepts the same emit(int) calls and discards them.
+    """
+
+    def emit(self, value):
+        pass
+
+
+class JobCancelled(Exception):
+    """
+        Raised at a cancellation checkpoint of a job that was cancelled or superseded by a newer one.
+    """
+
+
+class CancellableProgress:
+    """
+        Progress callback of a cancellable job. The analysis and graph functions report progress inside their
+        per-channel and per-burst loops, so every emit() is a checkpoint: once is_cancelled() returns True,
+        emit raises JobCancelled and the job stops there.
+    """
+
+    def __init__(self, progress_callback, is_cancelled):
+        self.progress_callback = progress_callback
+        self.is_cancelled = is_cancelled
+
+    def emit(self, value):
+        if self.is_cancelled():
+            raise JobCancelled()
+        self.progress_callback.emit(value)
+
+
+class JobHandle:
+    """
+        Handle of a job running on a thread, cancel() stops it at its next checkpoint.
+    """
+
+    def __init__(self, key=None):
+        self.key = key
+        self.cancelled = threading.Event()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def is_cancelled(self):
+        return self.cancelled.is_set()
+
+    def progress(self, progress_callback):
+        return CancellableProgress(progress_callback, self.is_cancelled)
+
+
+class Jobs:
+    """
+        Running jobs by key (job type), starting a job cancels the older one with the same key.
+        Jobs finish on their worker threads, so the handles are guarded by a lock.
+    """
+
+    def __init__(self):
+        self.handles = {}
+        self.lock = threading.Lock()
+
+    def start(self, key):
+        with self.lock:
+            if key in self.handles:
+                self.handles[key].cancel()
+            self.handles[key] = JobHandle(key)
+            return self.handles[key]
+
+    def finish(self, handle):
+        with self.lock:
+            if self.handles.get(handle.key) is handle:
+                del self.handles[handle.key]
+
+    def cancel_all(self):
+        with self.lock:
+            for handle in self.handles.values():
+                handle.cancel()
+            self.handles = {}
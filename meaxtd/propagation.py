@@ -0,0 +1,49 @@
+import numpy as np
+
+
+def fit_propagation(activation_times, positions, min_channels=3):
+    """
+        Fit a plane t = a * x + b * y + c to the channel activation times of every burst in one batched solve.
+        :param activation_times: (bursts, channels) activation times in s, NaN for channels outside a burst
+        :param positions: (channels, 2) electrode positions in um
+        :param min_channels: bursts activating fewer channels get NaN speed and direction
+        :return: dict of per-burst arrays:
+                 'speed' of the wavefront in m/s (1 / |gradient|),
+                 'direction' of the propagation in degrees, counted from the X axis towards the Y axis,
+                 'initiation' channel that activated first (-1 for bursts whose fit failed, as their speed is NaN)
+    """
+    activation_times = np.asarray(activation_times, dtype=float)
+    positions = np.asarray(positions, dtype=float)
+    num_bursts = activation_times.shape[0]
+    is_active = ~np.isnan(activation_times)
+    times = np.where(is_active, activation_times, 0.0)
+
+    # centred and scaled coordinates keep the normal equations well conditioned
+    center = positions.mean(axis=0)
+    scale = max(np.abs(positions - center).max(), 1.0)
+    design = np.column_stack([(positions - center) / scale, np.ones(positions.shape[0])])
+
+    weights = is_active.astype(float)
+    normal = np.einsum('bc,ci,cj->bij', weights, design, design)
+    rhs = np.einsum('bc,ci->bi', weights * times, design)
+    has_channels = is_active.sum(axis=1) >= min_channels
+    if num_bursts > 0:
+        is_solvable = has_channels & (np.linalg.cond(normal) < 1e10)
+    else:
+        is_solvable = has_channels
+    normal[~is_solvable] = np.eye(3)
+    rhs[~is_solvable] = 0.0
+    coefficients = np.linalg.solve(normal, rhs[:, :, np.newaxis])[:, :, 0]
+
+    gradient = coefficients[:, :2] / scale  # s per um
+    slowness = np.linalg.norm(gradient, axis=1)
+    is_moving = is_solvable & (slowness > 0)
+    speed = np.full(num_bursts, np.nan)
+    speed[is_moving] = 1e-6 / slowness[is_moving]  # um/s -> m/s
+    direction = np.full(num_bursts, np.nan)
+    direction[is_moving] = np.degrees(np.arctan2(gradient[is_moving, 1], gradient[is_moving, 0]))
+
+    initiation = np.full(num_bursts, -1)
+    initiation[is_moving] = np.argmin(np.where(is_active, activation_times, np.inf), axis=1)[is_moving]
+
+    return {'speed': speed, 'direction': direction, 'initiation': initiation}
@@ -1,11 +1,92 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import McsPy.McsData
 import McsPy.McsCMOS
 import numpy as np
 from McsPy import ureg, Q_
 from meaxtd.data import Data
+from meaxtd.shared_array import create_shared_array
 
 
-def read_h5_file(data_path, progress_callback):
+def get_window_indices(num_samples, fs, start=None, end=None):
+    """
+        First and last + 1 sample indices of the [start, end] window (minutes) of a recording, the whole one by default.
+        The sample at end is included, so that the window has the time end * 60 the analysis looks for.
+    """
+    start_index = 0 if start is None else min(int(round(start * 60 * fs)), num_samples)
+    end_index = num_samples if end is None else min(int(round(end * 60 * fs)) + 1, num_samples)
+    if end_index <= start_index:
+        raise ValueError(f"The window {start}-{end} min is outside of the recording.")
+    return start_index, end_index
+
+
+def get_blocks(dataset, start_index, end_index, block_bytes=2 ** 23):
+    """
+        [(start, end)] sample ranges covering [start_index, end_index) of a (channels x samples) dataset.
+        The ranges are aligned to the chunks of the dataset, so every chunk is read and decompressed once,
+        and hold about block_bytes of all channels (at least one chunk).
+    """
+    sample_bytes = dataset.shape[0] * dataset.dtype.itemsize
+    if dataset.chunks is not None:
+        chunk_samples = dataset.chunks[1]
+        block_samples = chunk_samples * max(block_bytes // (chunk_samples * sample_bytes), 1)
+    else:
+        block_samples = max(block_bytes // sample_bytes, 1)
+    edges = [start_index] + list(range((start_index // block_samples + 1) * block_samples, end_index, block_samples))
+    return list(zip(edges, edges[1:] + [end_index]))
+
+
+def read_blocks(dataset, channels, start_index, end_index, stream, progress_callback, max_workers=None,
+                block_bytes=2 ** 23):
+    """
+        Read the [start_index, end_index) samples of the channels (rows) of a (channels x samples) dataset
+        into the columns of stream (samples x channels) in chunk-aligned blocks on a thread pool.
+        Every block is scaled and transposed into stream by the thread that read it, while the others read.
+        Progress goes from 10 to 90 with the number of bytes read, a progress callback raising JobCancelled
+        stops the reading without waiting for the blocks that have not started.
+    """
+    if not channels:
+        return
+    if max_workers is None:
+        max_workers = min(4, os.cpu_count() or 1)
+    total_bytes = len(channels) * (end_index - start_index) * dataset.dtype.itemsize
+    # runs of consecutive channels are read as hyperslabs, h5py point selections of rows are much slower
+    runs = np.split(np.asarray(channels, dtype=np.int64), np.flatnonzero(np.diff(channels) != 1) + 1)
+
+    def read_block(block_start, block_end):
+        rows = slice(block_start - start_index, block_end - start_index)
+        num_bytes = 0
+        for run in runs:
+            raw = dataset[run[0]:run[-1] + 1, block_start:block_end]
+            # the same values as raw / 1000000, written without a temporary array
+            np.divide(raw.T, 1000000, out=stream[rows, run[0]:run[-1] + 1])
+            num_bytes += raw.nbytes
+        return num_bytes
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = [executor.submit(read_block, block_start, block_end)
+                   for block_start, block_end in get_blocks(dataset, start_index, end_index, block_bytes)]
+        num_bytes = 0
+        for future in as_completed(futures):
+            num_bytes += future.result()
+            progress_callback.emit(10 + int(num_bytes * 80 / total_bytes))
+    except BaseException:
+        # the running blocks write into stream, they are waited for
+        executor.shutdown(wait=True, cancel_futures=True)
+        raise
+    executor.shutdown(wait=True)
+
+
+def read_h5_file(data_path, progress_callback, start=None, end=None, excluded_channels=()):
+    """
+        Recording of an MCS-HDF5 file. start and end (minutes) select a time window and only its samples
+        of the channels not in excluded_channels are read, the excluded channels are zero columns
+        so the channel numbers stay the same (data.loaded_channels lists the read ones). The time of the data starts at 0,
+        data.time_offset is the time of its first sample in the file (s).
+        The stream is allocated in shared memory (create_shared_array).
+        The samples are read by read_blocks, progress follows the bytes read.
+    """
 
     progress_callback.emit(0)
 
@@ -15,24 +96,27 @@ def read_h5_file(data_path, progress_callback):
 
     fs = int(channel_raw_data.recordings[0].analog_streams[0].channel_infos[0].sampling_frequency.magnitude)
     analog_stream_0 = channel_raw_data.recordings[0].analog_streams[0]
-    analog_stream_0_data = analog_stream_0.channel_data
-
-    progress_callback.emit(25)
-
-    np_analog_stream_0_data = np.transpose(analog_stream_0_data)
-
-    progress_callback.emit(50)
+    num_channels, num_samples = analog_stream_0.channel_data.shape
+    start_index, end_index = get_window_indices(num_samples, fs, start, end)
+    # the excluded channels are not read at all
+    channels = [channel for channel in range(0, num_channels) if channel not in excluded_channels]
+    # the analysis process maps the stream instead of copying it
+    np_analog_stream_0_data = create_shared_array((end_index - start_index, num_channels))
+    read_blocks(analog_stream_0.channel_data, channels, start_index, end_index, np_analog_stream_0_data,
+                progress_callback)
 
     stream = channel_raw_data.recordings[0].analog_streams[0]
-    time = stream.get_channel_sample_timestamps(0, 0)
+    time = stream.get_channel_sample_timestamps(0, start_index, end_index - 1)
     scale_factor_for_second = Q_(1, time[1]).to(ureg.s).magnitude
-    time_in_sec = time[0] * scale_factor_for_second
+    time_in_sec = (time[0] - time[0][0]) * scale_factor_for_second
 
-    progress_callback.emit(75)
+    progress_callback.emit(95)
 
     data = Data()
-    data.stream = np_analog_stream_0_data / 1000000
+    data.stream = np_analog_stream_0_data
     data.time = np.asarray(time_in_sec)
+    data.time_offset = float(time[0][0] * scale_factor_for_second)
+    data.loaded_channels = channels
     data.fs = fs
 
     progress_callback.emit(100)
@@ -1,15 +1,22 @@
 import os
+import h5py
+import numpy as np
 import pandas as pd
 import pyqtgraph as pg
 import pyqtgraph.exporters
 import datetime
 import json
+import xml.etree.ElementTree as ET
 from pathlib import Path
-import cairosvg
 from meaxtd.pdf_export import PDFExporter
+from meaxtd.construct_graph import layout_graph
 
+GRAPH_IMAGE_FORMATS = ['png', 'pdf', 'dot']
+GRAPH_DATA_FORMATS = ['graphml', 'json', 'npz']
+TABLE_FORMATS = ['HDF5', 'Parquet', 'Feather', 'Excel']
 
-def save_tables_to_file(data, filepath, progress_callback):
+
+def create_result_dir(filepath):
     path = filepath[:-3]
     date_time = datetime.datetime.now()
     curr_date = date_time.date()
@@ -27,7 +34,26 @@ def save_tables_to_file(data, filepath, progress_callback):
     path = f"{path}/{suffix}/"
     if not os.path.isdir(path):
         Path(path).mkdir(parents=True)
+    return path
+
+
+def save_tables_to_file(data, filepath, progress_callback, table_format='HDF5'):
+    path = create_result_dir(filepath)
+    export_tables(data, path, progress_callback, table_format)
+    return path
+
+
+def export_tables(data, path, progress_callback, table_format='HDF5'):
+    """
+        Write the result tables into an existing result folder in one of TABLE_FORMATS.
+    """
+    if table_format == 'Excel':
+        save_tables_to_excel(data, path, progress_callback)
+    else:
+        save_tables_to_columnar(data, path, progress_callback, table_format)
+
 
+def save_tables_to_excel(data, path, progress_callback):
     global_df = pd.DataFrame(data=data.global_characteristics, index=[0])
     global_df.to_excel(path + 'global.xlsx', index=False)
 
@@ -55,38 +81,138 @@ def save_tables_to_file(data, filepath, progress_callback):
     return path
 
 
-def save_plots_to_file(path, progress_callback, left_groupbox, right_groupbox, left_layout, right_layout):
-    tsr_exporter_pdf = PDFExporter(left_layout.layout().itemAtPosition(0, 0).widget().scene())
-    tsr_exporter_pdf.export(path + 'TSR.pdf')
-
-    progress_callback.emit(95)
-
-    plot_exporter_pdf = PDFExporter(left_layout.layout().itemAtPosition(1, 0).widget().scene())
-    plot_exporter_pdf.export(path + 'plot.pdf')
-
-    progress_callback.emit(96)
-
-    act_exporter_pdf = PDFExporter(right_layout.layout().itemAtPosition(0, 0).widget().scene())
-    act_exporter_pdf.export(path + 'activation.pdf', add_margin=True)
-
-    progress_callback.emit(97)
-
-    deact_exporter_pdf = PDFExporter(right_layout.layout().itemAtPosition(1, 0).widget().scene())
-    deact_exporter_pdf.export(path + 'deactivation.pdf', add_margin=True)
-
-    progress_callback.emit(97)
+def get_spike_table(data):
+    """
+        One row per spike: electrode, sample from the analysis start, time in the file
+        (data.time_offset is the file time of the first loaded sample), amplitude
+        and the ID of the burst containing the spike (0 outside bursts).
+    """
+    channels = sorted(data.spikes)
+    spikes = [np.asarray(data.spikes[channel], dtype=np.int64) for channel in channels]
+    num_spikes = [len(channel_spikes) for channel_spikes in spikes]
+    offsets = dict(zip(channels, np.cumsum([0] + num_spikes[:-1])))
+    channel_ids = dict(zip(channels, range(0, len(channels))))
+    samples = np.concatenate(spikes) if spikes else np.empty(0, dtype=np.int64)
+    amplitudes = np.concatenate([np.asarray(data.spikes_amplitudes[channel], dtype=float)
+                                 for channel in channels]) if spikes else np.empty(0)
+    burst_ids = np.zeros(len(samples), dtype=np.int64)
+    for burst_id, burst in enumerate(data.bursts):
+        if isinstance(burst, dict):
+            windows = [(channel, burst['start'], burst['end']) for channel in burst['channels']]
+        else:
+            windows = [(interval.data['signal_id'], interval.begin, interval.end) for interval in burst]
+        for channel, burst_start, burst_end in windows:
+            first_id = np.searchsorted(spikes[channel_ids[channel]], burst_start, 'left')
+            last_id = np.searchsorted(spikes[channel_ids[channel]], burst_end, 'left')
+            burst_ids[offsets[channel] + first_id:offsets[channel] + last_id] = burst_id + 1
+    start_time = data.TSR_times[0] if len(getattr(data, 'TSR_times', [])) > 0 else 0.0
+    start_time += getattr(data, 'time_offset', 0.0)
+    return {'Electrode': np.repeat(np.asarray(channels, dtype=np.int64) + 1, num_spikes),
+            'Sample': samples,
+            'Time, s': start_time + data.time[samples],
+            'Amplitude, μV': amplitudes,
+            'Burst ID': burst_ids}
+
+
+def get_result_tables(data):
+    return {'global': {key: [value] for key, value in data.global_characteristics.items()},
+            'channel': data.channel_characteristics,
+            'burst': data.burst_characteristics,
+            'time': data.time_characteristics,
+            'spikes': get_spike_table(data)}
+
+
+def save_tables_to_columnar(data, path, progress_callback, table_format='HDF5'):
+    """
+        Write the characteristics tables, the spike table and the burst table without compression,
+        so the files can be memory-mapped: one results.h5 with a group of column datasets per table,
+        or one Parquet/Feather file per table (pyarrow is needed for those, the arrow extra of the package).
+    """
+    tables = get_result_tables(data)
+    progress_callback.emit(92)
+    if table_format == 'HDF5':
+        with h5py.File(path + 'results.h5', 'w') as f:
+            for table_name, table in tables.items():
+                group = f.create_group(table_name)
+                for column_id, (column, values) in enumerate(table.items()):
+                    values = np.asarray(values)
+                    if values.dtype.kind in 'OUS':
+                        dataset = group.create_dataset(column.replace('/', '_'), data=values.astype(str).tolist(),
+                                                       dtype=h5py.string_dtype())
+                    else:
+                        dataset = group.create_dataset(column.replace('/', '_'), data=values)
+                    dataset.attrs['column'] = column
+                    dataset.attrs['order'] = column_id
+    elif table_format in ['Parquet', 'Feather']:
+        import pyarrow
+        import pyarrow.feather
+        import pyarrow.parquet
+        for table_name, table in tables.items():
+            arrow_table = pyarrow.table({column: np.asarray(values) if np.asarray(values).dtype.kind != 'O'
+                                         else np.asarray(values).astype(str) for column, values in table.items()})
+            if table_format == 'Parquet':
+                pyarrow.parquet.write_table(arrow_table, path + table_name + '.parquet', compression='NONE')
+            else:
+                pyarrow.feather.write_feather(arrow_table, path + table_name + '.feather', compression='uncompressed')
+    else:
+        raise ValueError(f"Unknown table format {table_format}")
+    progress_callback.emit(94)
 
-    tsr_exporter_png = pg.exporters.ImageExporter(left_groupbox.layout().itemAtPosition(0, 0).widget().scene())
-    tsr_exporter_png.export(path + 'TSR.png')
 
-    plot_exporter_png = pg.exporters.ImageExporter(left_groupbox.layout().itemAtPosition(1, 0).widget().scene())
-    plot_exporter_png.export(path + 'plot.png')
+def read_tables_from_hdf5(filepath):
+    """
+        {table: {column: array}} from a results.h5 file, columns in their original order.
+    """
+    tables = {}
+    with h5py.File(filepath, 'r') as f:
+        for table_name in f:
+            datasets = sorted(f[table_name].values(), key=lambda dataset: dataset.attrs['order'])
+            tables[table_name] = {}
+            for dataset in datasets:
+                if h5py.check_string_dtype(dataset.dtype) is not None:
+                    tables[table_name][dataset.attrs['column']] = dataset.asstr()[()]
+                else:
+                    tables[table_name][dataset.attrs['column']] = dataset[()]
+    return tables
+
+
+def get_plot_scenes(left_layout, right_layout):
+    """
+        {file name: (scene, add_margin)} of the TSR, raster, activation and deactivation plots.
+    """
+    return {'TSR': (left_layout.layout().itemAtPosition(0, 0).widget().scene(), False),
+            'plot': (left_layout.layout().itemAtPosition(1, 0).widget().scene(), False),
+            'activation': (right_layout.layout().itemAtPosition(0, 0).widget().scene(), True),
+            'deactivation': (right_layout.layout().itemAtPosition(1, 0).widget().scene(), True)}
+
+
+def save_scene_to_file(scene, filename, add_margin=False):
+    """
+        Render a scene to a pdf or png file. Scenes belong to the GUI thread, call this from it only.
+    """
+    if filename.endswith('.pdf'):
+        PDFExporter(scene).export(filename, add_margin=add_margin)
+    else:
+        pg.exporters.ImageExporter(scene).export(filename)
+
+
+def get_plot_exports(path, left_layout, right_layout):
+    """
+        (save_scene_to_file arguments) for every plot file, pdfs first.
+    """
+    scenes = get_plot_scenes(left_layout, right_layout)
+    exports = []
+    for extension in ['pdf', 'png']:
+        for name, (scene, add_margin) in scenes.items():
+            exports.append((scene, f"{path}{name}.{extension}", add_margin and extension == 'pdf'))
+    return exports
 
-    act_exporter_png = pg.exporters.ImageExporter(right_groupbox.layout().itemAtPosition(0, 0).widget().scene())
-    act_exporter_png.export(path + 'activation.png')
 
-    deact_exporter_png = pg.exporters.ImageExporter(right_groupbox.layout().itemAtPosition(1, 0).widget().scene())
-    deact_exporter_png.export(path + 'deactivation.png')
+def save_plots_to_file(path, progress_callback, left_groupbox, right_groupbox, left_layout, right_layout):
+    exports = get_plot_exports(path, left_layout, right_layout)
+    for export_id, export_args in enumerate(exports):
+        save_scene_to_file(*export_args)
+        progress_callback.emit(95 + round(export_id * 4 / len(exports)))
 
     # tsr_exporter_svg = pg.exporters.SVGExporter(left_layout.layout().itemAtPosition(0, 0).widget().scene())
     # tsr_exporter_svg.export(path + 'TSR.svg')
@@ -139,18 +265,94 @@ def save_params_to_file(path, progress_callback, params_dict):
     progress_callback.emit(100)
 
 
-def save_graph_to_file(path, progress_callback, graph, hub, burst_id):
+def save_connectivity_to_file(path, connectivity, burst_id, formats=GRAPH_DATA_FORMATS):
+    """
+        Write the connectivity of a burst as GraphML, JSON and/or npz. No Graphviz is involved.
+    """
+    name = path + 'graph_burst_' + str(burst_id + 1)
+    hub = connectivity['hub']
+    nodes = [{'id': f"Electrode {electrode}", 'total': total, 'incoming': incoming}
+             for electrode, total, incoming in zip(hub['Electrode'], hub['Num connections'],
+                                                   hub['Num incoming connections'])]
+    edges = connectivity['edges']
+    edge_list = [{'source': f"Electrode {edges['Channel 1'][edge_id] + 1}",
+                  'target': f"Electrode {edges['Channel 2'][edge_id] + 1}",
+                  'C_ij': float(edges['C_ij_max'][edge_id]),
+                  'tau': int(edges['tau'][edge_id]),
+                  'num_delayed_spikes': int(edges['Num delayed spikes'][edge_id])}
+                 for edge_id in range(0, len(edges['Channel 1']))]
+
+    if 'graphml' in formats:
+        graphml = ET.Element('graphml', xmlns='http://graphml.graphdrawing.org/xmlns')
+        for key_id, (domain, key_type) in {'total': ('node', 'int'), 'incoming': ('node', 'int'),
+                                           'C_ij': ('edge', 'double'), 'tau': ('edge', 'int'),
+                                           'num_delayed_spikes': ('edge', 'int')}.items():
+            ET.SubElement(graphml, 'key', {'id': key_id, 'for': domain, 'attr.name': key_id, 'attr.type': key_type})
+        graph_element = ET.SubElement(graphml, 'graph', id=f"burst_{burst_id + 1}", edgedefault='directed')
+        for node in nodes:
+            node_element = ET.SubElement(graph_element, 'node', id=node['id'])
+            ET.SubElement(node_element, 'data', key='total').text = str(node['total'])
+            ET.SubElement(node_element, 'data', key='incoming').text = str(node['incoming'])
+        for edge in edge_list:
+            edge_element = ET.SubElement(graph_element, 'edge', source=edge['source'], target=edge['target'])
+            for key in ['C_ij', 'tau', 'num_delayed_spikes']:
+                ET.SubElement(edge_element, 'data', key=key).text = str(edge[key])
+        ET.ElementTree(graphml).write(name + '.graphml', encoding='utf-8', xml_declaration=True)
+
+    if 'json' in formats:
+        with open(name + '.json', 'w') as f:
+            json.dump({'burst': burst_id + 1, 'nodes': nodes, 'edges': edge_list}, f)
+
+    if 'npz' in formats:
+        np.savez(name + '.npz', channels=connectivity['channels'], num_spikes=connectivity['num_spikes'],
+                 C_ij=connectivity['C_ij'], tau=connectivity['tau'],
+                 **{'edges_' + key.replace(' ', '_'): value for key, value in edges.items()})
+
+
+def save_graph_to_file(path, progress_callback, graph, hub, burst_id, connectivity=None,
+                       formats=GRAPH_IMAGE_FORMATS + GRAPH_DATA_FORMATS, layout='dot', num_channels=60):
     path = f"{path}/graph/"
     if not os.path.isdir(path):
         Path(path).mkdir(parents=True)
-
-    graph.draw(path + 'graph_burst_' + str(burst_id + 1) + '.png')
-    graph.draw(path + 'graph_burst_' + str(burst_id + 1) + '.pdf')
-    graph.draw(path + 'graph_burst_' + str(burst_id + 1) + '.dot')
+    name = path + 'graph_burst_' + str(burst_id + 1)
+
+    if connectivity is not None:
+        save_connectivity_to_file(path, connectivity, burst_id, [f for f in formats if f in GRAPH_DATA_FORMATS])
+
+    image_formats = [f for f in formats if f in GRAPH_IMAGE_FORMATS]
+    if image_formats:
+        # one layout for all outputs, draw() without prog reuses the positions
+        if not graph.has_layout:
+            layout_graph(graph, layout, num_channels)
+        for image_format in image_formats:
+            if image_format == 'dot':
+                graph.write(name + '.dot')
+            else:
+                graph.draw(name + '.' + image_format)
 
     hub_df = pd.DataFrame(data=hub)
     hub_df.to_excel(path + 'hubs_burst_' + str(burst_id + 1) + '.xlsx', index=False)
 
     progress_callback.emit(100)
 
-    return path + 'graph_burst_' + str(burst_id + 1) + '.png'
+    if 'png' in image_formats:
+        return name + '.png'
+    return None
+
+
+def save_all_graph_hubs_to_file(path, progress_callback, hubs, recording_hub=None):
+    path = f"{path}/graph/"
+    if not os.path.isdir(path):
+        Path(path).mkdir(parents=True)
+
+    with pd.ExcelWriter(path + 'hubs_all_bursts.xlsx') as writer:
+        if recording_hub is not None:
+            recording_hub_df = pd.DataFrame(data=recording_hub)
+            recording_hub_df.to_excel(writer, sheet_name='all_bursts', index=False)
+        for burst_id in hubs:
+            hub_df = pd.DataFrame(data=hubs[burst_id])
+            hub_df.to_excel(writer, sheet_name='burst_' + str(burst_id + 1), index=False)
+
+    progress_callback.emit(100)
+
+    return path + 'hubs_all_bursts.xlsx'
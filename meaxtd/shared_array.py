@@ -0,0 +1,56 @@
+import os
+import tempfile
+import weakref
+import numpy as np
+
+
+def remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def create_shared_array(shape, dtype=np.float64):
+    """
+        Zero-filled array in a temporary file mapped into memory, in /dev/shm where it exists.
+        Other processes map the same pages with attach_array(get_array_spec(array)), so the array is not copied.
+        The file is removed when the array and all its views are freed.
+    """
+    directory = '/dev/shm' if os.path.isdir('/dev/shm') else None
+    handle, path = tempfile.mkstemp(prefix='meaxtd_', suffix='.dat', dir=directory)
+    os.close(handle)
+    array = np.memmap(path, dtype=dtype, mode='w+', shape=shape)
+    weakref.finalize(array, remove_file, path)
+    return array
+
+
+def is_shared_array(array):
+    """
+        True for a whole array of create_shared_array (not a view of a part of it).
+    """
+    filename = getattr(array, 'filename', None)
+    if filename is None or array.offset != 0 or not array.flags.c_contiguous or not os.path.exists(filename):
+        return False
+    return array.nbytes == os.path.getsize(filename)
+
+
+def share_array(array):
+    """
+        Shared array with the values of array and the spec (path, shape, dtype) to attach to it.
+        Arrays of create_shared_array are shared as they are, others are copied into a new one,
+        which has to be kept while other processes may attach to it.
+    """
+    if not is_shared_array(array):
+        shared = create_shared_array(array.shape, array.dtype)
+        shared[...] = array
+        array = shared
+    return array, (array.filename, array.shape, array.dtype.str)
+
+
+def attach_array(spec):
+    """
+        Read-only view of a shared array in another process.
+    """
+    path, shape, dtype = spec
+    return np.memmap(path, dtype=np.dtype(dtype), mode='r', shape=tuple(shape))
@@ -1,47 +1,156 @@
 import pyqtgraph as pg
 import numpy as np
+from PySide6.QtCore import QRectF
+from meaxtd.electrode_layout import get_layout
+from meaxtd.lod import MinMaxPyramid, CountPyramid
 
 
-def raster_plot(data, start):
+def raster_points(data, start, spikes=None):
+    """
+        x (time, s) and y (electrode number) arrays of all spikes, built per channel without per-spike objects.
+        spikes ({signal_id: spikes}, data.spikes by default) may miss channels, they have no points.
+    """
+    if spikes is None:
+        spikes = data.spikes
     start_index = np.where(data.time == start * 60)[0][0]
     num_signals = data.stream.shape[1]
-    num_spikes = 0
-    for signal_id in range(0, num_signals):
-        num_spikes += len(data.spikes[signal_id])
-    scatter = pg.ScatterPlotItem(size=2, brush=pg.mkBrush('k'))
-    nodes = np.empty([num_spikes, 2])
-    node_id = 0
-    for signal_id in range(0, num_signals):
-        curr_spikes = data.spikes[signal_id]
-        for curr_spike in curr_spikes:
-            nodes[node_id, 0] = data.time[start_index] + data.time[curr_spike]
-            nodes[node_id, 1] = signal_id + 1
-            node_id += 1
-    spots = [{'pos': nodes[i, :], 'data': 1} for i in range(num_spikes)] + [{'pos': [0, 0], 'data': 1}]
-    scatter.addPoints(spots)
+    spikes = [np.asarray(spikes.get(signal_id, []), dtype=np.int64) for signal_id in range(0, num_signals)]
+    if spikes:
+        x = data.time[start_index] + data.time[np.concatenate(spikes)]
+    else:
+        x = np.empty(0)
+    y = np.repeat(np.arange(1, num_signals + 1), [len(signal_spikes) for signal_spikes in spikes]).astype(float)
+    return x, y
+
+
+class RasterPlot(pg.ScatterPlotItem):
+    """
+        Spike raster that draws at most `limit` points. When more spikes fall into the visible time range,
+        a spikes-per-pixel density image of every electrode row is drawn instead, recomputed on every view change
+        from a count pyramid built once in setRaster.
+    """
+
+    def __init__(self, *args, **kwds):
+        self.x = None
+        self.y = None
+        self.num_channels = 0
+        self.counts = None
+        self.limit = 100000
+        pg.ScatterPlotItem.__init__(self, *args, **kwds)
+        self.density = pg.ImageItem()
+        self.density.setParentItem(self)
+        self.density.setLookupTable(np.repeat(np.linspace(255, 0, 256).astype(np.ubyte)[:, np.newaxis], 3, axis=1))
+        self.density.hide()
+
+    def setRaster(self, x, y, num_channels):
+        order = np.argsort(x, kind='stable')
+        self.x = np.asarray(x, dtype=float)[order]
+        self.y = np.asarray(y, dtype=float)[order]
+        self.num_channels = num_channels
+        if len(self.x) > self.limit:
+            self.counts = CountPyramid(self.x, self.y - 1, num_channels, self.x[0], self.x[-1])
+        else:
+            self.counts = None
+        self.updateRasterPlot()
+
+    def viewRangeChanged(self):
+        self.updateRasterPlot()
+
+    def updateRasterPlot(self):
+        if self.x is None:
+            return
+        vb = self.getViewBox()
+        if vb is None:
+            self.setData(x=self.x, y=self.y)
+            return
+
+        xrange = vb.viewRange()[0]
+        start = np.searchsorted(self.x, xrange[0], 'left')
+        stop = np.searchsorted(self.x, xrange[1], 'right')
+        if stop - start <= self.limit:
+            self.density.hide()
+            self.setData(x=self.x[start:stop], y=self.y[start:stop])
+            return
+
+        num_pixels = max(int(vb.width()), 1)
+        level = None
+        if self.counts is not None:
+            level = self.counts.counts(xrange[0], xrange[1], num_pixels)
+        if level is None:
+            counts, _, _ = np.histogram2d(self.y[start:stop], self.x[start:stop],
+                                          bins=[self.num_channels, num_pixels],
+                                          range=[[0.5, self.num_channels + 0.5], [xrange[0], xrange[1]]])
+            left, width = xrange[0], xrange[1] - xrange[0]
+        else:
+            counts, left, bin_width = level
+            width = counts.shape[1] * bin_width
+        if pg.getConfigOption('imageAxisOrder') == 'col-major':
+            counts = counts.T
+        self.setData(x=[], y=[])
+        self.density.setImage(counts, levels=(0, max(np.max(counts), 1)), autoLevels=False)
+        self.density.setRect(QRectF(left, 0.5, width, self.num_channels))
+        self.density.show()
+
+
+def raster_plot(data, start):
+    x, y = raster_points(data, start)
+    scatter = RasterPlot(size=2, pen=None, brush=pg.mkBrush('k'))
+    scatter.setRaster(x, y, data.stream.shape[1])
     return scatter
 
 
+class EnvelopePlot(pg.PlotCurveItem):
+    """
+        Curve of a long signal drawn from a min/max pyramid: on every view change only about `limit` points
+        covering the visible range are set, like HDF5PlotXY does for raw signals.
+    """
+
+    def __init__(self, *args, **kwds):
+        self.x = None
+        self.pyramid = None
+        self.pen = pg.mkPen()
+        self.limit = 5000
+        pg.PlotCurveItem.__init__(self, *args, **kwds)
+
+    def setEnvelope(self, x, y, pen=pg.mkPen()):
+        self.x = np.asarray(x)
+        self.pyramid = MinMaxPyramid(np.asarray(y), base_block=4)
+        self.pen = pen
+        self.updateEnvelopePlot()
+
+    def viewRangeChanged(self):
+        self.updateEnvelopePlot()
+
+    def updateEnvelopePlot(self):
+        if self.pyramid is None:
+            self.setData([])
+            return
+        vb = self.getViewBox()
+        start, stop = 0, len(self.x)
+        if vb is not None:
+            xrange = vb.viewRange()[0]
+            start = max(np.searchsorted(self.x, xrange[0]) - 1, 0)
+            stop = np.searchsorted(self.x, xrange[1]) + 1
+        indices, values = self.pyramid.envelope(start, stop, self.limit)
+        self.setData(x=self.x[indices], y=values, pen=self.pen, connect="finite")
+
+
 def tsr_plot(data):
-    curve = pg.PlotCurveItem()
-    curr_data = data.TSR
-    curve.setData(x=data.TSR_times, y=curr_data, pen=pg.mkPen('k'))
+    curve = EnvelopePlot()
+    curve.setEnvelope(data.TSR_times, data.TSR, pen=pg.mkPen('k'))
     return curve
 
 
 def tsr_plot_threshold(data, thr):
     curve = pg.PlotCurveItem()
-    x = data.TSR_times
+    x = np.array([data.TSR_times[0], data.TSR_times[-1]])
     y = np.zeros(x.shape) + thr
     curve.setData(x=x, y=y, pen=pg.mkPen('r', width=2))
     return curve
 
 
-def colormap_plot(data):
-    data = np.insert(data, 0, None)
-    data = np.insert(data, 7, None)
-    data = np.insert(data, 56, None)
-    data = np.insert(data, 63, None)
-    data.resize((8, 8))
-    img = pg.ImageItem(image=data)
+def colormap_plot(data, layout=None):
+    if layout is None:
+        layout = get_layout(len(data))
+    img = pg.ImageItem(image=layout.to_grid(data))
     return img
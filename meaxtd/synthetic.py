@@ -0,0 +1,162 @@
+import uuid
+import h5py
+import numpy as np
+from meaxtd.data import Data
+from meaxtd.electrode_layout import get_layout
+
+MEA_CHANNEL_COUNTS = (60, 64, 120, 252, 256)
+
+ADC_STEP_UV = 0.059605  # ConversionFactor 59605 * 10^-12 V, typical for MCS headstages
+
+
+def get_spike_template(fs):
+    """
+        Biphasic extracellular spike: sharp negative peak followed by a slower positive rebound.
+        Normalized so that the negative peak equals -1.
+    """
+    t = np.arange(int(0.003 * fs)) / fs * 1000  # in ms
+    template = -np.exp(-((t - 0.4) / 0.12) ** 2) + 0.35 * np.exp(-((t - 1.0) / 0.35) ** 2)
+    return template / -template.min()
+
+
+def generate_spike_times(rng, rate, num_samples, fs):
+    num_spikes = rng.poisson(rate * num_samples / fs)
+    return np.sort(rng.integers(0, num_samples, num_spikes))
+
+
+def generate_burstlet(rng, onset, fs, min_spikes=6, max_spikes=15, min_isi=0.003, max_isi=0.015):
+    num_spikes = rng.integers(min_spikes, max_spikes + 1)
+    isi = rng.uniform(min_isi, max_isi, num_spikes - 1) * fs
+    return onset + np.concatenate(([0], np.cumsum(isi))).astype(np.int64)
+
+
+def generate_recording(num_channels=60, duration=60.0, fs=10000, seed=0, noise=10.0,
+                       spike_amplitude=(60.0, 150.0), spike_rate=1.0, burstlet_rate=0.02,
+                       network_burst_rate=0.1, burst_participation=0.8, propagation_speed=0.2):
+    """
+        Build a deterministic synthetic MEA recording.
+
+        :param num_channels: number of electrodes (60, 64, 120, 252 and 256 are typical layouts)
+        :param duration: recording length, s
+        :param fs: sampling frequency, Hz (1e6 / fs must be an integer number of µs)
+        :param seed: seed of the random generator, equal seeds give identical recordings
+        :param noise: standard deviation of the background noise, µV
+        :param spike_amplitude: range of spike peak amplitudes, µV
+        :param spike_rate: rate of isolated background spikes per channel, Hz
+        :param burstlet_rate: rate of isolated single channel burstlets per channel, Hz
+        :param network_burst_rate: rate of network bursts, Hz
+        :param burst_participation: fraction of channels taking part in each network burst
+        :param propagation_speed: speed of the network burst wavefront, m/s
+        :return: Data with stream, time and fs filled as read_h5_file does,
+                 the injected events are stored in data.ground_truth
+    """
+    rng = np.random.default_rng(seed)
+    num_samples = int(duration * fs)
+    template = get_spike_template(fs)
+    positions = get_layout(num_channels).positions
+
+    spike_times = [[generate_spike_times(rng, spike_rate, num_samples, fs)] for _ in range(num_channels)]
+
+    burstlets = [[] for _ in range(num_channels)]
+    for channel_id in range(0, num_channels):
+        for onset in generate_spike_times(rng, burstlet_rate, num_samples, fs):
+            burstlet = generate_burstlet(rng, onset, fs)
+            burstlets[channel_id].append(burstlet)
+            spike_times[channel_id].append(burstlet)
+
+    network_bursts = []
+    num_network_bursts = rng.poisson(network_burst_rate * duration)
+    onsets = np.sort(rng.integers(int(0.5 * fs), max(int(0.5 * fs) + 1, num_samples - fs), num_network_bursts))
+    for onset in onsets:
+        origin = rng.integers(0, num_channels)
+        distances = np.linalg.norm(positions - positions[origin], axis=1)
+        delays = distances / (propagation_speed * 1e6) * fs  # µm / (µm/s) * samples/s
+        participants = np.flatnonzero(rng.random(num_channels) < burst_participation)
+        burst_end = onset
+        for channel_id in participants:
+            channel_onset = onset + int(delays[channel_id] + rng.normal(0, 0.0005 * fs))
+            burstlet = generate_burstlet(rng, max(0, channel_onset), fs)
+            spike_times[channel_id].append(burstlet)
+            burst_end = max(burst_end, burstlet[-1])
+        network_bursts.append({'start': int(onset), 'end': int(burst_end), 'origin': int(origin),
+                               'channels': participants.tolist()})
+
+    raw = np.rint(rng.normal(0.0, noise / ADC_STEP_UV, size=(num_samples, num_channels))).astype(np.int32)
+    template_len = len(template)
+    true_spikes = {}
+    for channel_id in range(0, num_channels):
+        curr_spikes = np.unique(np.concatenate(spike_times[channel_id]))
+        curr_spikes = curr_spikes[curr_spikes < num_samples - template_len]
+        amplitudes = rng.uniform(spike_amplitude[0], spike_amplitude[1], len(curr_spikes)) / ADC_STEP_UV
+        ids = curr_spikes[:, np.newaxis] + np.arange(template_len)
+        waveforms = np.rint(amplitudes[:, np.newaxis] * template).astype(np.int32)
+        np.add.at(raw[:, channel_id], ids, waveforms)
+        true_spikes[channel_id] = curr_spikes + int(np.argmin(template))
+
+    tick = int(round(1000000 / fs))
+    time = np.arange(0, num_samples) * tick
+
+    data = Data()
+    data.stream = raw / 1000000
+    data.time = time * 1e-06
+    data.fs = fs
+    data.ground_truth = {'spikes': true_spikes,
+                         'burstlets': burstlets,
+                         'network_bursts': network_bursts,
+                         'positions': positions}
+    return data
+
+
+def write_h5_file(data, data_path):
+    """
+        Write data.stream as an MCS-HDF5 RawData file readable by McsPy and read_h5_file.
+    """
+    num_samples, num_channels = data.stream.shape
+    tick = int(round(1000000 / data.fs))
+    raw = np.rint(data.stream * 1000000).astype(np.int32)
+
+    info_dtype = np.dtype([('ChannelID', '<i4'), ('RowIndex', '<i4'), ('GroupID', '<i4'),
+                           ('ElectrodeGroup', '<i4'), ('Label', 'S32'), ('RawDataType', 'S32'),
+                           ('Unit', 'S32'), ('Exponent', '<i4'), ('ADZero', '<i4'), ('Tick', '<i8'),
+                           ('ConversionFactor', '<i8'), ('ADCBits', '<i4'),
+                           ('HighPassFilterType', 'S32'), ('HighPassFilterCutOffFrequency', 'S32'),
+                           ('HighPassFilterOrder', '<i4'), ('LowPassFilterType', 'S32'),
+                           ('LowPassFilterCutOffFrequency', 'S32'), ('LowPassFilterOrder', '<i4')])
+    info = np.zeros(num_channels, dtype=info_dtype)
+    info['ChannelID'] = np.arange(num_channels)
+    info['RowIndex'] = np.arange(num_channels)
+    info['Label'] = [str(channel_id + 1).encode() for channel_id in range(0, num_channels)]
+    info['RawDataType'] = b'Int'
+    info['Unit'] = b'V'
+    info['Exponent'] = -12
+    info['Tick'] = tick
+    info['ConversionFactor'] = int(round(ADC_STEP_UV * 1000000))
+    info['ADCBits'] = 24
+
+    with h5py.File(data_path, 'w') as f:
+        f.attrs['McsHdf5ProtocolType'] = np.bytes_('RawData')
+        f.attrs['McsHdf5ProtocolVersion'] = 3
+        data_group = f.create_group('Data')
+        for key, value in (('Comment', ''), ('Date', ''), ('FileGUID', str(uuid.UUID(int=0))),
+                           ('MeaLayout', f'{num_channels}MEA'), ('MeaSN', ''), ('MeaName', 'MEAXtd synthetic'),
+                           ('ProgramName', 'MEAXtd'), ('ProgramVersion', '0.0.1')):
+            data_group.attrs[key] = np.bytes_(value)
+        data_group.attrs['DateInTicks'] = 0
+        recording = data_group.create_group('Recording_0')
+        recording.attrs['Comment'] = np.bytes_('')
+        recording.attrs['Duration'] = num_samples * tick
+        recording.attrs['Label'] = np.bytes_('')
+        recording.attrs['RecordingID'] = 0
+        recording.attrs['RecordingType'] = np.bytes_('')
+        recording.attrs['TimeStamp'] = 0
+        stream = recording.create_group('AnalogStream').create_group('Stream_0')
+        stream.attrs['StreamInfoVersion'] = 1
+        stream.attrs['DataSubType'] = np.bytes_('Electrode')
+        stream.attrs['Label'] = np.bytes_('Filter Data1')
+        stream.attrs['SourceStreamGUID'] = np.bytes_(str(uuid.UUID(int=0)))
+        stream.attrs['StreamGUID'] = np.bytes_(str(uuid.UUID(int=1)))
+        stream.attrs['StreamType'] = np.bytes_('Analog')
+        stream.create_dataset('ChannelData', data=np.transpose(raw), chunks=(num_channels, min(num_samples, 10000)))
+        stream.create_dataset('ChannelDataTimeStamps', data=np.array([[0, 0, num_samples - 1]], dtype=np.int64))
+        info_dataset = stream.create_dataset('InfoChannel', data=info)
+        info_dataset.attrs['InfoVersion'] = 1
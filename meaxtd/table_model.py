@@ -0,0 +1,95 @@
+import numpy as np
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+
+def get_column(values):
+    """
+        1D array of a characteristics column. Columns of one numeric type keep a numeric dtype,
+        others (text, lists, ints mixed with floats) become object arrays holding the original values.
+    """
+    try:
+        column = np.asarray(values)
+    except ValueError:
+        column = None
+    mixed = not isinstance(values, np.ndarray) and len(set(type(value) for value in values)) > 1
+    if column is None or column.ndim != 1 or column.dtype.kind not in 'biuf' or mixed:
+        column = np.empty(len(values), dtype=object)
+        column[:] = list(values)
+    return column
+
+
+def format_value(value, decimals):
+    if isinstance(value, (float, np.floating)):
+        curr_value = round(float(value), decimals)
+        if curr_value == 0.0:
+            curr_value = round(float(value), 6)
+        return str(curr_value)
+    return str(value)
+
+
+class ColumnTableModel(QAbstractTableModel):
+    """
+        Read-only model of a dict of columns (header: values of every row), the layout of the characteristics tables.
+        The columns stay arrays: cells are formatted only when a view asks for them and sorting reorders
+        a row index with numpy, by value when a column converts to numbers and by text otherwise.
+        Every view sorts its own model, a model shared by two views would reorder both.
+    """
+
+    def __init__(self, columns, rows=None, decimals=2, parent=None):
+        super().__init__(parent)
+        self.headers = list(columns.keys())
+        self.columns = [get_column(values) for values in columns.values()]
+        num_rows = len(self.columns[0]) if self.columns else 0
+        self.rows = np.arange(0, num_rows) if rows is None else np.asarray(rows, dtype=np.int64)
+        self.decimals = decimals
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        # views ask for many roles per cell (font, alignment, ...), only the value roles are looked up
+        if role != Qt.DisplayRole and role != Qt.UserRole or not index.isValid():
+            return None
+        value = self.columns[index.column()][self.rows[index.row()]]
+        if role == Qt.DisplayRole:
+            return format_value(value, self.decimals)
+        if role == Qt.UserRole:
+            return value.item() if isinstance(value, np.generic) else value
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.headers[section]
+        return str(section + 1)
+
+    def get_sort_keys(self, column_id):
+        column = self.columns[column_id][self.rows]
+        if column.dtype != object:
+            return column
+        try:
+            return column.astype(float)
+        except (TypeError, ValueError):
+            return np.array([str(value) for value in column])
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        if column < 0 or column >= len(self.columns):
+            return
+        self.layoutAboutToBeChanged.emit()
+        positions = np.argsort(self.get_sort_keys(column), kind='stable')
+        if order == Qt.DescendingOrder:
+            positions = positions[::-1]
+        old_indices = self.persistentIndexList()
+        new_positions = np.empty(len(positions), dtype=np.int64)
+        new_positions[positions] = np.arange(0, len(positions))
+        self.rows = self.rows[positions]
+        self.changePersistentIndexList(old_indices, [self.index(int(new_positions[index.row()]), index.column())
+                                                     for index in old_indices])
+        self.layoutChanged.emit()
+
+    def get_source_row(self, row):
+        return int(self.rows[row])
@@ -0,0 +1,159 @@
+import gc
+import os
+import time
+import McsPy.McsData
+import numpy as np
+import pytest
+from PySide6.QtWidgets import QApplication
+
+from meaxtd.analysis import (AnalysisProcess, PartialResult, analyse, apply_analysis_result, encode_stream,
+                             decode_stream)
+from meaxtd.data import Data
+from meaxtd.read_h5 import read_h5_file
+from meaxtd.shared_array import attach_array
+from meaxtd.progress import NullProgress, JobCancelled, Jobs
+from meaxtd.stat_plots import raster_points
+from meaxtd.synthetic import generate_recording, write_h5_file
+
+PARAMS = {'Signal start, min': 0, 'Signal end, min': 1, 'Spike method': 'Median', 'Spike coefficient': -5.0,
+          'Burst method': 'TSR', 'Burst window, ms': 100, 'Burst param': 0.1, 'Excluded channels': [3]}
+
+
+def test_highlight_streams_round_trip():
+    """Check that a NaN-padded highlight stream is sent as its finite samples and rebuilt exactly."""
+    values = np.full(1000, np.nan)
+    values[10:20] = np.arange(0, 10) * 0.1
+    values[500] = -1.0
+    encoded = encode_stream(values)
+    assert len(encoded[1]) == 11
+    np.testing.assert_array_equal(decode_stream(encoded), values)
+
+
+def test_partial_result_adds_up_to_the_analysis():
+    """Check that the channels streamed during spike finding add up to the final TSR, raster and spike counts."""
+    recording = generate_recording(num_channels=6, duration=5.0, seed=2, network_burst_rate=0.5)
+    partial = PartialResult(recording, 0, 1)
+    order = []
+
+    def channel_done(signal_id, spikes, TSR_bins):
+        # every channel arrives before the next one is searched
+        assert max(recording.spikes) == signal_id
+        order.append(signal_id)
+        partial.add_channel(signal_id, spikes, TSR_bins)
+
+    analyse(recording, PARAMS, NullProgress(), channel_done)
+    assert order == list(range(0, 6))
+    np.testing.assert_array_equal(partial.TSR, recording.TSR)
+    for expected, actual in zip(raster_points(recording, 0), partial.raster_points()):
+        np.testing.assert_array_equal(actual, expected)
+    columns = partial.get_channel_columns(excluded_channels=[2])
+    assert columns['Channel'] == [1, 2, 4, 5, 6]
+    assert columns['Num spikes'] == [len(recording.spikes[signal_id]) for signal_id in [0, 1, 3, 4, 5]]
+
+
+def test_superseded_job_stops_at_checkpoint():
+    """Check that starting a job with the same key cancels the older one at its next progress call."""
+    jobs = Jobs()
+    recording = generate_recording(num_channels=4, duration=2.0, seed=1)
+    old_handle = jobs.start('analysis')
+    new_handle = jobs.start('analysis')
+    assert old_handle.is_cancelled() and not new_handle.is_cancelled()
+    with pytest.raises(JobCancelled):
+        analyse(recording, PARAMS, old_handle.progress(NullProgress()))
+    jobs.finish(old_handle)
+    assert jobs.handles == {'analysis': new_handle}
+
+
+def test_process_results_match_in_process_analysis():
+    """Check that the analysis process reads the shared recording and returns the same results as a local run."""
+    application = QApplication.instance() or QApplication([])
+    recording = generate_recording(num_channels=12, duration=10.0, seed=4, network_burst_rate=0.3)
+    expected = Data()
+    expected.stream, expected.time, expected.fs = recording.stream, recording.time, recording.fs
+    analyse(expected, PARAMS, NullProgress())
+
+    analysis = AnalysisProcess(poll_interval=10)
+    finished = []
+    progress = []
+    analysis.finished.connect(lambda data, result: finished.append((data, result)))
+    analysis.progress.connect(progress.append)
+    channels = []
+    analysis.channel_found.connect(lambda data, signal_id, spikes, TSR_bins: channels.append(signal_id))
+    analysis.start(recording, PARAMS)
+    deadline = time.perf_counter() + 120
+    while not finished and time.perf_counter() < deadline:
+        application.processEvents()
+    analysis.shutdown()
+
+    data, result = finished[0]
+    assert data is recording and result is not None
+    assert 'stream' not in result and 'time' not in result
+    apply_analysis_result(recording, result)
+    assert progress and progress == sorted(progress) and not analysis.is_busy()
+    assert recording.spikes[2].size == 0
+    assert channels == list(range(0, 12))
+    for channel in range(0, 12):
+        np.testing.assert_array_equal(recording.spikes[channel], expected.spikes[channel])
+        np.testing.assert_array_equal(recording.spike_stream[channel], expected.spike_stream[channel])
+        np.testing.assert_array_equal(recording.burst_stream[channel], expected.burst_stream[channel])
+    assert recording.burst_characteristics == expected.burst_characteristics
+    assert list(recording.global_characteristics) == list(expected.global_characteristics)
+
+
+def test_superseded_process_job_has_no_result():
+    """Check that a newer analysis cancels the running one, which finishes without a result, an error or progress."""
+    application = QApplication.instance() or QApplication([])
+    recording = generate_recording(num_channels=12, duration=10.0, seed=4, network_burst_rate=0.3)
+    analysis = AnalysisProcess(poll_interval=10)
+    finished = []
+    errors = []
+    progress = []
+    analysis.finished.connect(lambda data, result: finished.append(result))
+    analysis.error.connect(errors.append)
+    analysis.progress.connect(progress.append)
+    analysis.start(recording, PARAMS)
+    analysis.start(recording, dict(PARAMS, **{'Spike coefficient': -4.0}))
+    deadline = time.perf_counter() + 120
+    while len(finished) < 2 and time.perf_counter() < deadline:
+        application.processEvents()
+    analysis.shutdown()
+
+    assert finished[0] is None and finished[1] is not None
+    assert not errors and not analysis.is_busy()
+    # only the progress of the latest job is relayed, so the bar never jumps back
+    assert progress and progress == sorted(progress)
+
+
+def test_shutdown_cancels_running_job():
+    """Check that shutting down during an analysis stops it at a checkpoint instead of waiting for it to finish."""
+    application = QApplication.instance() or QApplication([])
+    recording = generate_recording(num_channels=60, duration=60.0, seed=4, network_burst_rate=0.3)
+    analysis = AnalysisProcess(poll_interval=10)
+    progress = []
+    analysis.progress.connect(progress.append)
+    analysis.start(recording, PARAMS)
+    deadline = time.perf_counter() + 120
+    while not progress and time.perf_counter() < deadline:
+        application.processEvents()
+    started = time.perf_counter()
+    analysis.shutdown()
+    assert progress and progress[-1] < 30
+    assert time.perf_counter() - started < 2
+
+
+def test_read_stream_is_shared_without_copy(tmp_path):
+    """Check that a stream read from HDF5 is mapped by the analysis as it is and its file goes with the data."""
+    McsPy.McsData.VERBOSE = False
+    path = str(tmp_path / 'synthetic.h5')
+    write_h5_file(generate_recording(num_channels=6, duration=2.0, seed=1), path)
+    data = read_h5_file(path, NullProgress())
+    analysis = AnalysisProcess()
+    stream_spec, time_spec = analysis.share(data)
+    assert stream_spec[0] == data.stream.filename and len(analysis.shared) == 2
+    assert np.array_equal(attach_array(stream_spec), data.stream)
+    assert np.array_equal(attach_array(time_spec), data.time)
+    analysis.shutdown()
+    shared_file = data.stream.filename
+    del data
+    gc.collect()
+    assert not os.path.exists(shared_file)
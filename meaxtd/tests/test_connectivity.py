@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+import meaxtd.connectivity as connectivity_module
+from meaxtd.connectivity import ConnectivityAccumulator, accumulate_bursts, sliding_window_connectivity
+from meaxtd.construct_graph import count_delayed_spikes, get_burst_spike_trains, construct_all_graphs, get_max_delay
+from meaxtd.data import Data
+from meaxtd.find_bursts import find_spikes, find_bursts
+from meaxtd.progress import NullProgress
+from meaxtd.synthetic import generate_recording
+
+
+@pytest.fixture(scope='module')
+def recording():
+    data = generate_recording(num_channels=60, duration=10.0, seed=3, network_burst_rate=0.5)
+    find_spikes(data, [], 'Median', -5.0, 0, 1, NullProgress())
+    find_bursts(data, [], 'Median', -5.0, 'TSR', 100, 0.1, 0, 1, NullProgress())
+    return data
+
+
+def test_bursts_are_summed(recording):
+    """Check that the accumulated tensor is the sum of the per-burst counts."""
+    accumulator = accumulate_bursts(recording, NullProgress(), 'TSR', 0.05, 50)
+    expected = np.zeros((60, 60, 50), dtype=np.int64)
+    for burst_id in range(0, len(recording.bursts)):
+        channels, spike_trains = get_burst_spike_trains(recording, 'TSR', burst_id)
+        expected[np.ix_(channels, channels)] += count_delayed_spikes(spike_trains, 50)
+    assert accumulator.num_segments == len(recording.bursts)
+    assert np.array_equal(accumulator.delayed_counts, expected)
+    hub = accumulator.connectivity(5)['hub']
+    assert len(hub['Electrode']) > 0
+    assert np.isclose(sum(hub['Hub coefficient']), 1.0)
+
+
+def test_burst_results_are_summed(recording):
+    """Check that the counts folded in by construct_all_graphs equal scanning the bursts again and are not cached."""
+    data = Data()
+    data.stream = recording.stream
+    data.time = recording.time
+    data.fs = recording.fs
+    data.spikes = recording.spikes
+    data.bursts = recording.bursts
+    construct_all_graphs(data, NullProgress(), 'TSR', 0.05, 50, 5, max_workers=2)
+    max_delay = get_max_delay(data, 0.05, 50)
+    expected = accumulate_bursts(data, NullProgress(), 'TSR', 0.05, 50)
+    # the cached bursts are counted again, then all bursts are computed with their counts
+    for _ in range(0, 2):
+        accumulator = ConnectivityAccumulator(60, max_delay)
+        construct_all_graphs(data, NullProgress(), 'TSR', 0.05, 50, 5, max_workers=2, accumulator=accumulator)
+        assert accumulator.num_segments == expected.num_segments
+        assert np.array_equal(accumulator.delayed_counts, expected.delayed_counts)
+        assert np.array_equal(accumulator.num_spikes, expected.num_spikes)
+        assert all('delayed_counts' not in connectivity for connectivity in data.graph_cache.values())
+        data.graph_cache = {}
+
+
+def test_subtract_undoes_add(recording):
+    """Check that subtracting a burst restores the previous state."""
+    accumulator = ConnectivityAccumulator(60, 50)
+    accumulator.add_burst(recording, 'TSR', 0)
+    counts = accumulator.delayed_counts.copy()
+    accumulator.add_burst(recording, 'TSR', 1)
+    accumulator.subtract_burst(recording, 'TSR', 1)
+    assert np.array_equal(accumulator.delayed_counts, counts)
+    accumulator.subtract_burst(recording, 'TSR', 0)
+    assert not accumulator.delayed_counts.any()
+    assert not accumulator.num_spikes.any()
+
+
+def test_sliding_window_matches_direct_sum(recording, monkeypatch):
+    """Check that the incrementally updated windows equal windows accumulated from scratch, counting each step once."""
+    step = 10000
+    num_counted = []
+
+    def count_step(spike_trains, max_delay):
+        num_counted.append(1)
+        return count_delayed_spikes(spike_trains, max_delay)
+
+    monkeypatch.setattr(connectivity_module, 'count_delayed_spikes', count_step)
+    windows = sliding_window_connectivity(recording, NullProgress(), 0.05, 50, 5, 3 * step, step)
+    monkeypatch.undo()
+    assert len(windows) == 8 and len(num_counted) == 10
+    for window_start, connectivity in windows[::3]:
+        accumulator = ConnectivityAccumulator(60, 50)
+        for step_start in range(window_start, window_start + 3 * step, step):
+            accumulator.add_window(recording, step_start, step_start + step)
+        assert np.array_equal(connectivity['C_ij'], accumulator.connectivity(5)['C_ij'])
+    with pytest.raises(ValueError):
+        sliding_window_connectivity(recording, NullProgress(), 0.05, 50, 5, 25000, step)
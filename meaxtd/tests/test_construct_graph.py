@@ -0,0 +1,105 @@
+import numpy as np
+
+from meaxtd.construct_graph import (count_delayed_spikes, construct_delayed_spikes_graph, construct_all_graphs,
+                                    compute_delayed_connectivity, build_graph, layout_graph, get_electrode_info,
+                                    get_percentile)
+from meaxtd.data import Data
+from meaxtd.find_bursts import find_spikes, find_bursts
+from meaxtd.progress import NullProgress
+from meaxtd.synthetic import generate_recording
+
+
+def count_delayed_spikes_pairwise(spikes_channel_1, spikes_channel_2, tau_list):
+    """Pairwise scan with greedy first-match, as the graph construction originally did it."""
+    curr_tau_dict = dict.fromkeys(tau_list, 0)
+    sync_ids = []
+    for spike_1 in spikes_channel_1:
+        curr_distances = [spike_2 - spike_1 for spike_2 in spikes_channel_2]
+        for curr_id in range(0, len(curr_distances)):
+            if curr_id not in sync_ids:
+                curr_distance = curr_distances[curr_id]
+                if curr_distance in curr_tau_dict:
+                    curr_tau_dict[curr_distance] += 1
+                    sync_ids.append(curr_id)
+    return [curr_tau_dict[tau] for tau in tau_list]
+
+
+def test_delayed_counts_match_pairwise_scan():
+    """Check the vectorized counts against the pairwise scan on random spike trains."""
+    rng = np.random.default_rng(0)
+    max_delay = 20
+    tau_list = list(range(1, max_delay + 1))
+    for _ in range(0, 20):
+        spike_trains = [np.unique(rng.integers(0, 400, rng.integers(0, 40))) for _ in range(0, 5)]
+        counts = count_delayed_spikes(spike_trains, max_delay)
+        for i, spikes_1 in enumerate(spike_trains):
+            for j, spikes_2 in enumerate(spike_trains):
+                expected = count_delayed_spikes_pairwise(spikes_1, spikes_2, tau_list)
+                assert list(counts[i, j]) == expected
+
+
+def test_each_spike_is_matched_once():
+    """Check that a target spike within reach of several source spikes is counted only for the first one."""
+    counts = count_delayed_spikes([np.array([10, 12, 14]), np.array([15])], 10)
+    assert counts[0, 1].sum() == 1
+    assert counts[0, 1, 4] == 1
+
+
+def test_empty_trains():
+    """Check that empty trains and a zero delay window give zero counts."""
+    counts = count_delayed_spikes([np.array([]), np.array([5, 6])], 3)
+    assert counts.shape == (2, 2, 3)
+    assert counts[:, 0].sum() == 0
+    assert count_delayed_spikes([np.array([1, 2])], 0).shape == (1, 1, 0)
+
+
+def test_all_graphs_match_single_graphs():
+    """Check that the batch job reproduces the single-burst hub tables and fills the cache."""
+    data = generate_recording(num_channels=60, duration=10.0, seed=3, network_burst_rate=0.5)
+    find_spikes(data, [], 'Median', -5.0, 0, 1, NullProgress())
+    find_bursts(data, [], 'Median', -5.0, 'TSR', 100, 0.1, 0, 1, NullProgress())
+    assert len(data.bursts) > 1
+    connectivity = construct_all_graphs(data, NullProgress(), 'TSR', 0.05, 50, 5, max_workers=2)
+    assert sorted(connectivity) == list(range(0, len(data.bursts)))
+    assert len(data.graph_cache) == len(data.bursts)
+    for burst_id in connectivity:
+        single = Data()
+        single.stream = data.stream
+        single.time = data.time
+        single.fs = data.fs
+        single.spikes = data.spikes
+        single.bursts = data.bursts
+        construct_delayed_spikes_graph(single, NullProgress(), 'TSR', 0.05, 50, 5, burst_id)
+        assert single.graph_hub == connectivity[burst_id]['hub']
+        assert np.array_equal(single.graph_cache[(burst_id, 0.05, 50, 5)]['C_ij'], connectivity[burst_id]['C_ij'])
+
+
+def test_electrode_layout_keeps_positions():
+    """Check that the electrode layout places nodes at the electrode coordinates."""
+    channels = [0, 9, 20]
+    spike_trains = [np.arange(0, 1000, 50), np.arange(3, 1000, 50),
+                    np.concatenate([np.arange(7, 500, 50), np.arange(530, 1000, 50)])]
+    connectivity = compute_delayed_connectivity(channels, spike_trains, 10, 50)
+    graph = build_graph(connectivity)
+    assert not graph.has_layout
+    layout_graph(graph, 'electrode', 60)
+    electrode_info = get_electrode_info(60)
+    positions = []
+    expected = []
+    for node in graph.nodes():
+        positions.append([float(value) for value in node.attr['pos'].split(',')])
+        channel = int(node.attr['channel'])
+        expected.append([electrode_info[channel]['X'], -electrode_info[channel]['Y']])
+    # Graphviz translates the drawing to the origin, distances between nodes are kept
+    assert len(positions) == 2
+    assert np.allclose(np.diff(positions, axis=0), np.diff(expected, axis=0), atol=0.01)
+
+
+def test_percentile_matches_numpy():
+    """Check that the partition-based percentile is identical to np.percentile."""
+    rng = np.random.default_rng(1)
+    for num_values in [1, 2, 3, 7, 100, 1001]:
+        values = rng.random(num_values)
+        values[::3] = 0.5
+        for percent in [0, 1, 5, 33, 50, 95, 99, 100]:
+            assert get_percentile(values, percent) == np.percentile(values, percent)
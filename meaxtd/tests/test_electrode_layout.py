@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from meaxtd.electrode_layout import get_layout, load_layout, LAYOUTS
+
+
+@pytest.mark.parametrize('num_channels', [60, 64, 120, 252, 256])
+def test_registered_layouts(num_channels):
+    """Check channel counts, unique grid cells and the precomputed distances of the registered layouts."""
+    layout = get_layout(num_channels)
+    assert layout.num_channels == num_channels
+    assert len(set(map(tuple, layout.cells))) == num_channels
+    assert layout.distances.shape == (num_channels, num_channels)
+    assert np.allclose(layout.distances, layout.distances.T)
+    nearest = layout.distances[np.arange(num_channels), layout.neighbours[:, 0]]
+    assert np.allclose(nearest, layout.pitch)
+
+
+def test_60_grid_matches_corner_insertion():
+    """Check that the 60 channel grid equals the 8x8 image with empty corners used before."""
+    values = np.arange(60, dtype=float)
+    expected = values.copy()
+    for corner_id in [0, 7, 56, 63]:
+        expected = np.insert(expected, corner_id, np.nan)
+    assert np.array_equal(get_layout(60).to_grid(values), expected.reshape((8, 8)), equal_nan=True)
+
+
+def test_neighbour_mask():
+    """Check that an inner electrode of a full grid has 4 direct and 8 diagonal neighbours."""
+    layout = get_layout(64)
+    assert layout.get_neighbour_mask(layout.pitch)[9].sum() == 4
+    assert layout.get_neighbour_mask(layout.pitch * np.sqrt(2))[9].sum() == 8
+
+
+def test_unregistered_channel_count():
+    """Check that other channel counts get a square grid, built once."""
+    layout = get_layout(10)
+    assert layout.grid_shape == (3, 4)
+    assert get_layout(10) is layout
+
+
+def test_custom_layout(tmp_path):
+    """Check reading a custom layout from a csv file."""
+    path = tmp_path / 'hexagonal.csv'
+    path.write_text('X,Y\n0,0\n100,0\n50,86.6\n')
+    layout = load_layout(str(path))
+    assert LAYOUTS['hexagonal'] is layout
+    assert np.isclose(layout.pitch, 100.0, atol=0.1)
+    assert layout.num_channels == 3
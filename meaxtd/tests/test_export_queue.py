@@ -0,0 +1,38 @@
+import threading
+from PySide6.QtWidgets import QApplication
+
+from meaxtd.export_queue import ExportQueue
+
+
+def run_until(condition):
+    application = QApplication.instance() or QApplication([])
+    while not condition():
+        application.processEvents()
+
+
+def test_export_finishes_after_all_jobs():
+    """Check that background jobs leave the calling thread, render jobs stay on it and finished comes once at the end."""
+    queue = ExportQueue()
+    main_thread = threading.get_ident()
+    threads = {}
+    finished = []
+    errors = []
+    queue.finished.connect(finished.append)
+    queue.error.connect(errors.append)
+
+    def job(name):
+        threads[name] = threading.get_ident()
+
+    def failing_job():
+        raise ValueError('disk full')
+
+    queue.start('first/', [(job, ('table',)), (failing_job, ())], [(job, ('plot',)), (job, ('image',))])
+    queue.start('second/', [], [])
+    run_until(lambda: len(finished) == 2)
+    queue.shutdown()
+
+    assert finished == ['second/', 'first/']
+    assert threads['table'] != main_thread
+    assert threads['plot'] == main_thread and threads['image'] == main_thread
+    assert len(errors) == 1 and 'disk full' in errors[0]
+    assert not queue.is_busy()
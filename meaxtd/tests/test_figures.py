@@ -0,0 +1,69 @@
+import numpy as np
+from types import SimpleNamespace
+
+from meaxtd.stat_plots import raster_points
+from meaxtd.figures import get_figure_data, render_figures, get_render_executor, shutdown_render_executor
+
+
+def get_data():
+    return SimpleNamespace(time=np.arange(0, 2000) * 0.001, stream=np.zeros((2000, 4)),
+                           spikes={0: [5, 900], 1: [], 2: [10, 20, 1500], 3: [1999]},
+                           TSR_times=np.arange(0, 2, 0.05), TSR=np.arange(0, 40) % 7,
+                           bursts=[{'start': 0, 'end': 100, 'channels': [0, 2]}],
+                           burst_activation=np.array([1.0, 0.0, 2.0, 0.0]),
+                           burst_deactivation=np.array([3.0, 0.0, 4.0, 0.0]))
+
+
+def test_raster_points_match_spikes():
+    """Check that the raster arrays hold every spike with its time and electrode number."""
+    data = get_data()
+    x, y = raster_points(data, 0)
+    expected = [(data.time[spike], channel + 1) for channel in range(0, 4) for spike in data.spikes[channel]]
+    assert np.allclose(x, [point[0] for point in expected])
+    assert np.array_equal(y, [point[1] for point in expected])
+
+
+def test_render_figures_without_gui(tmp_path):
+    """Check that all figures are rendered from the data arrays alone."""
+    figure_data = get_figure_data(get_data(), 0, threshold=3.0)
+    files = render_figures(figure_data, f"{tmp_path}/", formats=['png', 'pdf'])
+    names = sorted(file.split('/')[-1] for file in files)
+    assert names == sorted(f"{name}.{extension}" for name in ['TSR', 'plot', 'activation', 'deactivation']
+                           for extension in ['png', 'pdf'])
+    for file in files:
+        assert (tmp_path / file.split('/')[-1]).stat().st_size > 0
+
+
+def test_rendering_keeps_global_options(tmp_path):
+    """Check that rendering restores the pyqtgraph options of the process and that the render pool is reused."""
+    import pyqtgraph as pg
+    previous = {key: pg.getConfigOption(key) for key in ['background', 'foreground', 'imageAxisOrder']}
+    pg.setConfigOptions(background='k', foreground='d', imageAxisOrder='col-major')
+    try:
+        render_figures(get_figure_data(get_data(), 0), f"{tmp_path}/", formats=['png'])
+        assert pg.getConfigOption('background') == 'k' and pg.getConfigOption('imageAxisOrder') == 'col-major'
+    finally:
+        pg.setConfigOptions(**previous)
+    assert get_render_executor() is get_render_executor()
+    shutdown_render_executor()
+
+
+def test_raster_switches_to_density():
+    """Check that the raster draws points below the limit and a per-electrode density image above it."""
+    import pyqtgraph as pg
+    from meaxtd.figures import get_application
+    from meaxtd.stat_plots import RasterPlot
+    get_application()
+    figure = pg.PlotWidget()
+    raster = RasterPlot()
+    figure.addItem(raster)
+    figure.setXRange(0, 10, padding=0)
+    x = np.linspace(0, 10, 1000)
+    y = np.repeat([1.0, 2.0], 500)
+    raster.setRaster(x, y, 2)
+    assert len(raster.data) == 1000 and not raster.density.isVisible()
+
+    raster.limit = 100
+    raster.updateRasterPlot()
+    assert len(raster.data) == 0 and raster.density.isVisible()
+    assert raster.density.image.sum() == 1000
@@ -0,0 +1,41 @@
+import pytest
+
+from meaxtd.synthetic import generate_recording
+
+# the harness and the frozen reference implementation live in benchmarks/, which only a source checkout has
+golden = pytest.importorskip('benchmarks.golden')
+load_implementation = golden.load_implementation
+run_implementation = golden.run_implementation
+compare_outputs = golden.compare_outputs
+compare_errors = golden.compare_errors
+REFERENCE_MODULES = golden.REFERENCE_MODULES
+CANDIDATE_MODULES = golden.CANDIDATE_MODULES
+
+
+@pytest.fixture(scope='module')
+def recording():
+    return generate_recording(num_channels=60, duration=15.0, seed=3, network_burst_rate=0.3)
+
+
+@pytest.mark.parametrize('burst_method', ['TSR', 'Burstlet'])
+def test_candidate_matches_reference(recording, burst_method):
+    """Check that the current pipeline reproduces the reference results on a synthetic recording."""
+    reference, _, reference_errors = run_implementation(load_implementation(REFERENCE_MODULES), recording,
+                                                        burst_method, 1)
+    candidate, _, candidate_errors = run_implementation(load_implementation(CANDIDATE_MODULES), recording,
+                                                        burst_method, 1)
+    assert reference.bursts
+    assert compare_errors(reference_errors, candidate_errors) == []
+    assert compare_outputs(reference, candidate) == []
+
+
+def test_changed_spikes_are_reported(recording):
+    """Check that the harness reports a difference in a single spike."""
+    implementation = load_implementation(CANDIDATE_MODULES)
+    reference, _, _ = run_implementation(implementation, recording, 'TSR', 1)
+    candidate, _, _ = run_implementation(implementation, recording, 'TSR', 1)
+    candidate.spikes[0] = candidate.spikes[0].copy()
+    candidate.spikes[0][0] += 1
+    differences = compare_outputs(reference, candidate)
+    assert len(differences) == 1
+    assert differences[0].startswith('spikes[0]')
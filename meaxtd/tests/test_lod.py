@@ -0,0 +1,52 @@
+import numpy as np
+from types import SimpleNamespace
+
+from meaxtd.lod import MinMaxPyramid, CountPyramid, get_pyramid, get_pyramids
+
+
+def test_min_max_pyramid_matches_blocks():
+    """Check that every level holds the exact minimum and maximum of its blocks, NaN gaps included."""
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=10000)
+    values[3000:3500] = np.nan
+    pyramid = MinMaxPyramid(values, base_block=16, chunk_size=1000)
+    for level, block_size in enumerate(pyramid.block_sizes):
+        padded_size = len(pyramid.minima[level]) * block_size
+        blocks = np.concatenate([values, np.full(padded_size - len(values), np.nan)]).reshape(-1, block_size)
+        assert np.allclose(pyramid.minima[level], np.fmin.reduce(blocks, axis=1), equal_nan=True)
+        assert np.allclose(pyramid.maxima[level], np.fmax.reduce(blocks, axis=1), equal_nan=True)
+
+    indices, envelope = pyramid.envelope(0, len(values), 500)
+    assert len(envelope) <= 500
+    assert np.nanmax(envelope) == np.nanmax(values) and np.nanmin(envelope) == np.nanmin(values)
+    indices, envelope = pyramid.envelope(100, 300, 500)
+    assert np.array_equal(indices, np.arange(100, 300)) and np.array_equal(envelope, values[100:300])
+
+
+def test_count_pyramid_matches_histogram():
+    """Check that the level chosen for a pixel width holds the spike counts of its bins."""
+    rng = np.random.default_rng(1)
+    x = rng.uniform(0, 100, 20000)
+    rows = rng.integers(0, 4, 20000)
+    pyramid = CountPyramid(x, rows, 4, 0, 100, max_bins=1024)
+    counts, left, bin_width = pyramid.counts(10, 60, 100)
+    assert bin_width <= 0.5
+    edges = left + np.arange(0, counts.shape[1] + 1) * bin_width
+    for row in range(0, 4):
+        assert np.array_equal(counts[row], np.histogram(x[rows == row], bins=edges)[0])
+    assert pyramid.counts(10, 10.01, 100) is None
+
+
+def test_signal_pyramids_built_together():
+    """Check that the pyramids built for several channels at once equal the ones built channel by channel."""
+    stream = np.random.default_rng(2).normal(size=(5000, 3))
+    data = SimpleNamespace(stream=stream, pyramids={})
+    get_pyramids(data, 'signal', [0, 2])
+    assert sorted(data.pyramids) == [('signal', 0), ('signal', 2)]
+    for channel in range(0, 3):
+        single = MinMaxPyramid(stream[:, channel])
+        together = get_pyramid(data, 'signal', channel)
+        assert single.block_sizes == together.block_sizes
+        for level in range(0, len(single.block_sizes)):
+            assert np.array_equal(single.minima[level], together.minima[level])
+            assert np.array_equal(single.maxima[level], together.maxima[level])
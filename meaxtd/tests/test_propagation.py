@@ -0,0 +1,53 @@
+import numpy as np
+
+from meaxtd.electrode_layout import get_layout
+from meaxtd.find_bursts import find_spikes, find_bursts, calculate_characteristics
+from meaxtd.progress import NullProgress
+from meaxtd.propagation import fit_propagation
+from meaxtd.synthetic import generate_recording
+
+
+def test_plane_waves_are_recovered():
+    """Check speed, direction and initiation site of exact plane waves, several bursts in one call."""
+    positions = get_layout(60).positions
+    speeds = np.array([0.1, 0.25, 0.5])  # m/s
+    angles = np.array([0.0, 90.0, -135.0])
+    activation_times = np.empty((3, 60))
+    for burst_id in range(0, 3):
+        unit = np.array([np.cos(np.radians(angles[burst_id])), np.sin(np.radians(angles[burst_id]))])
+        projection = positions @ unit
+        activation_times[burst_id] = (projection - projection.min()) / (speeds[burst_id] * 1e6)
+    activation_times[1, ::2] = np.nan
+    propagation = fit_propagation(activation_times, positions)
+    assert np.allclose(propagation['speed'], speeds)
+    assert np.allclose(propagation['direction'], angles)
+    for burst_id in range(0, 3):
+        assert activation_times[burst_id, propagation['initiation'][burst_id]] == np.nanmin(activation_times[burst_id])
+
+
+def test_degenerate_bursts():
+    """Check that bursts with too few or collinear channels give NaN instead of failing."""
+    positions = get_layout(64).positions
+    activation_times = np.full((3, 64), np.nan)
+    activation_times[0, :2] = [0.0, 0.001]
+    activation_times[1, :8] = np.arange(8) * 0.001  # one row of electrodes
+    activation_times[2, :] = 0.0  # simultaneous activation
+    propagation = fit_propagation(activation_times, positions)
+    assert np.isnan(propagation['speed'][:2]).all()
+    assert np.isnan(propagation['speed'][2])
+    assert list(propagation['initiation']) == [-1, -1, -1]
+    assert len(fit_propagation(np.empty((0, 64)), positions)['speed']) == 0
+
+
+def test_synthetic_bursts_propagate():
+    """Check that the burst table gets propagation columns with plausible values on a synthetic recording."""
+    data = generate_recording(num_channels=60, duration=10.0, seed=3, network_burst_rate=0.5, propagation_speed=0.05)
+    find_spikes(data, [], 'Median', -5.0, 0, 1, NullProgress())
+    find_bursts(data, [], 'Median', -5.0, 'TSR', 100, 0.1, 0, 1, NullProgress())
+    calculate_characteristics(data, 0, 1, NullProgress())
+    speeds = np.asarray(data.burst_characteristics['Propagation speed, m/s'])
+    assert len(speeds) == len(data.bursts)
+    assert data.burst_activation_times.shape == (len(data.bursts), 60)
+    assert np.nanmedian(speeds) < 0.5
+    initiation = np.asarray(data.burst_characteristics['Initiation electrode'], dtype=float)
+    assert np.array_equal(np.isnan(initiation), np.isnan(speeds))
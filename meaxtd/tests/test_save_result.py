@@ -0,0 +1,85 @@
+import json
+import numpy as np
+from types import SimpleNamespace
+import xml.etree.ElementTree as ET
+
+from meaxtd.construct_graph import compute_delayed_connectivity, build_graph
+from meaxtd.progress import NullProgress
+from meaxtd.save_result import (save_graph_to_file, GRAPH_DATA_FORMATS, get_spike_table, export_tables,
+                                read_tables_from_hdf5)
+
+
+def get_connectivity():
+    channels = [0, 9, 20]
+    spike_trains = [np.arange(0, 1000, 50), np.arange(3, 1000, 50),
+                    np.concatenate([np.arange(7, 500, 50), np.arange(530, 1000, 50)])]
+    return compute_delayed_connectivity(channels, spike_trains, 10, 50)
+
+
+def test_native_graph_formats(tmp_path):
+    """Check that GraphML, JSON and npz hold the same edges and that no image is drawn when none is asked for."""
+    connectivity = get_connectivity()
+    graph = build_graph(connectivity)
+    graph_file = save_graph_to_file(str(tmp_path), NullProgress(), graph, connectivity['hub'], 0, connectivity,
+                                    formats=GRAPH_DATA_FORMATS)
+    assert graph_file is None
+    assert not graph.has_layout
+    num_edges = len(connectivity['edges']['Channel 1'])
+    assert num_edges > 0
+
+    with open(tmp_path / 'graph' / 'graph_burst_1.json') as f:
+        graph_json = json.load(f)
+    assert len(graph_json['edges']) == num_edges
+
+    namespace = {'g': 'http://graphml.graphdrawing.org/xmlns'}
+    graphml = ET.parse(tmp_path / 'graph' / 'graph_burst_1.graphml').getroot()
+    assert len(graphml.findall('g:graph/g:edge', namespace)) == num_edges
+    assert len(graphml.findall('g:graph/g:node', namespace)) == len(connectivity['hub']['Electrode'])
+
+    arrays = np.load(tmp_path / 'graph' / 'graph_burst_1.npz')
+    assert np.array_equal(arrays['C_ij'], connectivity['C_ij'])
+    assert np.array_equal(arrays['edges_tau'], connectivity['edges']['tau'])
+
+
+def test_images_share_one_layout(tmp_path):
+    """Check that png, pdf and dot are written from a single layout."""
+    connectivity = get_connectivity()
+    graph = build_graph(connectivity)
+    graph_file = save_graph_to_file(str(tmp_path), NullProgress(), graph, connectivity['hub'], 0, connectivity,
+                                    formats=['png', 'pdf', 'dot'])
+    assert graph_file.endswith('graph_burst_1.png')
+    assert graph.has_layout
+    for extension in ['png', 'pdf', 'dot']:
+        assert (tmp_path / 'graph' / f"graph_burst_1.{extension}").stat().st_size > 0
+    assert 'pos=' in (tmp_path / 'graph' / 'graph_burst_1.dot').read_text()
+
+
+def get_data():
+    return SimpleNamespace(spikes={0: np.array([10, 120, 300]), 1: np.array([115, 400])},
+                           spikes_amplitudes={0: [-20.0, -35.0, -25.0], 1: [-40.0, -30.0]},
+                           bursts=[{'start': 100, 'end': 200, 'channels': [0, 1]}, {'start': 350, 'end': 450, 'channels': [1]}],
+                           time=np.arange(0, 500) * 0.001, TSR_times=[2.0], time_offset=60.0,
+                           global_characteristics={'Total number of spikes': 5, 'Burst method': 'TSR'},
+                           channel_characteristics={'Channel': [1, 2], 'Num spikes': [3, 2]},
+                           burst_characteristics={'Burst': [1, 2], 'Burst type': ['small', 'large']},
+                           time_characteristics={'Time, s': [0.0, 0.25], 'Num spikes': [2, 3]})
+
+
+def test_spike_table_burst_ids():
+    """Check that every spike gets its time in the file and the ID of the burst containing it."""
+    spikes = get_spike_table(get_data())
+    assert np.array_equal(spikes['Electrode'], [1, 1, 1, 2, 2])
+    assert np.allclose(spikes['Time, s'], [62.01, 62.12, 62.3, 62.115, 62.4])
+    assert np.array_equal(spikes['Burst ID'], [0, 1, 0, 1, 2])
+
+
+def test_hdf5_tables_round_trip(tmp_path):
+    """Check that the HDF5 export keeps every table with its columns, their order and their values."""
+    data = get_data()
+    export_tables(data, f"{tmp_path}/", NullProgress(), 'HDF5')
+    tables = read_tables_from_hdf5(tmp_path / 'results.h5')
+    assert list(tables['global']) == list(data.global_characteristics)
+    assert tables['global']['Burst method'][0] == 'TSR'
+    assert list(tables['burst']['Burst type']) == ['small', 'large']
+    assert np.array_equal(tables['time']['Num spikes'], [2, 3])
+    assert np.array_equal(tables['spikes']['Burst ID'], get_spike_table(data)['Burst ID'])
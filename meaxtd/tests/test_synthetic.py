@@ -0,0 +1,91 @@
+import h5py
+import numpy as np
+import pytest
+import McsPy.McsData
+
+from meaxtd.synthetic import generate_recording, write_h5_file
+from meaxtd.read_h5 import read_h5_file, get_blocks, read_blocks
+from meaxtd.find_bursts import find_spikes
+from meaxtd.progress import NullProgress, CancellableProgress, JobCancelled
+
+
+def test_generator_is_deterministic():
+    """Check that equal seeds give identical recordings and different seeds do not."""
+    first = generate_recording(num_channels=64, duration=2.0, seed=1)
+    second = generate_recording(num_channels=64, duration=2.0, seed=1)
+    third = generate_recording(num_channels=64, duration=2.0, seed=2)
+    assert first.stream.shape == (20000, 64)
+    assert np.array_equal(first.stream, second.stream)
+    assert not np.array_equal(first.stream, third.stream)
+
+
+def test_h5_round_trip(tmp_path):
+    """Check that a written synthetic file is read back by read_h5_file without changes."""
+    McsPy.McsData.VERBOSE = False
+    data = generate_recording(num_channels=60, duration=1.0, fs=20000)
+    path = str(tmp_path / 'synthetic.h5')
+    write_h5_file(data, path)
+    loaded = read_h5_file(path, NullProgress())
+    assert loaded.fs == 20000
+    assert np.array_equal(loaded.stream, data.stream)
+    assert np.array_equal(loaded.time, data.time)
+
+
+def test_h5_window(tmp_path):
+    """Check that a time window of the included channels is read as the same part of the whole recording."""
+    McsPy.McsData.VERBOSE = False
+    data = generate_recording(num_channels=12, duration=150.0, fs=1000)
+    path = str(tmp_path / 'synthetic.h5')
+    write_h5_file(data, path)
+    loaded = read_h5_file(path, NullProgress(), start=1, end=2, excluded_channels=[0, 5])
+    assert loaded.stream.shape == (60001, 12)
+    assert loaded.time_offset == 60.0
+    assert np.array_equal(loaded.time, data.time[:60001])
+    included = [channel for channel in range(0, 12) if channel not in [0, 5]]
+    assert np.array_equal(loaded.stream[:, included], data.stream[60000:120001, included])
+    assert not loaded.stream[:, [0, 5]].any()
+    assert loaded.loaded_channels == included
+    # the end is clipped to the recording
+    assert read_h5_file(path, NullProgress(), start=2, end=3).stream.shape == (30000, 12)
+
+
+class ListProgress:
+    def __init__(self):
+        self.values = []
+
+    def emit(self, value):
+        self.values.append(value)
+
+
+def test_chunked_reading(tmp_path):
+    """Check that the blocks follow the chunks, progress follows the bytes read and a cancelled read stops."""
+    data = generate_recording(num_channels=8, duration=10.0, fs=10000)
+    path = str(tmp_path / 'synthetic.h5')
+    write_h5_file(data, path)
+    with h5py.File(path, 'r') as f:
+        dataset = f['Data/Recording_0/AnalogStream/Stream_0/ChannelData']
+        blocks = get_blocks(dataset, 15000, 95000, block_bytes=8 * 4 * 20000)
+        assert blocks == [(15000, 20000), (20000, 40000), (40000, 60000), (60000, 80000), (80000, 95000)]
+
+        stream = np.zeros((len(data.stream), 8))
+        progress = ListProgress()
+        read_blocks(dataset, [0, 1, 2, 5, 6], 0, len(data.stream), stream, progress)
+        assert progress.values == sorted(progress.values) and progress.values[-1] == 90
+        assert np.array_equal(stream[:, [0, 1, 2, 5, 6]], data.stream[:, [0, 1, 2, 5, 6]])
+        assert not stream[:, [3, 4, 7]].any()
+
+        progress = ListProgress()
+        with pytest.raises(JobCancelled):
+            read_blocks(dataset, list(range(0, 8)), 0, len(data.stream), np.zeros((len(data.stream), 8)),
+                        CancellableProgress(progress, lambda: len(progress.values) > 0), max_workers=1,
+                        block_bytes=8 * 4 * 10000)
+        assert len(progress.values) == 1
+
+
+def test_injected_spikes_are_detected():
+    """Check that find_spikes recovers most of the injected spikes."""
+    data = generate_recording(num_channels=60, duration=5.0)
+    find_spikes(data, [], 'Median', -5.0, 0, 1, NullProgress())
+    num_found = sum(len(data.spikes[channel_id]) for channel_id in data.spikes)
+    num_injected = sum(len(spikes) for spikes in data.ground_truth['spikes'].values())
+    assert 0.9 * num_injected < num_found <= 1.05 * num_injected
@@ -0,0 +1,34 @@
+import numpy as np
+from PySide6.QtCore import Qt, QPersistentModelIndex
+from PySide6.QtWidgets import QApplication
+
+from meaxtd.table_model import ColumnTableModel
+
+
+def test_cells_are_formatted_from_columns():
+    """Check that cells are formatted on request, excluded rows are skipped and text columns are kept as they are."""
+    QApplication.instance() or QApplication([])
+    model = ColumnTableModel({'Channel': [1, 2, 3], 'Rate': [0.123456, 1.0 / 3, 0.0000012], 'Channels': ['1; 2', '3', '']},
+                             rows=[0, 2], decimals=2)
+
+    assert model.rowCount() == 2 and model.columnCount() == 3
+    assert model.headerData(1, Qt.Horizontal) == 'Rate'
+    assert model.index(0, 1).data() == '0.12'
+    assert model.index(1, 1).data() == '1e-06'
+    assert model.index(1, 0).data() == '3'
+    assert model.index(0, 2).data() == '1; 2'
+
+
+def test_numeric_columns_sort_by_value():
+    """Check that a numeric column sorts by value, not as text, and that persistent indices follow their rows."""
+    QApplication.instance() or QApplication([])
+    num_rows = 50000
+    values = np.random.default_rng(0).uniform(0, 100, num_rows)
+    model = ColumnTableModel({'Burst ID': list(range(1, num_rows + 1)), 'Duration, s': values.tolist()})
+    persistent = QPersistentModelIndex(model.index(0, 0))
+
+    model.sort(1, Qt.DescendingOrder)
+    assert model.get_source_row(0) == int(np.argmax(values))
+    assert model.index(persistent.row(), 0).data() == '1'
+    model.sort(0, Qt.AscendingOrder)
+    assert [model.index(row, 0).data() for row in (0, 9, 99)] == ['1', '10', '100']
@@ -0,0 +1,178 @@
+import time
+import numpy as np
+import pyqtgraph as pg
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import QApplication
+
+from meaxtd.hdf5plot import HDF5PlotXY
+from meaxtd.viewport import ViewportScheduler, WindowCache
+
+
+def test_linked_plots_update_in_one_batch():
+    """Check that a pan over linked plots triggers one batched update that sets the visible window of every curve."""
+    application = QApplication.instance() or QApplication([])
+    fs = 1000
+    stream = np.random.default_rng(0).normal(size=(100000, 3))
+    time_axis = np.arange(0, len(stream)) / fs
+    scheduler = ViewportScheduler(delay=1)
+    num_updates = []
+    scheduler.timer.timeout.connect(lambda: num_updates.append(1))
+    plots = []
+    for channel in range(0, 3):
+        plot = pg.PlotWidget()
+        curve = HDF5PlotXY()
+        plot.addItem(curve)
+        curve.setHDF5(time_axis, stream[:, channel], fs, scheduler=scheduler)
+        if plots:
+            plot.getViewBox().setXLink(plots[-1])
+        plots.append(plot)
+
+    plots[0].setXRange(10, 12, padding=0)
+    deadline = time.perf_counter() + 5
+    while not num_updates and time.perf_counter() < deadline:
+        application.processEvents()
+
+    assert len(num_updates) == 1
+    for channel, plot in enumerate(plots):
+        x, y = plot.plotItem.curves[0].getData()
+        assert x[0] <= 10 and x[-1] >= 11.99
+        assert np.array_equal(y, stream[np.searchsorted(time_axis, x[0]):np.searchsorted(time_axis, x[-1]) + 1, channel])
+
+
+def test_superseded_refinement_is_dropped():
+    """Check that a coarse envelope is set at once and only the refinement of the latest range is applied."""
+    application = QApplication.instance() or QApplication([])
+    fs = 1000
+    signal = np.random.default_rng(1).normal(size=2000000)
+    time_axis = np.arange(0, len(signal)) / fs
+    scheduler = ViewportScheduler()
+    plot = pg.PlotWidget()
+    curve = HDF5PlotXY()
+    plot.addItem(curve)
+    curve.setHDF5(time_axis, signal, fs, scheduler=scheduler)
+    applied = []
+    scheduler.refined.connect(lambda generation, envelopes: applied.append(generation == scheduler.generation))
+
+    scheduler.x_range = [0, 2000]
+    scheduler.update_curves()
+    assert len(curve.getData()[0]) <= curve.limit // scheduler.coarse_factor + 2
+    scheduler.x_range = [100, 1100]
+    scheduler.update_curves()
+    deadline = time.perf_counter() + 5
+    while len(applied) < 2 and time.perf_counter() < deadline:
+        application.processEvents()
+    scheduler.shutdown()
+
+    assert applied == [False, True]
+    x, y = curve.getData()
+    assert curve.limit // scheduler.coarse_factor < len(x) <= curve.limit + 2
+    assert x[0] <= 100 and x[-1] >= 1099
+
+
+def test_channel_grid_creates_only_visible_plots():
+    """Check that a 256-channel recording gets one screen of plots and that scrolling reuses them for other channels."""
+    from PySide6.QtWidgets import QGridLayout, QWidget
+    from meaxtd.MEAXtd import PlotDialog
+    from meaxtd.data import Data
+
+    QApplication.instance() or QApplication([])
+    data = Data()
+    data.fs = 1000
+    data.stream = np.random.default_rng(0).normal(size=(5000, 256))
+    data.time = np.arange(0, len(data.stream)) / data.fs
+    widget = QWidget()
+    plot = PlotDialog(QGridLayout(widget))
+    plot.set_data(data, 0, 1)
+    plot.plot_signals(None)
+    slots = list(plot.slots)
+
+    assert len(slots) == 60 and plot.scroll_bar.maximum() == 20
+    assert sorted(data.pyramids) == [('signal', channel) for channel in range(0, 60)]
+
+    plot.show_channel(255)
+    assert plot.slots == slots
+    assert plot.slot_channels[:56] == list(range(200, 256)) and plot.slot_channels[56:] == [None] * 4
+    assert all(slot.isHidden() for slot in slots[56:])
+    assert ('signal', 0) in data.pyramids and ('signal', 100) not in data.pyramids
+    curve = slots[0].plotItem.curves[0]
+    assert len(slots[0].plotItem.curves) == 1 and curve.y is not None
+    assert np.array_equal(curve.y, data.stream[:, 200])
+
+
+def test_window_cache_drops_least_recently_used():
+    """Check that the window cache stays within max_bytes and drops the least recently used window."""
+    indices = np.arange(0, 100)
+    cache = WindowCache(max_bytes=2 * 800)
+    cache.put('a', (indices, np.zeros(100)))
+    cache.put('b', (indices, np.zeros(100)))
+    assert cache.get('a') is not None
+    cache.put('c', (indices, np.zeros(100)))
+    assert cache.get('b') is None and cache.get('a') is not None and cache.get('c') is not None
+    assert cache.num_bytes == 1600
+
+
+def test_navigation_prefetches_neighbouring_events():
+    """Check that stepping to the next spike finds the windows of all linked plots already decimated."""
+    from PySide6.QtWidgets import QGridLayout, QWidget
+    from meaxtd.MEAXtd import PlotDialog
+    from meaxtd.data import Data
+
+    application = QApplication.instance() or QApplication([])
+    data = Data()
+    data.fs = 1000
+    data.stream = np.random.default_rng(0).normal(size=(200000, 60))
+    data.time = np.arange(0, len(data.stream)) / data.fs
+    data.spikes = {2: np.array([10000, 50000, 90000, 130000])}
+    data.spikes_amplitudes = {2: np.zeros(4)}
+    widget = QWidget()
+    plot_grid = QGridLayout(widget)
+    plot = PlotDialog(plot_grid)
+    plot.set_data(data, 0, 4)
+    plot.plot_signals(plot_grid)
+    widget.setAttribute(Qt.WA_DontShowOnScreen)
+    widget.show()
+    application.processEvents()
+    prefetched = []
+    plot.scheduler.prefetched.connect(prefetched.append)
+
+    plot.change_range_next(plot_grid, 'spike', 3)
+    deadline = time.perf_counter() + 5
+    while not prefetched and time.perf_counter() < deadline:
+        application.processEvents()
+    plot.change_range_next(plot_grid, 'spike', 3)
+    plot.scheduler.shutdown()
+
+    x_range = plot.slots[0].getViewBox().viewRange()[0]
+    assert plot.spike_id == 1 and x_range[0] < 50 < x_range[1]
+    windows = plot.scheduler.get_windows(x_range)
+    assert len(windows) == 1 and len(windows[0][0]) == 60
+    assert plot.scheduler.get_cached(*windows[0]) is not None
+
+
+def test_cached_window_serves_ranges_inside_it():
+    """Check that a pan inside a cached window is a cache hit with the same envelope as decimating it again."""
+    from meaxtd.lod import MinMaxPyramid, envelope_many
+
+    QApplication.instance() or QApplication([])
+    fs = 1000
+    signal = np.random.default_rng(2).normal(size=1000000)
+    scheduler = ViewportScheduler()
+    plot = pg.PlotWidget()
+    curve = HDF5PlotXY()
+    plot.addItem(curve)
+    curve.setHDF5(np.arange(0, len(signal)) / fs, signal, fs, scheduler=scheduler, cache_key=(0, 'signal'))
+    windows = scheduler.decimate_windows(scheduler.get_windows((100, 300)))
+    scheduler.cache_envelopes(windows)
+    assert all(not isinstance(part, MinMaxPyramid) for key in scheduler.cache.windows for part in key)
+
+    for x_range in [(110, 290), (100, 300), (150, 250)]:
+        (curves, start, stop, limit), = scheduler.get_windows(x_range)
+        cached = scheduler.get_cached(curves, start, stop, limit)
+        indices, values = envelope_many([curve.pyramid], start, stop, limit)
+        assert cached is not None
+        assert np.array_equal(cached[0][0], indices) and np.array_equal(cached[0][1], values[0])
+    assert scheduler.get_cached(*scheduler.get_windows((90, 290))[0]) is None
+
+    scheduler.clear()
+    assert scheduler.cache.num_bytes == 0 and scheduler.curves == [curve]
+    scheduler.shutdown()
@@ -0,0 +1,214 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from PySide6.QtCore import QObject, QTimer, Signal
+from meaxtd.lod import envelope_many, get_envelope_block_size
+
+
+class WindowCache:
+    """
+        Bounded LRU cache of decimated windows: (indices, values) of a curve for a sample range, stored under
+        (curve key, point limit, block size, start, stop). find() returns a window containing a range,
+        so a pan inside a cached window is a hit. The least recently used windows are dropped when the values
+        take more than max_bytes.
+    """
+
+    def __init__(self, max_bytes=256 * 2 ** 20):
+        self.max_bytes = max_bytes
+        self.num_bytes = 0
+        self.windows = OrderedDict()
+        # key without (start, stop) -> cached (start, stop) ranges
+        self.ranges = {}
+
+    def get(self, key):
+        window = self.windows.get(key)
+        if window is not None:
+            self.windows.move_to_end(key)
+        return window
+
+    def find(self, prefix, start, stop):
+        """
+            A cached window of prefix + (start, stop) covering [start, stop), None when there is none.
+        """
+        for window_start, window_stop in self.ranges.get(prefix, ()):
+            if window_start <= start and stop <= window_stop:
+                return self.get(prefix + (window_start, window_stop))
+        return None
+
+    def put(self, key, window):
+        if key in self.windows:
+            self.remove(key)
+        self.windows[key] = window
+        self.ranges.setdefault(key[:-2], set()).add(key[-2:])
+        self.num_bytes += window[1].nbytes
+        while self.num_bytes > self.max_bytes and len(self.windows) > 1:
+            self.remove(next(iter(self.windows)))
+
+    def remove(self, key):
+        self.num_bytes -= self.windows.pop(key)[1].nbytes
+        ranges = self.ranges[key[:-2]]
+        ranges.discard(key[-2:])
+        if not ranges:
+            del self.ranges[key[:-2]]
+
+    def clear(self):
+        self.windows.clear()
+        self.ranges.clear()
+        self.num_bytes = 0
+
+
+def slice_window(window, start, stop, block_size):
+    """
+        The part of a cached (indices, values) window that the envelope of [start, stop) with the same block size has.
+    """
+    indices, values = window
+    first = np.searchsorted(indices, start // block_size * block_size)
+    last = np.searchsorted(indices, -(-stop // block_size) * block_size)
+    return indices[first:last], values[first:last]
+
+
+class ViewportScheduler(QObject):
+    """
+        Updates all signal curves of linked plots together. A pan or zoom makes every linked view report a range
+        change; the scheduler waits `delay` ms after the last one, converts the range to a sample window once
+        and decimates every registered curve (signal and highlight layers) in one batch.
+        A coarse envelope (1 / coarse_factor of the points) is set at once on the GUI thread, the full one is computed
+        on a worker thread and set when it returns, unless a newer range change has superseded it.
+        Full envelopes are kept in a WindowCache under the cache_key of the curves, (channel, layer) in the plots,
+        so cached windows do not keep the pyramids and the stream alive; clear() drops them when the data changes.
+        Windows inside one shown before or prefetched are set without decimation.
+    """
+    refined = Signal(int, object)
+    prefetched = Signal(object)
+
+    def __init__(self, delay=15, coarse_factor=8, cache_bytes=256 * 2 ** 20, parent=None):
+        super().__init__(parent)
+        self.curves = []
+        self.x_range = None
+        self.coarse_factor = coarse_factor
+        self.cache = WindowCache(cache_bytes)
+        self.generation = 0
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay)
+        self.timer.timeout.connect(self.update_curves)
+        self.refined.connect(self.set_refined)
+        self.prefetched.connect(self.cache_envelopes)
+
+    def add_curve(self, curve):
+        if curve not in self.curves:
+            self.curves.append(curve)
+
+    def clear(self):
+        """
+            Drop the cached windows and the pending updates, the curves still in a plot stay registered.
+        """
+        self.curves = [curve for curve in self.curves if curve.getViewBox() is not None]
+        self.cache.clear()
+        self.timer.stop()
+        self.generation += 1
+
+    def request(self, x_range):
+        self.x_range = x_range
+        self.timer.start()
+
+    def get_windows(self, x_range=None):
+        """
+            [(curves, start, stop, limit)] for every group of curves with the same length, sampling rate and limit.
+        """
+        if x_range is None:
+            x_range = self.x_range
+        groups = {}
+        for curve in self.curves:
+            groups.setdefault((len(curve.y), curve.fs, curve.limit), []).append(curve)
+        windows = []
+        for (num_samples, fs, limit), curves in groups.items():
+            start = max(0, int(x_range[0] * fs) - 1)
+            stop = min(num_samples, int(x_range[1] * fs + 2))
+            windows.append((curves, start, stop, limit))
+        return windows
+
+    def update_curves(self):
+        self.generation += 1
+        # curves removed from their plots are dropped
+        self.curves = [curve for curve in self.curves if curve.getViewBox() is not None]
+        if not self.curves or self.x_range is None:
+            return
+        refine_windows = []
+        for curves, start, stop, limit in self.get_windows():
+            cached = self.get_cached(curves, start, stop, limit)
+            if cached is not None:
+                for curve, (indices, values) in zip(curves, cached):
+                    curve.setEnvelope(curve.x[indices], values)
+                continue
+            coarse_limit = max(limit // self.coarse_factor, 2)
+            indices, values = envelope_many([curve.pyramid for curve in curves], start, stop, coarse_limit)
+            self.set_envelopes(curves, indices, values)
+            if stop - start > coarse_limit:
+                refine_windows.append((curves, start, stop, limit))
+            else:
+                # raw samples, the full envelope is the same
+                self.cache_envelopes([(curves, start, stop, limit, indices, values)])
+        if refine_windows:
+            generation = self.generation
+            future = self.executor.submit(self.decimate, generation, refine_windows)
+            future.add_done_callback(lambda future: self.refined.emit(generation, future.result()))
+
+    def prefetch(self, x_ranges):
+        """
+            Decimate the windows of other x ranges (e.g. the neighbouring events of navigation) on the worker thread,
+            so that showing them later is read from the cache.
+        """
+        self.curves = [curve for curve in self.curves if curve.getViewBox() is not None]
+        windows = []
+        for x_range in x_ranges:
+            windows.extend([(curves, start, stop, limit) for curves, start, stop, limit in self.get_windows(x_range)
+                            if self.get_cached(curves, start, stop, limit) is None])
+        if windows:
+            future = self.executor.submit(self.decimate_windows, windows)
+            future.add_done_callback(lambda future: self.prefetched.emit(future.result()))
+
+    def get_cached(self, curves, start, stop, limit):
+        """
+            Cached (indices, values) of every curve for the window, None when any of them is missing.
+        """
+        block_size = get_envelope_block_size(curves[0].pyramid, start, stop, limit)
+        windows = [self.cache.find((curve.cache_key, limit, block_size), start, stop) for curve in curves]
+        if any(window is None for window in windows):
+            return None
+        return [slice_window(window, start, stop, block_size) for window in windows]
+
+    def cache_envelopes(self, envelopes):
+        for curves, start, stop, limit, indices, values in envelopes:
+            block_size = get_envelope_block_size(curves[0].pyramid, start, stop, limit)
+            for curve, curve_values in zip(curves, values):
+                self.cache.put((curve.cache_key, limit, block_size, start, stop), (indices, curve_values))
+
+    def decimate(self, generation, windows):
+        # worker thread: requests superseded while waiting in the queue are skipped
+        if generation != self.generation:
+            return None
+        return self.decimate_windows(windows)
+
+    def decimate_windows(self, windows):
+        return [(curves, start, stop, limit, *envelope_many([curve.pyramid for curve in curves], start, stop, limit))
+                for curves, start, stop, limit in windows]
+
+    def set_refined(self, generation, envelopes):
+        if envelopes is None:
+            return
+        self.cache_envelopes(envelopes)
+        if generation != self.generation:
+            return
+        for curves, start, stop, limit, indices, values in envelopes:
+            self.set_envelopes(curves, indices, values)
+
+    def set_envelopes(self, curves, indices, values):
+        x = curves[0].x[indices]
+        for curve, curve_values in zip(curves, values):
+            if curve.getViewBox() is not None:
+                curve.setEnvelope(x, curve_values)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
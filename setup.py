@@ -20,6 +20,9 @@ setup(
         ]
     },
     install_requires=requirements,
+    extras_require={
+        'arrow': ['pyarrow>=8.0.0']
+    },
     setup_requires=['pytest-runner'],
     tests_require=[
         'pytest', 